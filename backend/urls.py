@@ -17,20 +17,21 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
 
-SchemaView = get_schema_view(
-    openapi.Info(
-        title="Blood Bank Portal API",
-        default_version="v1",
-        description="Test description",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="contact@snippets.local"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
+from portalapi.utils.schema import get_cached_schema_view
+from portalapi.views.metrics_views import metrics
+
+API_INFO = openapi.Info(
+    title="Blood Bank Portal API",
+    default_version="v1",
+    description="Test description",
+    terms_of_service="https://www.google.com/policies/terms/",
+    contact=openapi.Contact(email="contact@snippets.local"),
+    license=openapi.License(name="BSD License"),
 )
 
+SchemaView = get_cached_schema_view(API_INFO, public=True)
+
 
 urlpatterns = [
     # Swagger
@@ -45,4 +46,5 @@ urlpatterns = [
     path("redoc/", SchemaView.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
     path("admin/", admin.site.urls),
     path("api/v1/", include("portalapi.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
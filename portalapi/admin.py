@@ -1,7 +1,7 @@
 from django.contrib import admin
 from import_export.admin import ImportExportModelAdmin
 
-from portalapi.utils.admin_builders import CustomUserAdmin
+from portalapi.utils.admin_builders import CustomUserAdmin, ProfileAdmin
 from portalapi.utils.resources import BloodTypeResource
 
 from .models import BloodType, Profile, User
@@ -10,8 +10,9 @@ from .models import BloodType, Profile, User
 # Register your models here.
 class BloodTypeAdmin(ImportExportModelAdmin):
     resource_class = BloodTypeResource
+    readonly_fields = ("donates_to",)
 
 
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(Profile)
+admin.site.register(Profile, ProfileAdmin)
 admin.site.register(BloodType, BloodTypeAdmin)
@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class PortalapiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "portalapi"
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from portalapi import signals
+
+        # Register the job handlers.
+        from portalapi.utils import (  # noqa: F401
+            blood_requests,
+            donor_import,
+            verification,
+        )
+
+        post_migrate.connect(signals.seed_default_reference_data, sender=self)
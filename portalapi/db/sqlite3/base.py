@@ -0,0 +1,35 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ("DEFERRED", "EXCLUSIVE", "IMMEDIATE")
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite backend accepting ``OPTIONS["transaction_mode"]`` (a Django 5.1 option).
+
+    A ``DEFERRED`` transaction that reads before it writes cannot take the write
+    lock once another connection wrote in between; SQLite then fails with
+    "database is locked" at once instead of waiting for ``busy_timeout``. With
+    ``IMMEDIATE`` the lock is taken by ``BEGIN``, so concurrent writers queue.
+    """
+
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.transaction_mode = params.pop("transaction_mode", None)
+        if self.transaction_mode is not None:
+            self.transaction_mode = self.transaction_mode.upper()
+            if self.transaction_mode not in TRANSACTION_MODES:
+                raise ImproperlyConfigured(
+                    f"settings.DATABASES {self.alias!r} OPTIONS['transaction_mode'] "
+                    f"must be one of {', '.join(TRANSACTION_MODES)}."
+                )
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode is None:
+            super()._start_transaction_under_autocommit()
+        else:
+            self.cursor().execute(f"BEGIN {self.transaction_mode}")
@@ -0,0 +1,158 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    setup_test_environment,
+    teardown_databases,
+    teardown_test_environment,
+)
+
+from portalapi.utils.api_benchmark import (
+    SCENARIO_NAMES,
+    QueryCountingApplication,
+    build_scenarios,
+    peak_rss_kib,
+    run_scenario,
+    seed_donors,
+    start_server,
+)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test the auth, profile and blood type endpoints against a threaded "
+        "local server on a throwaway database and print the results as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--donors", type=int, default=1000, help="Donors seeded (default: 1000)."
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per scenario (default: 200).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Concurrent client processes (default: 8).",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=SCENARIO_NAMES,
+            help="Scenario to run, repeatable (default: all).",
+        )
+        parser.add_argument(
+            "--output", default="-", help='Result file, "-" for standard output.'
+        )
+
+    def handle(self, *args, **options):
+        for name in ("donors", "requests", "concurrency"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be a positive integer.")
+        names = options["scenario"] or SCENARIO_NAMES
+
+        setup_test_environment(debug=False)
+        database = connections[DEFAULT_DB_ALIAS].settings_dict
+        with tempfile.TemporaryDirectory() as directory:
+            if database["ENGINE"].endswith("sqlite3"):
+                # The server threads need their own connections to a real file.
+                database["TEST"]["NAME"] = os.path.join(directory, "benchmark.sqlite3")
+            old_config = setup_databases(
+                verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS}
+            )
+            try:
+                report = self.run_benchmark(names, options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                teardown_test_environment()
+
+        output = json.dumps(report, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(output)
+        else:
+            with open(options["output"], "w", encoding="utf-8") as handle:
+                handle.write(output + "\n")
+            self.stderr.write(
+                self.style.SUCCESS(f"Results written to {options['output']}")
+            )
+
+    def run_benchmark(self, names, options):
+        users = seed_donors(options["donors"])
+        scenarios = build_scenarios(users, options["requests"], names)
+        connections.close_all()
+
+        concurrency = options["concurrency"]
+        # Fork (and start) every client before the server thread exists.
+        executor = ProcessPoolExecutor(concurrency, mp_context=get_context("fork"))
+        wait([executor.submit(int) for _ in range(concurrency)])
+        application = QueryCountingApplication(get_wsgi_application())
+        server = start_server(application)
+        host, port = server.server_address[:2]
+        base_url = f"http://{host}:{port}/api/v1/"
+        results = {}
+        try:
+            # Measure the endpoints rather than the login throttles: every
+            # client comes from the same address and may hash at once.
+            with override_settings(
+                ALLOWED_HOSTS=[host],
+                LOGIN_THROTTLE_IP=None,
+                LOGIN_THROTTLE_ACCOUNT=None,
+                LOGIN_HASH_QUEUE_SIZE=concurrency,
+            ):
+                for scenario in scenarios:
+                    self.stderr.write(f"Running {scenario.name}...")
+                    results[scenario.name] = run_scenario(
+                        executor, base_url, scenario, concurrency, application
+                    )
+        finally:
+            server.shutdown()
+            server.server_close()
+            executor.shutdown()
+            connections.close_all()
+
+        return {
+            "revision": git_revision(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connections[DEFAULT_DB_ALIAS].vendor,
+                "cpus": os.cpu_count(),
+                "platform": sys.platform,
+            },
+            "config": {
+                "donors": options["donors"],
+                "requests": options["requests"],
+                "concurrency": concurrency,
+            },
+            "scenarios": results,
+            "peak_rss_kib": peak_rss_kib(),
+        }
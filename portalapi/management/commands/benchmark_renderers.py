@@ -0,0 +1,107 @@
+import io
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from djangorestframework_camel_case.parser import (
+    CamelCaseJSONParser as LibraryJSONParser,
+)
+from djangorestframework_camel_case.render import (
+    CamelCaseJSONRenderer as LibraryJSONRenderer,
+)
+
+from portalapi.models import BloodType, Profile, Role, Scope, User
+from portalapi.serializers.request.aiding_serializers import BloodTypeSerializer
+from portalapi.serializers.request.user_serializers import UserSerializerWithProfile
+from portalapi.utils.parsers import CamelCaseJSONParser
+from portalapi.utils.renderers import CamelCaseJSONRenderer
+
+
+class Rollback(Exception):
+    pass
+
+
+def me_payload():
+    """
+    Serialize a representative ``/profile/me`` user inside a rolled back
+    transaction.
+    """
+    payload = None
+    try:
+        with transaction.atomic():
+            role = Role.objects.create(name="Benchmark donor")
+            role.scopes.set(
+                Scope.objects.create(entity=entity, action=action, level="self")
+                for entity in ("profile", "donor", "bloodtype")
+                for action in ("view", "update")
+            )
+            user = User.objects.create_user(
+                username="benchmark@example.com",
+                email="benchmark@example.com",
+                first_name="Bench",
+                last_name="Mark",
+                role=role,
+            )
+            Profile.objects.create(
+                user=user,
+                blood_type=BloodType.objects.order_by("id").first(),
+                house_no="12, Gandhi Street",
+                state="Tamil Nadu",
+                pin_code="600001",
+            )
+            user = User.objects.select_related("role", "profile").get(pk=user.pk)
+            payload = UserSerializerWithProfile(user).data
+            raise Rollback
+    except Rollback:
+        pass
+    return payload
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the project camelCase JSON renderer/parser with the "
+        "djangorestframework_camel_case ones on the me and blood type payloads."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=5000)
+
+    def bench(self, label, old, new, iterations):
+        old_time = min(timeit.repeat(old, number=iterations, repeat=3))
+        new_time = min(timeit.repeat(new, number=iterations, repeat=3))
+        self.stdout.write(
+            f"{label:<22} {old_time / iterations * 1e6:>10.1f} "
+            f"{new_time / iterations * 1e6:>10.1f} {old_time / new_time:>8.2f}x"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        payloads = {
+            "me": me_payload(),
+            "blood types": BloodTypeSerializer(
+                BloodType.objects.prefetch_related("donates_to").order_by("id"),
+                many=True,
+            ).data,
+        }
+        library_renderer, renderer = LibraryJSONRenderer(), CamelCaseJSONRenderer()
+        library_parser, parser = LibraryJSONParser(), CamelCaseJSONParser()
+
+        self.stdout.write(
+            f"{'payload':<22} {'library µs':>10} {'project µs':>10} speedup"
+        )
+        for name, payload in payloads.items():
+            content = library_renderer.render(payload)
+            if renderer.render(payload) != content:
+                self.stderr.write(self.style.ERROR(f"{name}: rendered bytes differ"))
+            self.bench(
+                f"render {name}",
+                lambda payload=payload: library_renderer.render(payload),
+                lambda payload=payload: renderer.render(payload),
+                iterations,
+            )
+            self.bench(
+                f"parse {name}",
+                lambda content=content: library_parser.parse(io.BytesIO(content)),
+                lambda content=content: parser.parse(io.BytesIO(content)),
+                iterations,
+            )
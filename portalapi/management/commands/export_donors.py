@@ -0,0 +1,54 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portalapi.utils.compatibility import get_compatibility_matrix
+from portalapi.utils.constants import DONOR_EXPORT_CHUNK_SIZE
+from portalapi.utils.donor_export import export_donors
+
+
+class Command(BaseCommand):
+    help = "Stream donors to a CSV or NDJSON file, optionally gzipped."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "output", help='Destination file, "-" writes to standard output.'
+        )
+        parser.add_argument(
+            "--format", dest="file_format", choices=["csv", "ndjson"], default="csv"
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument("--blood-type", help="Blood type id or name.")
+        parser.add_argument("--state", help="Only export donors of this state.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DONOR_EXPORT_CHUNK_SIZE,
+            help=f"Rows fetched per database round trip (default: {DONOR_EXPORT_CHUNK_SIZE}).",
+        )
+
+    def handle(self, *args, **options):
+        blood_type_id = None
+        if options["blood_type"]:
+            blood_type_id = get_compatibility_matrix().resolve(options["blood_type"])
+            if blood_type_id is None:
+                raise CommandError(f"Unknown blood type {options['blood_type']!r}.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be a positive integer.")
+
+        chunks = export_donors(
+            blood_type_id=blood_type_id,
+            state=options["state"],
+            file_format=options["file_format"],
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"] == "-":
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+        with open(options["output"], "wb") as output:
+            for chunk in chunks:
+                output.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"Donors exported to {options['output']}"))
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from portalapi.utils.schema import generate_schema, write_schema_file
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema once and write it to OPENAPI_SCHEMA_PATH."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Destination file (default: settings.OPENAPI_SCHEMA_PATH).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["output"] or settings.OPENAPI_SCHEMA_PATH
+        write_schema_file(path, generate_schema())
+        self.stdout.write(self.style.SUCCESS(f"OpenAPI schema written to {path}"))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from portalapi.utils.donor_import import (
+    DonorImporter,
+    DonorImportError,
+    read_donor_rows,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream a CSV/XLSX donor file into users and donor profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file with a header row.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Rows validated and inserted per batch (default: 1000).",
+        )
+        parser.add_argument(
+            "--hash-workers",
+            type=int,
+            default=None,
+            help="Password hashing processes, 0 hashes inline (default: CPU count).",
+        )
+        parser.add_argument(
+            "--rejects",
+            default=None,
+            help="CSV file receiving rejected rows (default: <path>.rejects.csv).",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be a positive integer.")
+        rejects_path = options["rejects"] or f"{options['path']}.rejects.csv"
+        try:
+            with open(rejects_path, "w", newline="", encoding="utf-8") as rejects:
+                importer = DonorImporter(
+                    batch_size=options["batch_size"],
+                    hash_workers=options["hash_workers"],
+                    rejects=rejects,
+                )
+                result = importer.run(read_donor_rows(options["path"]))
+        except (DonorImportError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Processed {result.processed} rows: {result.created} donors "
+                f"created, {result.rejected} rejected."
+            )
+        )
+        if result.rejected:
+            self.stdout.write(f"Rejected rows written to {rejects_path}")
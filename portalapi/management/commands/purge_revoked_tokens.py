@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from portalapi.utils.revocation import purge_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete the revocations of tokens that have expired since."
+
+    def handle(self, *args, **options):
+        deleted = purge_revoked_tokens()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} revoked tokens."))
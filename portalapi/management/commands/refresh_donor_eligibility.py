@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from portalapi.utils.eligibility import sweep_eligibility
+
+
+class Command(BaseCommand):
+    help = "Refresh the donor eligibility dates that changed, meant to run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Recompute every profile, e.g. after bulk updates skipping signals.",
+        )
+
+    def handle(self, *args, **options):
+        written = sweep_eligibility(options["batch_size"], full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Updated the eligibility of {written} donors.")
+        )
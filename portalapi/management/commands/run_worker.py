@@ -0,0 +1,43 @@
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from portalapi.utils.jobs import Worker, work_until_idle
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background jobs of the database queue (verification codes, "
+        "blood request notifications). Several workers may run at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Threads running jobs (default: 1).",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds between polls of an empty queue (default: 1).",
+        )
+        parser.add_argument(
+            "--once", action="store_true", help="Exit once no job is runnable."
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be a positive integer.")
+        if options["once"]:
+            count = work_until_idle()
+            self.stdout.write(f"Ran {count} jobs.")
+            return
+        worker = Worker(options["concurrency"], options["interval"])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            # Finish the jobs in progress, then exit.
+            signal.signal(signum, lambda *_: worker.stop())
+        self.stdout.write(f"Worker {worker.name} running jobs.")
+        worker.run()
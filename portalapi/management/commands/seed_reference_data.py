@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from portalapi.utils.reference_data import seed_reference_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the blood type, scope and role fixtures whose checksum changed "
+        "(this also runs after every migrate)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Apply every fixture, even when its checksum matches.",
+        )
+
+    def handle(self, *args, **options):
+        applied = seed_reference_data(options["database"], force=options["force"])
+        if applied:
+            self.stdout.write(self.style.SUCCESS(f"Applied: {', '.join(applied)}"))
+        else:
+            self.stdout.write("Reference data is up to date.")
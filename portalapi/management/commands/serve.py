@@ -0,0 +1,138 @@
+import os
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve the project with preforked Gunicorn workers (uvicorn workers with "
+        "--asgi). The app is loaded and warmed up once before forking."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            action="append",
+            help="Address to listen on, repeatable (default: 0.0.0.0:$PORT or 0.0.0.0:8000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Worker processes (default: $WEB_CONCURRENCY or 2 * CPUs + 1).",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads per WSGI worker; above 1 uses the gthread worker.",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=2000,
+            help="Recycle a worker after this many requests, 0 disables (default: 2000).",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            help="Random spread added to --max-requests (default: 10%% of it).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=30,
+            help=(
+                "Seconds a sync worker may spend on one request before it is "
+                "killed, which cuts long donor exports. gthread (--threads > 1) "
+                "and ASGI workers are not bound by it (default: 30)."
+            ),
+        )
+        parser.add_argument(
+            "--graceful-timeout",
+            type=int,
+            default=30,
+            help="Seconds workers get to finish in-flight requests on reload/stop.",
+        )
+        parser.add_argument("--keep-alive", type=int, default=5)
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument(
+            "--asgi",
+            dest="asgi",
+            action="store_true",
+            default=None,
+            help="Serve ASGI with uvicorn workers (default when ASYNC_API_VIEWS is on).",
+        )
+        mode.add_argument("--wsgi", dest="asgi", action="store_false")
+        parser.add_argument(
+            "--access-log", action="store_true", help="Log requests to stdout."
+        )
+        parser.add_argument(
+            "--allow-local-cache",
+            action="store_true",
+            help=(
+                "Serve several workers with a per-process (LocMem) default cache. "
+                "Each worker then keeps its own role scopes, token revocations and "
+                "login throttles; set REDIS_URL instead."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            # pylint: disable=import-outside-toplevel
+            from portalapi.utils.serving import PortalApplication, default_workers
+        except ImportError as exc:
+            raise CommandError("Install gunicorn to use the serve command.") from exc
+        asgi = settings.ASYNC_API_VIEWS if options["asgi"] is None else options["asgi"]
+        if asgi:
+            try:
+                # pylint: disable=import-outside-toplevel,unused-import
+                import uvicorn  # noqa: F401
+            except ImportError as exc:
+                raise CommandError("Install uvicorn to serve ASGI.") from exc
+        for name, minimum in (("workers", 1), ("threads", 1), ("max_requests", 0)):
+            if options[name] is not None and options[name] < minimum:
+                raise CommandError(
+                    f"--{name.replace('_', '-')} must be at least {minimum}."
+                )
+        workers = options["workers"] or default_workers()
+        if workers > 1 and isinstance(caches["default"], LocMemCache):
+            if not options["allow_local_cache"]:
+                raise CommandError(
+                    f"Refusing to start {workers} workers with a per-process "
+                    "default cache: invalidations would not reach the other "
+                    "workers. Set REDIS_URL, pass --workers 1, or "
+                    "--allow-local-cache."
+                )
+            self.stderr.write(
+                self.style.WARNING(
+                    "The default cache is per-process; workers will not see each "
+                    "other's invalidations."
+                )
+            )
+        if settings.DEBUG:
+            self.stderr.write(
+                self.style.WARNING("DEBUG is on; do not serve it publicly.")
+            )
+
+        max_requests = options["max_requests"]
+        jitter = options["max_requests_jitter"]
+        if jitter is None:
+            jitter = max_requests // 10
+        PortalApplication(
+            {
+                "bind": options["bind"] or [f"0.0.0.0:{os.environ.get('PORT', 8000)}"],
+                "workers": workers,
+                "threads": options["threads"],
+                "max_requests": max_requests,
+                "max_requests_jitter": jitter,
+                "timeout": options["timeout"],
+                "graceful_timeout": options["graceful_timeout"],
+                "keepalive": options["keep_alive"],
+                "accesslog": "-" if options["access_log"] else None,
+                "proc_name": "portal",
+            },
+            asgi=asgi,
+        ).run()
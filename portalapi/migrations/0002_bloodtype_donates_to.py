@@ -0,0 +1,42 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:04
+
+from django.db import migrations, models
+
+
+def populate_donates_to(apps, schema_editor):
+    BloodType = apps.get_model("portalapi", "BloodType")
+    through = BloodType.donates_to.through
+    blood_types = list(BloodType.objects.all())
+    ids_by_name = {blood_type.blood_type: blood_type.id for blood_type in blood_types}
+    edges = []
+    for blood_type in blood_types:
+        names = []
+        for name in blood_type.compatible_with.split(","):
+            name = name.strip().lstrip(";").strip()
+            if name and name not in names:
+                names.append(name)
+        blood_type.compatible_with = ", ".join(names)
+        blood_type.save(update_fields=["compatible_with"])
+        edges.extend(
+            through(from_bloodtype_id=blood_type.id, to_bloodtype_id=ids_by_name[name])
+            for name in names
+            if name in ids_by_name
+        )
+    through.objects.bulk_create(edges)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bloodtype",
+            name="donates_to",
+            field=models.ManyToManyField(
+                blank=True, related_name="receives_from", to="portalapi.bloodtype"
+            ),
+        ),
+        migrations.RunPython(populate_donates_to, migrations.RunPython.noop),
+    ]
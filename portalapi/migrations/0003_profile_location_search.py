@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+def backfill_normalized_location(apps, schema_editor):
+    Profile = apps.get_model("portalapi", "Profile")
+    batch = []
+    for profile in Profile.objects.only("id", "state", "pin_code").iterator(
+        chunk_size=2000
+    ):
+        profile.normalized_state = " ".join((profile.state or "").split()).casefold()
+        profile.normalized_pin_code = "".join((profile.pin_code or "").split())[:10]
+        batch.append(profile)
+        if len(batch) == 2000:
+            Profile.objects.bulk_update(
+                batch, ["normalized_state", "normalized_pin_code"]
+            )
+            batch = []
+    Profile.objects.bulk_update(batch, ["normalized_state", "normalized_pin_code"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0002_bloodtype_donates_to"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="normalized_pin_code",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=10
+            ),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="normalized_state",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=255
+            ),
+        ),
+        migrations.RunPython(backfill_normalized_location, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["blood_type", "normalized_pin_code", "id"],
+                name="profile_blood_pin_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="profile",
+            index=models.Index(
+                fields=["blood_type", "normalized_state", "id"],
+                name="profile_blood_state_idx",
+            ),
+        ),
+    ]
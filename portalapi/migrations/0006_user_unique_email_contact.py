@@ -0,0 +1,29 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:09
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0005_user_profile_modified_date"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("email"),
+                condition=models.Q(("email", ""), _negated=True),
+                name="unique_user_email",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("contact", ""), _negated=True),
+                fields=("contact",),
+                name="unique_user_contact",
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:11
+
+from django.db import migrations
+from xid import XID, InvalidXID
+
+import portalapi.utils.ids
+
+
+def is_xid(value):
+    try:
+        XID(value)
+    except (InvalidXID, TypeError, ValueError, IndexError):
+        return False
+    return True
+
+
+def rekey_users(apps, schema_editor):
+    """
+    Give every user whose id is not an XID a time ordered XID derived from
+    ``date_joined``, updating every foreign key and many to many row pointing to it.
+    """
+    User = apps.get_model("portalapi", "User")
+    references = []
+    for relation in User._meta.related_objects:
+        if relation.many_to_many:
+            through = relation.through
+            references.append((through, relation.field.m2m_reverse_field_name()))
+        else:
+            references.append((relation.related_model, relation.field.name))
+    for field in User._meta.many_to_many:
+        references.append((field.remote_field.through, field.m2m_field_name()))
+
+    for old_id, date_joined in User.objects.values_list("id", "date_joined"):
+        if is_xid(old_id):
+            continue
+        new_id = portalapi.utils.ids.xid_for_datetime(date_joined)
+        User.objects.filter(id=old_id).update(id=new_id)
+        for model, field_name in references:
+            model.objects.filter(**{f"{field_name}_id": old_id}).update(
+                **{f"{field_name}_id": new_id}
+            )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0006_user_unique_email_contact"),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_users, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="id",
+            field=portalapi.utils.ids.XIDField(
+                editable=False, primary_key=True, serialize=False
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.3 on 2026-10-18 14:33
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_blood_types(apps, schema_editor):
+    """
+    Keep the oldest row of every duplicated blood type name, pointing profiles
+    at it, so the name can become unique.
+    """
+    BloodType = apps.get_model("portalapi", "BloodType")
+    Profile = apps.get_model("portalapi", "Profile")
+    duplicates = (
+        BloodType.objects.values("blood_type")
+        .annotate(count=Count("id"), keep=Min("id"))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates:
+        others = BloodType.objects.filter(blood_type=duplicate["blood_type"]).exclude(
+            id=duplicate["keep"]
+        )
+        Profile.objects.filter(blood_type__in=others).update(
+            blood_type_id=duplicate["keep"]
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0007_user_xid_primary_key"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_blood_types, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="ReferenceData",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+                ("checksum", models.CharField(max_length=64)),
+                ("applied_date", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="bloodtype",
+            name="blood_type",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
@@ -0,0 +1,115 @@
+# Generated by Django 4.2.3 on 2026-10-18 15:05
+
+from datetime import date
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def _shift_years(day, years):
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        return day.replace(year=day.year + years, day=28)
+
+
+def populate_eligibility(apps, schema_editor):
+    # No donations are recorded yet: donors are eligible from 18 until 65.
+    Profile = apps.get_model("portalapi", "Profile")
+    DonorEligibility = apps.get_model("portalapi", "DonorEligibility")
+    today = date.today()
+    batch = []
+    for profile_id, date_of_birth in Profile.objects.values_list(
+        "id", "date_of_birth"
+    ).iterator(chunk_size=2000):
+        eligible_from = eligible_until = None
+        if date_of_birth is not None:
+            eligible_from = _shift_years(date_of_birth, 18)
+            eligible_until = _shift_years(date_of_birth, 66)
+            if eligible_until <= today:
+                eligible_from = None
+        batch.append(
+            DonorEligibility(
+                profile_id=profile_id,
+                eligible_from=eligible_from,
+                eligible_until=eligible_until,
+            )
+        )
+        if len(batch) == 2000:
+            DonorEligibility.objects.bulk_create(batch)
+            batch = []
+    DonorEligibility.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0011_job_queue"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DonorEligibility",
+            fields=[
+                (
+                    "profile",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="eligibility",
+                        serialize=False,
+                        to="portalapi.profile",
+                    ),
+                ),
+                ("last_donated_on", models.DateField(blank=True, null=True)),
+                (
+                    "eligible_from",
+                    models.DateField(blank=True, db_index=True, null=True),
+                ),
+                ("eligible_until", models.DateField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Donation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("donated_on", models.DateField()),
+                ("units", models.PositiveSmallIntegerField(default=1)),
+                ("created_date", models.DateTimeField(auto_now_add=True)),
+                (
+                    "blood_request",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="donations",
+                        to="portalapi.bloodrequest",
+                    ),
+                ),
+                (
+                    "donor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="donations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["donor", "donated_on"], name="donation_donor_date_idx"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_eligibility, migrations.RunPython.noop),
+    ]
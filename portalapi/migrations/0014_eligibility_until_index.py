@@ -0,0 +1,20 @@
+# Generated by Django 4.2.3 on 2026-10-18 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portalapi", "0013_donor_import"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="donoreligibility",
+            index=models.Index(
+                condition=models.Q(("eligible_from__isnull", False)),
+                fields=["eligible_until"],
+                name="eligibility_until_idx",
+            ),
+        ),
+    ]
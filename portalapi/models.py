@@ -2,8 +2,12 @@ from autoslug import AutoSlugField
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
-from xid import XID
+
+from portalapi.utils.ids import XIDField, generate_xid
 
 
 class Scope(models.Model):
@@ -39,7 +43,7 @@ class Scope(models.Model):
         return self.scope
 
     def save(self, *args, **kwargs):
-        if self.scope is None:
+        if not self.scope:
             self.scope = f"{self.entity}.{self.action}.{self.level}"
         super().save(*args, **kwargs)
 
@@ -75,28 +79,117 @@ class Role(models.Model):
 
 
 class BloodType(models.Model):
-    blood_type = models.CharField(max_length=100)
+    """
+    Model representing a blood group and the groups it can donate to.
+
+    Attributes:
+        blood_type (str): The unique name of the blood group (e.g., "O +ve").
+        compatible_with (str): Comma separated names of the groups this group can
+            donate to. This is the authoring format used by seeding, admin and imports.
+        donates_to (ManyToManyField): The normalized donor -> recipient relation,
+            rebuilt from ``compatible_with`` whenever a blood type is saved.
+
+    Methods:
+        compatible_types: Returns the parsed recipient names of ``compatible_with``.
+    """
+
+    blood_type = models.CharField(max_length=100, unique=True)
     compatible_with = models.CharField(max_length=100)
+    donates_to = models.ManyToManyField(
+        "self", symmetrical=False, related_name="receives_from", blank=True
+    )
 
     def __str__(self):
         return self.blood_type
 
+    def save(self, *args, **kwargs):
+        self.compatible_with = ", ".join(self.compatible_types())
+        super().save(*args, **kwargs)
+
+    def compatible_types(self):
+        names = []
+        for name in self.compatible_with.split(","):
+            name = name.strip().lstrip(";").strip()
+            if name and name not in names:
+                names.append(name)
+        return names
+
 
 class User(AbstractUser):
-    id = models.CharField(
-        max_length=100,
-        primary_key=True,
-        default=XID().string(),
-        unique=True,
-        editable=False,
-    )
+    """
+    Custom user model of the portal.
+
+    Attributes:
+        id (str): Time ordered XID generated per row.
+        auth_version (int): Counter embedded in issued tokens. It is bumped on
+            password and role changes, which invalidates every token issued before.
+        modified_date (datetime): The date and time when the user was last modified.
+
+    Note:
+        Email (case insensitive) and contact are unique when set. The constraints
+        are the source of truth for duplicate signups; serializers only pre-check
+        them to produce friendly errors.
+    """
+
+    id = XIDField(primary_key=True, editable=False)
     role = models.ForeignKey(Role, on_delete=models.CASCADE, null=True, blank=True)
     contact = PhoneNumberField(blank=True)
     is_email_verified = models.BooleanField(default=False)
     is_contact_verified = models.BooleanField(default=False)
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+    modified_date = models.DateTimeField(auto_now=True)
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            models.UniqueConstraint(
+                Lower("email"), condition=~Q(email=""), name="unique_user_email"
+            ),
+            models.UniqueConstraint(
+                fields=["contact"], condition=~Q(contact=""), name="unique_user_contact"
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_role_id = instance.__dict__.get("role_id")
+        return instance
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.auth_version += 1
+        self._auth_version_changed = True
+
+    def save(self, *args, **kwargs):
+        loaded_role_id = getattr(self, "_loaded_role_id", self.role_id)
+        if not self._state.adding and loaded_role_id != self.role_id:
+            self.auth_version += 1
+            self._auth_version_changed = True
+        if (
+            getattr(self, "_auth_version_changed", False)
+            and kwargs.get("update_fields") is not None
+        ):
+            kwargs["update_fields"] = {*kwargs["update_fields"], "auth_version"}
+        super().save(*args, **kwargs)
+        self._loaded_role_id = self.role_id
+        self._auth_version_changed = False
 
 
 class Profile(models.Model):
+    """
+    Model representing the donor profile of a user.
+
+    Attributes:
+        normalized_state (str): Case folded, whitespace collapsed copy of ``state``.
+        normalized_pin_code (str): ``pin_code`` with whitespace removed.
+        modified_date (datetime): The date and time when the profile was last modified.
+
+    Note:
+        The normalized columns are maintained in ``save`` and back the composite
+        indexes used by the donor search. Code that bypasses ``save`` (e.g.
+        ``bulk_create``) must call ``normalize_location`` itself.
+    """
+
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     blood_type = models.ForeignKey(BloodType, on_delete=models.CASCADE)
     house_no = models.CharField(
@@ -114,12 +207,44 @@ class Profile(models.Model):
     )
     date_of_birth = models.DateField(blank=True, null=True)
     slug = models.SlugField(max_length=100, blank=True)
+    normalized_state = models.CharField(
+        max_length=255, blank=True, default="", editable=False
+    )
+    normalized_pin_code = models.CharField(
+        max_length=10, blank=True, default="", editable=False
+    )
+    modified_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["blood_type", "normalized_pin_code", "id"],
+                name="profile_blood_pin_idx",
+            ),
+            models.Index(
+                fields=["blood_type", "normalized_state", "id"],
+                name="profile_blood_state_idx",
+            ),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = XID().string()
+            self.slug = generate_xid()
+        self.normalize_location()
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def normalize_state(state):
+        return " ".join((state or "").split()).casefold()
+
+    @staticmethod
+    def normalize_pin_code(pin_code):
+        return "".join((pin_code or "").split())[:10]
+
+    def normalize_location(self):
+        self.normalized_state = self.normalize_state(self.state)
+        self.normalized_pin_code = self.normalize_pin_code(self.pin_code)
+
     def __str__(self):
         return self.user.username
 
@@ -127,3 +252,305 @@ class Profile(models.Model):
     def display_address(self):
         my_address = f"{self.house_no}, {self.state}, {self.pin_code}"
         return my_address
+
+
+class ReferenceData(models.Model):
+    """
+    Checksum of a reference data set (blood types, scopes, roles) applied by
+    ``portalapi.utils.reference_data.seed_reference_data``.
+
+    Attributes:
+        name (str): The name of the data set.
+        checksum (str): Hash of the fixture last applied.
+        applied_date (datetime): The date and time the fixture was last applied.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    checksum = models.CharField(max_length=64)
+    applied_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RevokedToken(models.Model):
+    """
+    Token or session revoked before its expiry, see
+    ``portalapi.utils.revocation``.
+
+    Attributes:
+        jti (str): The revoked id: the ``sid`` claim shared by the tokens of a
+            session on logout, or the ``jti`` of a single token.
+        expires_at (datetime): When every token carrying the id has expired; the
+            row is useless afterwards.
+        revoked_at (datetime): The date and time of the revocation.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class BloodRequest(models.Model):
+    """
+    Request for blood, broadcast to the compatible donors near its location.
+
+    Attributes:
+        requested_by (User): The user who placed the request.
+        blood_type (BloodType): The recipient blood type.
+        state (str): State the blood is needed in.
+        pin_code (str): PIN code the blood is needed in, when given donors are
+            searched by PIN code rather than state.
+        urgency (str): One of ``Urgency``, more urgent requests are fanned out
+            first.
+        units (int): Units of blood needed.
+        fanout_status (str): Progress of the notification fan-out, see
+            ``portalapi.utils.blood_requests``.
+        fanout_cursor (int): Id of the last donor profile the fan-out went past.
+        notified_count (int): Donors notified so far.
+        created_date (datetime): The date and time the request was placed.
+        modified_date (datetime): The date and time when the request was last
+            modified.
+    """
+
+    class Urgency(models.TextChoices):
+        NORMAL = "normal"
+        URGENT = "urgent"
+        CRITICAL = "critical"
+
+    class FanOutStatus(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+
+    requested_by = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="blood_requests"
+    )
+    blood_type = models.ForeignKey(BloodType, on_delete=models.CASCADE)
+    state = models.CharField(max_length=255)
+    pin_code = models.CharField(max_length=10, blank=True)
+    urgency = models.CharField(
+        max_length=10, choices=Urgency.choices, default=Urgency.NORMAL
+    )
+    units = models.PositiveSmallIntegerField(default=1)
+    note = models.TextField(blank=True)
+    fanout_status = models.CharField(
+        max_length=10,
+        choices=FanOutStatus.choices,
+        default=FanOutStatus.PENDING,
+        db_index=True,
+    )
+    fanout_cursor = models.BigIntegerField(default=0, editable=False)
+    notified_count = models.PositiveIntegerField(default=0, editable=False)
+    created_date = models.DateTimeField(auto_now_add=True)
+    modified_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.blood_type} in {self.pin_code or self.state}"
+
+
+class DonorNotification(models.Model):
+    """
+    Notification of a blood request to a donor, written in bulk by the fan-out.
+
+    Attributes:
+        blood_request (BloodRequest): The request the donor is notified about.
+        donor (User): The notified donor.
+        status (str): Delivery status, ``queued`` until a worker sent it. Donors
+            notified of another request within
+            ``settings.DONOR_NOTIFICATION_DEDUPE_WINDOW`` are ``skipped``.
+        created_date (datetime): The date and time the notification was recorded.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        SENT = "sent"
+        FAILED = "failed"
+        SKIPPED = "skipped"
+
+    blood_request = models.ForeignKey(
+        BloodRequest, on_delete=models.CASCADE, related_name="notifications"
+    )
+    donor = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="donor_notifications"
+    )
+    status = models.CharField(max_length=10, choices=Status.choices)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["blood_request", "donor"], name="unique_request_donor"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["donor", "created_date"], name="notification_donor_date_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.donor_id} {self.status}"
+
+
+class Job(models.Model):
+    """
+    Background job of the database backed queue, see ``portalapi.utils.jobs``.
+
+    Attributes:
+        name (str): Name of the registered handler running the job.
+        payload (dict): JSON arguments of the handler.
+        priority (int): Lower runs first.
+        status (str): One of ``Status``. Completed jobs are deleted.
+        run_at (datetime): The job does not run before this date and time.
+        attempts (int): Times the job was claimed.
+        claim (str): Token of the claim holding the job while it runs.
+        locked_until (datetime): End of the claim's lease. A job still running
+            past it is considered abandoned and claimed again.
+        last_error (str): Error of the last failed attempt.
+        created_date (datetime): The date and time the job was enqueued.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        FAILED = "failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(default=0)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    claim = models.CharField(max_length=32, blank=True, db_index=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "priority", "run_at", "id"], name="job_claim_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class DonorImport(models.Model):
+    """
+    Donor file imported from the admin on the job workers, see
+    ``portalapi.utils.donor_import``.
+
+    Attributes:
+        path (str): Storage path of the uploaded file, deleted once imported.
+        requested_by (User): The staff user receiving the summary.
+        batch_size (int): Rows validated and inserted together.
+        next_row (int): File row the next batch starts at. It moves in the
+            transaction inserting a batch, so a run taken over after a crash
+            continues after the last committed batch.
+        processed (int): Rows read so far.
+        created (int): Donors created so far.
+        rejected (int): Rows rejected so far.
+        finished (bool): All the rows were imported and the summary is queued.
+        created_date (datetime): The date and time the file was uploaded.
+    """
+
+    path = models.CharField(max_length=255)
+    requested_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+    batch_size = models.PositiveIntegerField()
+    next_row = models.PositiveIntegerField(default=2)  # Row 1 is the header.
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    finished = models.BooleanField(default=False)
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
+
+
+class Donation(models.Model):
+    """
+    Blood donation made by a donor.
+
+    Attributes:
+        donor (User): The donor.
+        donated_on (date): The day of the donation.
+        units (int): Units of blood donated.
+        blood_request (BloodRequest): The request the donation answered, if any.
+        created_date (datetime): The date and time the donation was recorded.
+
+    Note:
+        Saving or deleting a donation refreshes the donor's ``DonorEligibility``,
+        see ``portalapi.utils.eligibility``.
+    """
+
+    donor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="donations")
+    donated_on = models.DateField()
+    units = models.PositiveSmallIntegerField(default=1)
+    blood_request = models.ForeignKey(
+        BloodRequest,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="donations",
+    )
+    created_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["donor", "donated_on"], name="donation_donor_date_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.donor_id} on {self.donated_on}"
+
+
+class DonorEligibility(models.Model):
+    """
+    Denormalized donation eligibility of a donor profile.
+
+    Attributes:
+        profile (Profile): The donor profile.
+        last_donated_on (date): The day of the donor's last donation.
+        eligible_from (date): First day the donor may donate: of age and past the
+            interval since the last donation. None when the donor cannot donate
+            anymore (too old) or their date of birth is unknown.
+        eligible_until (date): The day the donor becomes too old to donate.
+
+    Note:
+        Rows are refreshed when a profile or a donation changes, and by the
+        nightly ``refresh_donor_eligibility`` sweep, which only reads the donors
+        who aged out and the profiles without a row (``--full`` reads them all).
+    """
+
+    profile = models.OneToOneField(
+        Profile, on_delete=models.CASCADE, primary_key=True, related_name="eligibility"
+    )
+    last_donated_on = models.DateField(null=True, blank=True)
+    eligible_from = models.DateField(null=True, blank=True, db_index=True)
+    eligible_until = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Rows the sweep must clear; aged out rows leave it once cleared.
+            models.Index(
+                fields=["eligible_until"],
+                condition=models.Q(eligible_from__isnull=False),
+                name="eligibility_until_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id} from {self.eligible_from}"
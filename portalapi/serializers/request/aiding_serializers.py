@@ -1,9 +1,48 @@
 from rest_framework import serializers
 
-from portalapi.models import BloodType
+from portalapi.models import BloodRequest, BloodType
 
 
 class BloodTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = BloodType
         fields = "__all__"
+        read_only_fields = ("donates_to",)
+
+
+class BloodRequestSerializer(serializers.ModelSerializer):
+    """
+    Serializer of blood requests.
+
+    Attributes:
+        blood_type: Name of the recipient blood type.
+        pin_code: PIN code the blood is needed in, optional. Donors are searched
+            by PIN code when given, by state otherwise.
+
+    Note:
+        The fan-out fields are maintained by the notification workers.
+    """
+
+    blood_type = serializers.SlugRelatedField(
+        slug_field="blood_type", queryset=BloodType.objects.all()
+    )
+    pin_code = serializers.RegexField(
+        r"^[1-9][0-9]{2}\s?[0-9]{3}$", required=False, allow_blank=True
+    )
+    units = serializers.IntegerField(min_value=1, max_value=100, default=1)
+
+    class Meta:
+        model = BloodRequest
+        fields = [
+            "id",
+            "blood_type",
+            "state",
+            "pin_code",
+            "urgency",
+            "units",
+            "note",
+            "fanout_status",
+            "notified_count",
+            "created_date",
+        ]
+        read_only_fields = ("fanout_status", "notified_count", "created_date")
@@ -0,0 +1,105 @@
+from django.utils import timezone
+from rest_framework import serializers
+
+from portalapi.models import Donation, Profile, User
+from portalapi.utils.compatibility import get_compatibility_matrix
+from portalapi.utils.constants import DONOR_MAX_AGE, DONOR_MIN_AGE
+
+
+class DonorSearchSerializer(serializers.Serializer):
+    """
+    Serializer validating the donor search query parameters.
+
+    Attributes:
+        blood_type: Recipient blood type id or name.
+        pin_code: PIN code to search in. Either this or state is required.
+        state: State to search in.
+        min_age / max_age: Donor age range, defaults to the eligible donor ages.
+        eligible: Only donors who can donate today (of age and past the interval
+            since their last donation).
+
+    Note:
+        Pages are selected through the ``cursor`` and ``page_size`` parameters of
+        the project cursor pagination. An already resolved compatibility matrix
+        can be passed as the ``matrix`` context entry.
+    """
+
+    blood_type = serializers.CharField()
+    pin_code = serializers.CharField(required=False, allow_blank=True)
+    state = serializers.CharField(required=False, allow_blank=True)
+    min_age = serializers.IntegerField(min_value=0, default=DONOR_MIN_AGE)
+    max_age = serializers.IntegerField(min_value=0, default=DONOR_MAX_AGE)
+    eligible = serializers.BooleanField(default=False)
+
+    def validate_blood_type(self, blood_type):
+        matrix = self.context.get("matrix") or get_compatibility_matrix()
+        blood_type_id = matrix.resolve(blood_type)
+        if blood_type_id is None:
+            raise serializers.ValidationError("Unknown blood type.")
+        return blood_type_id
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if not data.get("pin_code") and not data.get("state"):
+            raise serializers.ValidationError("Either pin_code or state is required.")
+        if data["min_age"] > data["max_age"]:
+            raise serializers.ValidationError("min_age must not exceed max_age.")
+        return data
+
+
+class DonorExportSerializer(serializers.Serializer):
+    """
+    Serializer validating the donor export query parameters.
+
+    Attributes:
+        blood_type: Blood type id or name of the exported donors, optional.
+        state: State of the exported donors, optional.
+        file_format: Either "csv" or "ndjson".
+        compress: Gzip the export on the fly, enabled by default.
+    """
+
+    blood_type = serializers.CharField(required=False)
+    state = serializers.CharField(required=False, allow_blank=True)
+    file_format = serializers.ChoiceField(choices=["csv", "ndjson"], default="csv")
+    compress = serializers.BooleanField(default=True)
+
+    def validate_blood_type(self, blood_type):
+        blood_type_id = get_compatibility_matrix().resolve(blood_type)
+        if blood_type_id is None:
+            raise serializers.ValidationError("Unknown blood type.")
+        return blood_type_id
+
+
+class DonorUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "first_name", "last_name", "email", "contact"]
+
+
+class DonorSerializer(serializers.ModelSerializer):
+    user = DonorUserSerializer(many=False)
+    blood_type = serializers.CharField(source="blood_type.blood_type")
+
+    class Meta:
+        model = Profile
+        fields = ["id", "slug", "user", "blood_type", "state", "pin_code"]
+
+
+class DonationSerializer(serializers.ModelSerializer):
+    """
+    Serializer of donations, recorded by the blood bank staff.
+
+    Attributes:
+        donor: Id of the donating user.
+        blood_request: Id of the request the donation answered, optional.
+    """
+
+    class Meta:
+        model = Donation
+        fields = ["id", "donor", "donated_on", "units", "blood_request", "created_date"]
+        read_only_fields = ["created_date"]
+
+    def validate_donated_on(self, donated_on):
+        if donated_on > timezone.localdate():
+            raise serializers.ValidationError("Donation date is in the future.")
+        return donated_on
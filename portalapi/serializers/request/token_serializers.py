@@ -0,0 +1,44 @@
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from portalapi.utils.authentication import VersionedRefreshToken, get_token_snapshot
+from portalapi.utils.revocation import revoke_token
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh serializer rejecting refresh tokens of outdated ``auth_version`` or
+    revoked ones. With ``ROTATE_REFRESH_TOKENS`` and ``BLACKLIST_AFTER_ROTATION``
+    the rotated token is revoked.
+    """
+
+    token_class = VersionedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        get_token_snapshot(refresh)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # Only this token: the rotated one keeps the session id.
+            revoke_token(refresh, session=False)
+        return super().validate(attrs)
+
+
+class LogoutSerializer(serializers.Serializer):
+    """
+    Revokes the session of a refresh token: the token and every access token
+    derived from it.
+    """
+
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            attrs["refresh"] = VersionedRefreshToken(attrs["refresh"])
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return attrs
+
+    def save(self, **kwargs):
+        revoke_token(self.validated_data["refresh"])
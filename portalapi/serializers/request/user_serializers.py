@@ -1,12 +1,74 @@
 from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import update_last_login
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from rest_framework import serializers
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework import exceptions, serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
 from portalapi.models import User
 from portalapi.serializers.request.profile_serializers import ProfileSerializer
 from portalapi.serializers.request.role_serializers import RoleSerializer
+from portalapi.utils.authentication import VersionedRefreshToken
+from portalapi.utils.login import authenticate_login
+from portalapi.utils.verification import CHANNELS
+
+
+def duplicate_user_errors(email, contact, messages, exclude_pk=None):
+    """
+    Look up users clashing with the given email or contact in a single query.
+
+    Args:
+        email (str): The email address to check (case insensitive).
+        contact (str): The contact to check, skipped when empty.
+        messages (dict): Error message per field name.
+        exclude_pk: Primary key of the user being updated, if any.
+
+    Returns:
+        dict: Field level errors, empty when there is no clash.
+    """
+    query = Q()
+    if email:
+        query |= Q(email__iexact=email)
+    if contact:
+        contact = User._meta.get_field("contact").to_python(contact)
+        query |= Q(contact=contact)
+    if not query:
+        return {}
+    existing = User.objects.filter(query)
+    if exclude_pk is not None:
+        existing = existing.exclude(pk=exclude_pk)
+    errors = {}
+    for existing_email, existing_contact in existing.values_list("email", "contact")[
+        :2
+    ]:
+        if email and existing_email.lower() == email.lower():
+            errors["email"] = [messages["email"]]
+        if contact and existing_contact == contact:
+            errors["contact"] = [messages["contact"]]
+    return errors
+
+
+def integrity_error_fields(exc, messages):
+    """
+    Map a unique violation raised by the database to field level errors.
+
+    Returns:
+        dict or None: Field level errors, or None when the error is not a known
+        uniqueness violation.
+    """
+    error = str(exc)
+    # SQLite reports partial unique indexes on plain columns as "table.column".
+    for markers, field in (
+        (("unique_user_email",), "email"),
+        (("unique_user_contact", f"{User._meta.db_table}.contact"), "contact"),
+        (("username",), "email"),
+    ):
+        if any(marker in error for marker in markers):
+            return {field: [messages[field]]}
+    return None
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -41,39 +103,36 @@ class UserSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "is_contact_verified", "is_email_verified"]
         extra_kwargs = {"password": {"write_only": True}}
 
-    def validate_contact(self, contact):
-        """
-        Validate the contact field.
-
-        Args:
-            contact (str): The contact information.
+    duplicate_messages = {
+        "email": "Email already exists.",
+        "contact": "Contact already exists.",
+    }
 
-        Raises:
-            serializers.ValidationError: If the contact already exists.
-
-        Returns:
-            str: The validated contact information.
+    def validate(self, attrs):
         """
-        if User.objects.filter(contact=contact).exists():
-            raise serializers.ValidationError("Contact already exists.")
-        return contact
+        Validate that the email and contact are not used by another user.
 
-    def validate_email(self, email):
-        """
-        Validate the email field.
+        Both fields are checked with a single query.
 
         Args:
-            email (str): The email address.
+            attrs (dict): The serializer attributes.
 
         Raises:
-            serializers.ValidationError: If the email already exists.
+            serializers.ValidationError: If the email or contact already exists.
 
         Returns:
-            str: The validated email address.
+            dict: The validated attributes.
         """
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError("Email already exists.")
-        return email
+        data = super().validate(attrs)
+        errors = duplicate_user_errors(
+            data.get("email"),
+            data.get("contact"),
+            self.duplicate_messages,
+            exclude_pk=getattr(self.instance, "pk", None),
+        )
+        if errors:
+            raise serializers.ValidationError(errors)
+        return data
 
     def validate_password(self, password):
         """
@@ -109,22 +168,42 @@ class LoginSerializer(TokenObtainPairSerializer):
         refresh_token: Refresh token included in the token response.
     """
 
+    token_class = VersionedRefreshToken
+
     def validate(self, attrs):
         """
         Validate the token attributes.
 
+        The credentials are checked by ``authenticate_login`` (throttled, hashed
+        on the bounded pool) instead of ``django.contrib.auth.authenticate``.
+
         Args:
             attrs (dict): The token attributes.
 
         Returns:
             dict: The validated token response data.
+
+        Raises:
+            AuthenticationFailed: If the credentials are not valid.
+            Throttled: If the login is throttled or the hashing pool is full.
         """
-        data = super().validate(attrs)
+        self.user = authenticate_login(
+            self.context.get("request"),
+            attrs[self.username_field],
+            attrs["password"],
+        )
+        if not jwt_settings.USER_AUTHENTICATION_RULE(self.user):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages["no_active_account"], "no_active_account"
+            )
+        refresh = self.get_token(self.user)
+        if jwt_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
         user_data = UserSerializer(self.user).data
         response_data = {
             "user": user_data,
-            "token": data["access"],
-            "refresh_token": data["refresh"],
+            "token": str(refresh.access_token),
+            "refresh_token": str(refresh),
         }
         return response_data
 
@@ -136,22 +215,47 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ["email", "contact", "password", "confirm_password"]
 
+    duplicate_messages = {
+        "email": "User with same email already exists.",
+        "contact": "User with same contact already exists.",
+    }
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data["username"] = data["email"]
         if data["password"] != data["confirm_password"]:
             raise serializers.ValidationError("Passwords do not match.")
+        errors = duplicate_user_errors(
+            data["email"], data.get("contact"), self.duplicate_messages
+        )
+        if errors:
+            raise serializers.ValidationError(errors)
         return data
 
-    def validate_contact(self, contact):
-        if User.objects.filter(contact=contact).exists():
-            raise serializers.ValidationError("User with same contact already exists.")
-        return contact
+    def create(self, validated_data):
+        """
+        Create the user, relying on the unique constraints for concurrent signups
+        that pass the pre-check at the same time.
 
-    def validate_email(self, email):
-        if User.objects.filter(email=email).exists():
-            raise serializers.ValidationError("User with same email already exists.")
-        return email
+        The password is hashed before the transaction starts, so the (slow) key
+        derivation never runs while holding the database write lock.
+        """
+        validated_data.pop("confirm_password", None)
+        user = User(
+            username=User.normalize_username(validated_data.pop("username")),
+            email=User.objects.normalize_email(validated_data.pop("email")),
+            password=make_password(validated_data.pop("password")),
+            **validated_data,
+        )
+        try:
+            with transaction.atomic():
+                user.save()
+            return user
+        except IntegrityError as exc:
+            errors = integrity_error_fields(exc, self.duplicate_messages)
+            if errors is None:
+                raise
+            raise serializers.ValidationError(errors) from exc
 
 
 class UserSerializerWithProfile(serializers.ModelSerializer):
@@ -185,3 +289,27 @@ class UserSerializerWithProfile(serializers.ModelSerializer):
             "is_contact_verified",
             "is_email_verified",
         ]
+
+
+class VerificationRequestSerializer(serializers.Serializer):
+    """
+    Serializer requesting a verification code for the e-mail address or the
+    contact number of the current user.
+    """
+
+    channel = serializers.ChoiceField(choices=list(CHANNELS))
+
+    def validate_channel(self, channel):
+        field, _ = CHANNELS[channel]
+        if not getattr(self.context["request"].user, field):
+            raise serializers.ValidationError(f"No {field} to verify.")
+        return channel
+
+
+class VerificationSerializer(serializers.Serializer):
+    """
+    Serializer checking a verification code received on a channel.
+    """
+
+    channel = serializers.ChoiceField(choices=list(CHANNELS))
+    code = serializers.RegexField(r"^[0-9]{6}$")
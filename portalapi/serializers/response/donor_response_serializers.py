@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from portalapi.serializers.request.donor_serializers import DonorSerializer
+
+
+class DonorSearchResponseSerializer(serializers.Serializer):
+    next = serializers.URLField(allow_null=True)
+    previous = serializers.URLField(allow_null=True)
+    results = DonorSerializer(many=True)
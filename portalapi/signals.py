@@ -1,29 +1,128 @@
-import logging
+from functools import partial
 
-from django.db.models.signals import post_migrate
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
-from portalapi.utils.constants import DEFAULT_BLOOD_DATA
+from portalapi.utils.authentication import invalidate_user_snapshot
+from portalapi.utils.catalogue import bump_catalogue_version
+from portalapi.utils.compatibility import (
+    invalidate_compatibility_matrix,
+    sync_compatibility_edges,
+)
+from portalapi.utils.database import apply_sqlite_pragmas
+from portalapi.utils.eligibility import refresh_eligibility
+from portalapi.utils.instrumentation import time_queries
+from portalapi.utils.rbac import invalidate_role_scopes
+from portalapi.utils.reference_data import seed_reference_data
 
-from .models import BloodType
+from .models import BloodType, Donation, Profile, Role, Scope, User
 
-logger = logging.getLogger(__name__)
+
+def seed_default_reference_data(sender, using, apps=global_apps, **kwargs):
+    """
+    Connected to ``post_migrate`` for the portalapi app only, see ``apps.py``.
+    """
+    _ = sender
+    try:
+        apps.get_model("portalapi", "ReferenceData")
+    except LookupError:
+        # Migrated back to before the reference data existed.
+        return
+    seed_reference_data(using)
+
+
+@receiver(connection_created)
+def configure_sqlite_connection(sender, connection, **kwargs):
+    _ = sender
+    apply_sqlite_pragmas(connection)
+
+
+@receiver(connection_created)
+def time_connection_queries(sender, connection, **kwargs):
+    _ = sender
+    time_queries(connection)
 
 
-@receiver(post_migrate)
-def create_default_blood_type(sender, **kwargs):
+@receiver(post_save, sender=BloodType)
+def sync_blood_type_compatibility(sender, **kwargs):
     _ = sender
-    logger.info("Populating default blood types...")
+    sync_compatibility_edges()
+    transaction.on_commit(bump_catalogue_version)
 
-    for blood_data in DEFAULT_BLOOD_DATA:
-        _, created = BloodType.objects.get_or_create(
-            blood_type=blood_data["blood_type"],
-            defaults={"compatible_with": blood_data["compatible_with"]},
-        )
 
-        if created:
-            logger.info("Created blood type")
-        else:
-            logger.info("Blood type already exists")
+@receiver(post_delete, sender=BloodType)
+@receiver(m2m_changed, sender=BloodType.donates_to.through)
+def invalidate_blood_type_compatibility(sender, **kwargs):
+    _ = sender
+    invalidate_compatibility_matrix()
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_scope_cache(sender, instance, **kwargs):
+    _ = sender
+    transaction.on_commit(partial(invalidate_role_scopes, instance.pk))
+
+
+@receiver(post_save, sender=Scope)
+@receiver(pre_delete, sender=Scope)
+def invalidate_scope_roles_cache(sender, instance, **kwargs):
+    _ = sender
+    role_ids = list(Role.objects.filter(scopes=instance).values_list("id", flat=True))
+    if role_ids:
+        role_scopes_changed(*role_ids)
 
-    logger.info("Default blood types populated successfully.")
+
+@receiver(m2m_changed, sender=Role.scopes.through)
+def invalidate_role_scopes_on_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    _ = sender
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            role_scopes_changed(instance.pk)
+    elif action == "pre_clear":
+        # The roles of the scope can only be read before the rows go.
+        invalidate_scope_roles_cache(Scope, instance)
+    elif action in ("post_add", "post_remove") and pk_set:
+        role_scopes_changed(*pk_set)
+
+
+def role_scopes_changed(*role_ids):
+    """
+    Drop the compiled scopes of the roles and bump their ``modified_date`` so
+    representations embedding the scopes get a new validator.
+
+    The compiled scopes are dropped once the transaction commits: dropped
+    earlier, a concurrent request could compile and cache the old rows again.
+    """
+    transaction.on_commit(partial(invalidate_role_scopes, *role_ids))
+    Role.objects.filter(pk__in=role_ids).update(modified_date=timezone.now())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_auth_snapshot(sender, instance, **kwargs):
+    _ = sender
+    # After the commit, or a concurrent request could cache the old auth_version.
+    transaction.on_commit(partial(invalidate_user_snapshot, instance.pk))
+
+
+@receiver(post_save, sender=Profile)
+def refresh_profile_eligibility(sender, instance, **kwargs):
+    _ = sender
+    refresh_eligibility([instance.pk])
+
+
+@receiver(post_save, sender=Donation)
+@receiver(post_delete, sender=Donation)
+def refresh_donor_eligibility(sender, instance, **kwargs):
+    _ = sender
+    refresh_eligibility(
+        Profile.objects.filter(user_id=instance.donor_id).values_list("pk", flat=True)
+    )
@@ -1,18 +1,33 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework import routers
 from rest_framework_simplejwt.views import TokenRefreshView
 
-from portalapi.views.aiding_views import BloodTypeViewSet
+from portalapi.views.aiding_views import BloodRequestViewSet, BloodTypeViewSet
+from portalapi.views.async_views import blood_type_list, donor_search, profile_me
 from portalapi.views.auth_views import AuthViewSet
+from portalapi.views.donor_views import DonationViewSet, DonorViewSet
 from portalapi.views.profile_views import ProfileViewSet
 
 user_router = routers.DefaultRouter()
 user_router.register("auth", AuthViewSet, basename="auth")
 user_router.register("profile", ProfileViewSet, basename="profile")
+user_router.register("donors", DonorViewSet, basename="donors")
+user_router.register("donations", DonationViewSet, basename="donations")
 aiding_router = routers.DefaultRouter()
 aiding_router.register("type", BloodTypeViewSet, basename="type")
+aiding_router.register("request", BloodRequestViewSet, basename="request")
+
+# Async views answering the read-heavy routes under ASGI; other methods and
+# formats are delegated to the viewsets registered above.
+async_urlpatterns = [
+    path("profile/me/", profile_me),
+    path("donors/search/", donor_search),
+    path("blood/type/", blood_type_list),
+]
 
 urlpatterns = [
+    *(async_urlpatterns if settings.ASYNC_API_VIEWS else []),
     path("", include(user_router.urls)),
     path("auth/refresh/token/", TokenRefreshView.as_view(), name="token_refresh"),
     path("blood/", include(aiding_router.urls)),
@@ -1,4 +1,13 @@
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+
+from portalapi.utils.donor_import import DonorImportError, queue_donor_import
 
 
 class CustomUserAdmin(UserAdmin):
@@ -39,3 +48,69 @@ class CustomUserAdmin(UserAdmin):
             },
         ),
     ]
+
+
+class DonorImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or XLSX file with a header row.")
+    batch_size = forms.IntegerField(initial=1000, min_value=1)
+
+
+class ProfileAdmin(admin.ModelAdmin):
+    """
+    Admin configuration for donor profiles with a streaming bulk import view.
+
+    The import view stores the upload and queues its import, which runs the same
+    pipeline as the ``import_donors`` management command on a job worker. The
+    summary and the rejected rows are e-mailed to the uploader.
+    """
+
+    change_list_template = "admin/portalapi/profile/change_list.html"
+    list_display = ("user", "blood_type", "state", "pin_code")
+    list_select_related = ("user", "blood_type")
+
+    def get_urls(self):
+        urls = [
+            path(
+                "import-donors/",
+                self.admin_site.admin_view(self.import_donors_view),
+                name="portalapi_profile_import_donors",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_donors_view(self, request):
+        if not (
+            self.has_add_permission(request)
+            and request.user.has_perm("portalapi.add_user")
+        ):
+            raise PermissionDenied
+        form = DonorImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            try:
+                with transaction.atomic():
+                    queue_donor_import(
+                        form.cleaned_data["file"],
+                        request.user,
+                        form.cleaned_data["batch_size"],
+                    )
+            except DonorImportError as exc:
+                form.add_error("file", str(exc))
+            else:
+                self.message_user(
+                    request,
+                    "The import is queued; its summary and rejected rows will be "
+                    f"e-mailed to {request.user.email or 'you'}.",
+                    messages.SUCCESS,
+                )
+                return HttpResponseRedirect(
+                    reverse("admin:portalapi_profile_changelist")
+                )
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "form": form,
+            "title": "Import donors",
+        }
+        return TemplateResponse(
+            request, "admin/portalapi/profile/import_donors.html", context
+        )
@@ -0,0 +1,266 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Executor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.contrib.auth.hashers import make_password
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+
+from portalapi.models import BloodType, Profile, Role, User
+from portalapi.utils.authentication import VersionedRefreshToken
+from portalapi.utils.eligibility import sweep_eligibility
+from portalapi.utils.ids import generate_xid
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+BENCHMARK_PASSWORD = "Bench#Passw0rd1"
+BENCHMARK_STATES = ("Tamil Nadu", "Kerala", "Karnataka", "Maharashtra", "Delhi")
+# Scenario name -> (method, path below the API root).
+SCENARIO_ENDPOINTS = {
+    "login": ("POST", "auth/login/"),
+    "register": ("POST", "auth/register/"),
+    "refresh": ("POST", "auth/refresh/token/"),
+    "me": ("GET", "profile/me/"),
+    "blood_types": ("GET", "blood/type/"),
+}
+SCENARIO_NAMES = tuple(SCENARIO_ENDPOINTS)
+
+Request = Tuple[Dict[str, str], Optional[bytes]]
+
+
+@dataclass
+class Scenario:
+    """
+    An endpoint replayed by the benchmark clients.
+
+    Attributes:
+        name (str): The name the results are reported under.
+        method (str): The HTTP method.
+        path (str): The path below the API root.
+        requests (list): ``(headers, body)`` of every request to send.
+    """
+
+    name: str
+    method: str
+    path: str
+    requests: List[Request]
+
+
+def seed_donors(count: int) -> List[User]:
+    """
+    Create ``count`` donors sharing one password hash, so seeding does not pay
+    for a key derivation per user.
+    """
+    role = Role.objects.filter(name="Donor").order_by("id").first()
+    blood_type_ids = list(BloodType.objects.order_by("id").values_list("id", flat=True))
+    password = make_password(BENCHMARK_PASSWORD)
+    users, profiles = [], []
+    for number in range(count):
+        email = f"donor{number}@benchmark.example.com"
+        user = User(
+            id=generate_xid(),
+            username=email,
+            email=email,
+            first_name="Donor",
+            last_name=str(number),
+            password=password,
+            role=role,
+        )
+        profile = Profile(
+            user=user,
+            blood_type_id=blood_type_ids[number % len(blood_type_ids)],
+            house_no=f"{number}, Benchmark Street",
+            state=BENCHMARK_STATES[number % len(BENCHMARK_STATES)],
+            pin_code=str(600001 + number % 900),
+            date_of_birth=date(1970 + number % 30, 1 + number % 12, 1 + number % 28),
+            slug=generate_xid(),
+        )
+        profile.normalize_location()
+        users.append(user)
+        profiles.append(profile)
+    User.objects.bulk_create(users, batch_size=500)
+    Profile.objects.bulk_create(profiles, batch_size=500)
+    sweep_eligibility()
+    return users
+
+
+def _json(data) -> Request:
+    return {"Content-Type": "application/json"}, json.dumps(data).encode()
+
+
+def build_scenarios(
+    users: List[User], requests: int, names=SCENARIO_NAMES
+) -> List[Scenario]:
+    """
+    Build the requests of each scenario, cycling through the seeded ``users``.
+    """
+    tokens = [VersionedRefreshToken.for_user(user) for user in users]
+    password = BENCHMARK_PASSWORD
+    run = generate_xid()
+    builders = {
+        "login": lambda n: _json(
+            {"username": users[n % len(users)].email, "password": password}
+        ),
+        "register": lambda n: _json(
+            {
+                "email": f"new{n}.{run}@benchmark.example.com",
+                "password": password,
+                "confirmPassword": password,
+            }
+        ),
+        "refresh": lambda n: _json({"refresh": str(tokens[n % len(tokens)])}),
+        "me": lambda n: (
+            {"Authorization": f"Bearer {tokens[n % len(tokens)].access_token}"},
+            None,
+        ),
+        "blood_types": lambda n: ({}, None),
+    }
+    return [
+        Scenario(
+            name,
+            *SCENARIO_ENDPOINTS[name],
+            [builders[name](n) for n in range(requests)],
+        )
+        for name in names
+    ]
+
+
+class QueryCountingApplication:
+    """
+    WSGI middleware recording the number of database queries per request path.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.queries: Dict[str, List[int]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.application(environ, start_response)
+        with self._lock:
+            self.queries[environ["PATH_INFO"]].append(count)
+        return response
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start_server(application, host: str = "127.0.0.1") -> ThreadedWSGIServer:
+    server = ThreadedWSGIServer((host, 0), QuietRequestHandler)
+    server.set_app(application)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_client(
+    base_url: str, method: str, path: str, requests: List[Request]
+) -> List[Tuple[float, int]]:
+    """
+    Send ``requests`` one after the other over a keep-alive connection and return
+    the latency (seconds) and status of each, status 0 meaning a network error.
+    """
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port, timeout=120)
+    results = []
+    try:
+        for headers, body in requests:
+            started = time.perf_counter()
+            try:
+                connection.request(method, url.path + path, body=body, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                status = 0
+            results.append((time.perf_counter() - started, status))
+    finally:
+        connection.close()
+    return results
+
+
+def peak_rss_kib() -> Optional[int]:
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _distribution(values: List[float]) -> dict:
+    if len(values) > 1:
+        cuts = statistics.quantiles(values, n=100, method="inclusive")
+    else:
+        cuts = values * 99
+    return {
+        "mean": round(statistics.fmean(values), 3),
+        "p50": round(cuts[49], 3),
+        "p95": round(cuts[94], 3),
+        "p99": round(cuts[98], 3),
+        "max": round(max(values), 3),
+    }
+
+
+def run_scenario(
+    executor: Executor,
+    base_url: str,
+    scenario: Scenario,
+    concurrency: int,
+    application: QueryCountingApplication,
+) -> dict:
+    """
+    Replay a scenario with ``concurrency`` clients splitting its requests.
+    """
+    application.queries.clear()
+    started = time.perf_counter()
+    futures = [
+        executor.submit(
+            run_client,
+            base_url,
+            scenario.method,
+            scenario.path,
+            scenario.requests[client::concurrency],
+        )
+        for client in range(min(concurrency, len(scenario.requests)))
+    ]
+    results = [result for future in futures for result in future.result()]
+    elapsed = time.perf_counter() - started
+    queries = [count for counts in application.queries.values() for count in counts]
+    statuses: Dict[str, int] = defaultdict(int)
+    for _, status in results:
+        statuses[str(status)] += 1
+    return {
+        "method": scenario.method,
+        "path": scenario.path,
+        "requests": len(results),
+        "concurrency": len(futures),
+        "errors": sum(1 for _, status in results if not 200 <= status < 300),
+        "statuses": dict(statuses),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "latency_ms": _distribution([latency * 1000 for latency, _ in results]),
+        "queries_per_request": _distribution(queries) if queries else None,
+        "peak_rss_kib": peak_rss_kib(),
+    }
@@ -0,0 +1,203 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from portalapi.models import User
+from portalapi.utils.metrics import count_cache_lookup
+from portalapi.utils.revocation import (
+    SESSION_CLAIM,
+    ais_token_revoked,
+    is_token_revoked,
+)
+
+AUTH_VERSION_CLAIM = "ver"
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "first_name",
+    "last_name",
+    "contact",
+    "role_id",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "is_email_verified",
+    "is_contact_verified",
+    "auth_version",
+)
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token embedding the user's ``auth_version`` and a session id.
+
+    The claims are copied to the access tokens derived from it, which lets the
+    authentication compare the version with the cached user snapshot and revoke
+    every token of the session at once, see ``portalapi.utils.revocation``.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[AUTH_VERSION_CLAIM] = user.auth_version
+        token[SESSION_CLAIM] = token[api_settings.JTI_CLAIM]
+        return token
+
+
+class SnapshotUser:
+    """
+    Lightweight, read-only stand-in for ``User`` built from a cached snapshot.
+
+    It exposes the snapshot fields as attributes and the parts of the user API that
+    permissions rely on. Views needing the model instance must load it explicitly.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, snapshot):
+        self.__dict__.update(snapshot)
+
+    def __str__(self):
+        return self.username
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_username(self):
+        return self.username
+
+
+def _snapshot_key(user_id) -> str:
+    return f"auth:user:{user_id}"
+
+
+def _load_snapshot(snapshot):
+    snapshot["contact"] = str(snapshot["contact"] or "")
+    return snapshot
+
+
+def get_user_snapshot(user_id):
+    """
+    Return the cached snapshot of a user, loading it on a cache miss.
+
+    Returns:
+        dict or None: The snapshot, or None when the user does not exist.
+    """
+    key = _snapshot_key(user_id)
+    snapshot = cache.get(key)
+    count_cache_lookup("user_snapshot", snapshot is not None)
+    if snapshot is None:
+        snapshot = User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).first()
+        if snapshot is None:
+            return None
+        snapshot = _load_snapshot(snapshot)
+        cache.set(key, snapshot, getattr(settings, "AUTH_SNAPSHOT_TIMEOUT", 900))
+    return snapshot
+
+
+async def aget_user_snapshot(user_id):
+    key = _snapshot_key(user_id)
+    snapshot = await cache.aget(key)
+    count_cache_lookup("user_snapshot", snapshot is not None)
+    if snapshot is None:
+        snapshot = (
+            await User.objects.filter(pk=user_id).values(*SNAPSHOT_FIELDS).afirst()
+        )
+        if snapshot is None:
+            return None
+        snapshot = _load_snapshot(snapshot)
+        await cache.aset(key, snapshot, getattr(settings, "AUTH_SNAPSHOT_TIMEOUT", 900))
+    return snapshot
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(_snapshot_key(user_id))
+
+
+def _token_user_id(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_("Token contained no recognizable user identification"))
+
+
+def _check_snapshot(validated_token, snapshot):
+    if snapshot is None:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+    if not snapshot["is_active"]:
+        raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+    if validated_token.get(AUTH_VERSION_CLAIM) != snapshot["auth_version"]:
+        raise AuthenticationFailed(
+            _("Token is no longer valid for this user"), code="token_version_changed"
+        )
+    return snapshot
+
+
+def _check_revoked(revoked):
+    if revoked:
+        raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+
+def get_token_snapshot(validated_token):
+    """
+    Resolve and check the user snapshot a token was issued for.
+
+    Raises:
+        InvalidToken: If the token carries no user id.
+        AuthenticationFailed: If the user is missing or inactive, the token was
+            issued for an older ``auth_version`` or it was revoked.
+    """
+    snapshot = get_user_snapshot(_token_user_id(validated_token))
+    _check_snapshot(validated_token, snapshot)
+    _check_revoked(is_token_revoked(validated_token))
+    return snapshot
+
+
+async def aget_token_snapshot(validated_token):
+    snapshot = await aget_user_snapshot(_token_user_id(validated_token))
+    _check_snapshot(validated_token, snapshot)
+    _check_revoked(await ais_token_revoked(validated_token))
+    return snapshot
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that never hydrates ``User`` from the database.
+
+    The user is rebuilt from a snapshot kept in the shared cache. Snapshots are
+    dropped whenever the user is saved, and tokens are rejected once the user's
+    ``auth_version`` (bumped on password or role changes) moves past the version
+    embedded in the token. Revoked tokens are ruled out by an in-process filter,
+    see ``portalapi.utils.revocation``.
+
+    ``aauthenticate`` is the same check for async views, reading the snapshot
+    through the async cache and ORM APIs.
+    """
+
+    def get_user(self, validated_token):
+        return SnapshotUser(get_token_snapshot(validated_token))
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        snapshot = await aget_token_snapshot(validated_token)
+        return SnapshotUser(snapshot), validated_token
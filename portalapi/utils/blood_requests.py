@@ -0,0 +1,203 @@
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from portalapi.models import BloodRequest, DonorNotification
+from portalapi.utils.donor_search import search_donors
+from portalapi.utils.jobs import enqueue, job_handler
+from portalapi.utils.sms import SMSMessage, get_sms_backend
+
+# Job priority of the fan-out, the most urgent requests first.
+URGENCY_PRIORITIES = {
+    BloodRequest.Urgency.CRITICAL: -20,
+    BloodRequest.Urgency.URGENT: -10,
+    BloodRequest.Urgency.NORMAL: 0,
+}
+
+
+def request_donors(blood_request: BloodRequest):
+    """
+    Profiles of the donors who can donate for a request today, ordered by id.
+    """
+    return search_donors(
+        blood_request.blood_type_id,
+        pin_code=blood_request.pin_code,
+        state=blood_request.state,
+        eligible=True,
+    ).exclude(user_id=blood_request.requested_by_id)
+
+
+def start_fan_out(blood_request: BloodRequest):
+    """
+    Queue the fan-out of a new request, in the caller's transaction.
+    """
+    enqueue(
+        "blood_request.fan_out",
+        {"blood_request_id": blood_request.pk},
+        priority=URGENCY_PRIORITIES[blood_request.urgency],
+    )
+
+
+def fan_out_batch(
+    blood_request_id: int, batch_size: Optional[int] = None
+) -> Optional[BloodRequest]:
+    """
+    Record the notifications of the next batch of donors of a request.
+
+    A batch is one transaction: the request row is locked, the next
+    ``batch_size`` donor profiles after its cursor are read from the donor
+    search index, their notifications are written with a single ``bulk_create``
+    and the cursor moves past them. The delivery of the batch and, unless the
+    request is done, its next batch are queued in the same transaction. Running
+    a batch twice is harmless: it continues from the cursor and a donor is only
+    notified once per request.
+
+    Donors notified of another request within
+    ``settings.DONOR_NOTIFICATION_DEDUPE_WINDOW`` are recorded as skipped.
+
+    Returns:
+        BloodRequest or None: The request, None when it does not exist or its
+        fan-out is done.
+    """
+    batch_size = batch_size or getattr(settings, "DONOR_NOTIFICATION_BATCH_SIZE", 500)
+    with transaction.atomic():
+        blood_request = (
+            BloodRequest.objects.select_for_update()
+            .filter(pk=blood_request_id)
+            .exclude(fanout_status=BloodRequest.FanOutStatus.DONE)
+            .first()
+        )
+        if blood_request is None:
+            return None
+        donors = list(
+            request_donors(blood_request)
+            .filter(id__gt=blood_request.fanout_cursor)
+            .values_list("id", "user_id")[:batch_size]
+        )
+        notified = []
+        if donors:
+            user_ids = [user_id for _, user_id in donors]
+            window = getattr(settings, "DONOR_NOTIFICATION_DEDUPE_WINDOW", 60 * 60 * 12)
+            recent = set(
+                DonorNotification.objects.filter(
+                    donor_id__in=user_ids,
+                    status__in=(
+                        DonorNotification.Status.QUEUED,
+                        DonorNotification.Status.SENT,
+                    ),
+                    created_date__gte=timezone.now() - timedelta(seconds=window),
+                ).values_list("donor_id", flat=True)
+            )
+            DonorNotification.objects.bulk_create(
+                [
+                    DonorNotification(
+                        blood_request=blood_request,
+                        donor_id=user_id,
+                        status=(
+                            DonorNotification.Status.SKIPPED
+                            if user_id in recent
+                            else DonorNotification.Status.QUEUED
+                        ),
+                    )
+                    for user_id in user_ids
+                ],
+                ignore_conflicts=True,
+            )
+            notified = [user_id for user_id in user_ids if user_id not in recent]
+            blood_request.fanout_cursor = donors[-1][0]
+        priority = URGENCY_PRIORITIES[blood_request.urgency]
+        if notified:
+            enqueue(
+                "blood_request.deliver",
+                {"blood_request_id": blood_request.pk, "donor_ids": notified},
+                priority=priority,
+            )
+        if len(donors) == batch_size:
+            blood_request.fanout_status = BloodRequest.FanOutStatus.RUNNING
+            enqueue(
+                "blood_request.fan_out",
+                {"blood_request_id": blood_request.pk},
+                priority=priority,
+            )
+        else:
+            blood_request.fanout_status = BloodRequest.FanOutStatus.DONE
+        BloodRequest.objects.filter(pk=blood_request.pk).update(
+            fanout_cursor=blood_request.fanout_cursor,
+            fanout_status=blood_request.fanout_status,
+            notified_count=F("notified_count") + len(notified),
+            modified_date=timezone.now(),
+        )
+    return blood_request
+
+
+@job_handler("blood_request.fan_out")
+def fan_out_job(payload: dict):
+    fan_out_batch(payload["blood_request_id"])
+
+
+def notification_message(blood_request: BloodRequest) -> str:
+    return (
+        f"{blood_request.get_urgency_display()} request for {blood_request.units} "
+        f"unit(s) of {blood_request.blood_type} blood in "
+        f"{blood_request.pin_code or blood_request.state}. Please respond on the "
+        "Blood Donation Portal if you can donate."
+    )
+
+
+@job_handler("blood_request.deliver")
+def deliver_notifications(payload: dict):
+    """
+    Send the queued notifications of a fan-out batch and record their status
+    with two bulk updates.
+
+    Donors are texted about urgent and critical requests when they have a
+    contact number, and e-mailed otherwise. The e-mails share one connection.
+    """
+    blood_request = (
+        BloodRequest.objects.select_related("blood_type")
+        .filter(pk=payload["blood_request_id"])
+        .first()
+    )
+    if blood_request is None:
+        return
+    notifications = (
+        DonorNotification.objects.filter(
+            blood_request=blood_request,
+            donor_id__in=payload["donor_ids"],
+            status=DonorNotification.Status.QUEUED,
+        )
+        .select_related("donor")
+        .only("id", "donor__email", "donor__contact")
+    )
+    body = notification_message(blood_request)
+    texted = blood_request.urgency != BloodRequest.Urgency.NORMAL
+    sent, failed = [], []
+    sms_backend = get_sms_backend()
+    with get_connection() as connection:
+        for notification in notifications:
+            donor = notification.donor
+            try:
+                if texted and donor.contact:
+                    sms_backend.send_messages([SMSMessage(str(donor.contact), body)])
+                elif donor.email:
+                    connection.send_messages(
+                        [EmailMessage("Blood needed near you", body, to=[donor.email])]
+                    )
+                else:
+                    failed.append(notification.pk)
+                    continue
+            except Exception:  # pylint: disable=broad-except
+                failed.append(notification.pk)
+            else:
+                sent.append(notification.pk)
+    DonorNotification.objects.filter(pk__in=sent).update(
+        status=DonorNotification.Status.SENT
+    )
+    DonorNotification.objects.filter(pk__in=failed).update(
+        status=DonorNotification.Status.FAILED
+    )
@@ -0,0 +1,191 @@
+import math
+from decimal import Decimal
+from itertools import islice
+
+from django.core.files import File
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from djangorestframework_camel_case.util import (
+    camelize_re,
+    get_underscoreize_re,
+    underscore_to_camel,
+)
+from rest_framework.utils.serializer_helpers import ReturnDict
+
+from portalapi.utils.constants import CAMEL_CASE_KEY_CACHE_SIZE
+
+_SCALARS = frozenset((str, int, bool, type(None)))
+
+
+class UnsafeFloat(ValueError):
+    """
+    Raised by ``camelize(check_floats=True)`` for floats a fast encoder would
+    format differently than ``json.dumps`` (exponents, NaN and infinities).
+    """
+
+
+class KeyCache(dict):
+    """
+    Bounded memo of converted keys.
+
+    Keys come from a small, fixed set of serializer fields, so the cache is simply
+    dropped when it is full (e.g. after clients sent arbitrary keys) instead of
+    tracking recency.
+    """
+
+    def __init__(self, convert, size=CAMEL_CASE_KEY_CACHE_SIZE):
+        super().__init__()
+        self.convert = convert
+        self.size = size
+
+    def __missing__(self, key):
+        value = self.convert(key)
+        if len(self) >= self.size:
+            self.clear()
+        self[key] = value
+        return value
+
+
+camel_keys = KeyCache(lambda key: camelize_re.sub(underscore_to_camel, key))
+underscore_keys = {
+    flag: KeyCache(
+        lambda key, pattern=get_underscoreize_re(
+            {"no_underscore_before_number": flag}
+        ): pattern.sub(r"\1_\2", key).lower()
+    )
+    for flag in (False, True)
+}
+
+
+def _is_iterable(value):
+    try:
+        iter(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _check_float(value):
+    value = float(value)
+    if not math.isfinite(value) or "e" in repr(value):
+        raise UnsafeFloat(value)
+
+
+class _Camelizer:
+    __slots__ = ("ignore_fields", "ignore_keys", "check_floats")
+
+    def __init__(self, ignore_fields, ignore_keys, check_floats):
+        self.ignore_fields = ignore_fields or ()
+        self.ignore_keys = ignore_keys or ()
+        self.check_floats = check_floats
+
+    def convert(self, value):
+        kind = type(value)
+        if kind in _SCALARS:
+            return value
+        if isinstance(value, Promise):
+            return force_str(value)
+        if isinstance(value, dict):
+            return self.convert_dict(value)
+        if kind is list or kind is tuple:
+            return self.convert_sequence(value)
+        if kind is float or isinstance(value, Decimal):
+            if self.check_floats:
+                _check_float(value)
+            return value
+        if _is_iterable(value) and not isinstance(value, str):
+            return [self.convert(item) for item in value]
+        return value
+
+    def convert_item(self, key, item):
+        """
+        Return the ``(key, new_key, value)`` of a dict item.
+        """
+        if type(key) is not str and isinstance(key, Promise):
+            key = force_str(key)
+        new_key = camel_keys[key] if type(key) is str and "_" in key else key
+        if key in self.ignore_fields or new_key in self.ignore_fields:
+            result = item
+        else:
+            result = self.convert(item)
+        if key in self.ignore_keys or new_key in self.ignore_keys:
+            new_key = key
+        return key, new_key, result
+
+    def convert_dict(self, value):
+        copy = None
+        for index, (key, item) in enumerate(value.items()):
+            key, new_key, result = self.convert_item(key, item)
+            if copy is None and (new_key is not key or result is not item):
+                if isinstance(value, ReturnDict):
+                    copy = ReturnDict(serializer=value.serializer)
+                else:
+                    copy = {}
+                copy.update(islice(value.items(), index))
+            if copy is not None:
+                copy[new_key] = result
+        return value if copy is None else copy
+
+    def convert_sequence(self, value):
+        copy = None
+        for index, item in enumerate(value):
+            result = self.convert(item)
+            if copy is None and result is not item:
+                copy = list(value[:index])
+            if copy is not None:
+                copy.append(result)
+        return value if copy is None else copy
+
+
+def camelize(data, ignore_fields=None, ignore_keys=None, check_floats=False, **_):
+    """
+    ``djangorestframework_camel_case.util.camelize`` with memoized keys.
+
+    Containers are only copied when a key or a nested value actually changes, and
+    the result renders to the same JSON as the library version.
+    """
+    return _Camelizer(ignore_fields, ignore_keys, check_floats).convert(data)
+
+
+def underscoreize(data, no_underscore_before_number=False, **options):
+    """
+    ``djangorestframework_camel_case.util.underscoreize`` with memoized keys.
+    """
+    keys = underscore_keys[bool(no_underscore_before_number)]
+    ignore_fields = options.get("ignore_fields") or ()
+    ignore_keys = options.get("ignore_keys") or ()
+
+    def convert(value):
+        if type(value) in _SCALARS:
+            return value
+        if isinstance(value, dict):
+            if type(value) is MultiValueDict:
+                new_data = MultiValueDict()
+                for key in value:
+                    new_data.setlist(keys[key], value.getlist(key))
+                return new_data
+            new_dict = {}
+            items = value.lists() if isinstance(value, QueryDict) else value.items()
+            for key, item in items:
+                new_key = keys[key] if isinstance(key, str) else key
+                if key in ignore_fields or new_key in ignore_fields:
+                    result = item
+                else:
+                    result = convert(item)
+                if key in ignore_keys or new_key in ignore_keys:
+                    new_dict[key] = result
+                else:
+                    new_dict[new_key] = result
+            if isinstance(value, QueryDict):
+                new_query = QueryDict(mutable=True)
+                for key, item in new_dict.items():
+                    new_query.setlist(key, item)
+                return new_query
+            return new_dict
+        if _is_iterable(value) and not isinstance(value, (str, File)):
+            return [convert(item) for item in value]
+        return value
+
+    return convert(data)
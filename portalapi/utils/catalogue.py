@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Optional
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from portalapi.models import BloodType
+from portalapi.serializers.request.aiding_serializers import BloodTypeSerializer
+from portalapi.utils.http import make_etag
+from portalapi.utils.metrics import count_cache_lookup
+
+CATALOGUE_VERSION_KEY = "bloodtype:catalogue:version"
+
+
+def get_catalogue_version() -> str:
+    """
+    Return the blood type catalogue version shared by all worker processes.
+
+    Versions are random tokens stored in the shared cache; losing the key simply
+    starts a new version.
+    """
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(CATALOGUE_VERSION_KEY)
+    return version
+
+
+async def aget_catalogue_version() -> str:
+    version = await cache.aget(CATALOGUE_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOGUE_VERSION_KEY, uuid4().hex, None)
+        version = await cache.aget(CATALOGUE_VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    cache.set(CATALOGUE_VERSION_KEY, uuid4().hex, None)
+
+
+class Catalogue:
+    """
+    Serialized blood type catalogue of one catalogue version.
+
+    Attributes:
+        version (str): The catalogue version the payload was built for.
+        data (list): The serialized blood types.
+        etag (str): Strong ETag of the version.
+
+    Methods:
+        render: Returns the payload rendered by a renderer, rendering it only once
+            per media type.
+    """
+
+    def __init__(self, version: str):
+        self.version = version
+        self.data = BloodTypeSerializer(
+            BloodType.objects.prefetch_related("donates_to").order_by("id"), many=True
+        ).data
+        self.etag = make_etag("bloodtype-catalogue", version)
+        self._rendered: Dict[str, bytes] = {}
+
+    def render(self, renderer, media_type: str) -> bytes:
+        content = self._rendered.get(media_type)
+        if content is None:
+            content = renderer.render(self.data, media_type)
+            self._rendered[media_type] = content
+        return content
+
+
+_lock = threading.Lock()
+_catalogue: Optional[Catalogue] = None
+
+
+def _catalogue_for_version(version: str) -> Catalogue:
+    global _catalogue  # pylint: disable=global-statement
+    catalogue = _catalogue
+    hit = catalogue is not None and catalogue.version == version
+    count_cache_lookup("catalogue", hit)
+    if not hit:
+        with _lock:
+            if _catalogue is None or _catalogue.version != version:
+                _catalogue = Catalogue(version)
+            catalogue = _catalogue
+    return catalogue
+
+
+def get_catalogue() -> Catalogue:
+    return _catalogue_for_version(get_catalogue_version())
+
+
+async def aget_catalogue() -> Catalogue:
+    """
+    ``get_catalogue`` for async views; only a rebuild leaves the event loop.
+    """
+    version = await aget_catalogue_version()
+    catalogue = _catalogue
+    if catalogue is None or catalogue.version != version:
+        catalogue = await sync_to_async(_catalogue_for_version)(version)
+    else:
+        count_cache_lookup("catalogue", True)
+    return catalogue
@@ -0,0 +1,171 @@
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from portalapi.models import BloodType
+from portalapi.utils.catalogue import aget_catalogue_version, get_catalogue_version
+from portalapi.utils.metrics import count_cache_lookup
+
+
+class CompatibilityMatrix:
+    """
+    In-memory donor/recipient relation between blood types.
+
+    Every blood type is assigned a bit position and the relation is stored as one
+    recipient bitmask and one donor bitmask per blood type. The resolved id tuples
+    and rows are precomputed as well, so every lookup is a single dict access.
+
+    Attributes:
+        rows (dict): Blood type rows keyed by id.
+        version (str): The catalogue version the matrix was built for.
+
+    Methods:
+        resolve: Returns the id of a blood type given its id or name.
+        can_donate: Checks whether a donor type can give to a recipient type.
+        donor_ids / recipient_ids: Ids of compatible blood types.
+        donors / recipients: Rows of compatible blood types.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[dict],
+        edges: Iterable[Tuple[int, int]],
+        version: Optional[str] = None,
+    ):
+        self.version = version
+        self.rows: Dict[int, dict] = {row["id"]: row for row in rows}
+        self._bits = {pk: 1 << position for position, pk in enumerate(self.rows)}
+        self._ids_by_name = {row["blood_type"]: pk for pk, row in self.rows.items()}
+
+        recipient_masks = dict.fromkeys(self.rows, 0)
+        donor_masks = dict.fromkeys(self.rows, 0)
+        for donor_id, recipient_id in edges:
+            recipient_masks[donor_id] |= self._bits[recipient_id]
+            donor_masks[recipient_id] |= self._bits[donor_id]
+        self._recipient_masks = recipient_masks
+        self._donor_masks = donor_masks
+
+        self._recipient_ids = {
+            pk: self._ids_for_mask(mask) for pk, mask in recipient_masks.items()
+        }
+        self._donor_ids = {
+            pk: self._ids_for_mask(mask) for pk, mask in donor_masks.items()
+        }
+        self._recipients = {
+            pk: [self.rows[i] for i in ids] for pk, ids in self._recipient_ids.items()
+        }
+        self._donors = {
+            pk: [self.rows[i] for i in ids] for pk, ids in self._donor_ids.items()
+        }
+
+    def _ids_for_mask(self, mask: int) -> Tuple[int, ...]:
+        return tuple(pk for pk, bit in self._bits.items() if mask & bit)
+
+    def resolve(self, value) -> Optional[int]:
+        if value in self._ids_by_name:
+            return self._ids_by_name[value]
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            return None
+        return pk if pk in self.rows else None
+
+    def can_donate(self, donor_id: int, recipient_id: int) -> bool:
+        return bool(
+            self._recipient_masks.get(donor_id, 0) & self._bits.get(recipient_id, 0)
+        )
+
+    def donor_ids(self, recipient_id: int) -> Tuple[int, ...]:
+        return self._donor_ids.get(recipient_id, ())
+
+    def recipient_ids(self, donor_id: int) -> Tuple[int, ...]:
+        return self._recipient_ids.get(donor_id, ())
+
+    def donors(self, recipient_id: int) -> List[dict]:
+        return self._donors.get(recipient_id, [])
+
+    def recipients(self, donor_id: int) -> List[dict]:
+        return self._recipients.get(donor_id, [])
+
+
+_lock = threading.Lock()
+_matrix: Optional[CompatibilityMatrix] = None
+
+
+def build_compatibility_matrix(version: Optional[str] = None) -> CompatibilityMatrix:
+    rows = BloodType.objects.order_by("id").values(
+        "id", "blood_type", "compatible_with"
+    )
+    edges = BloodType.donates_to.through.objects.values_list(
+        "from_bloodtype_id", "to_bloodtype_id"
+    )
+    return CompatibilityMatrix(list(rows), list(edges), version)
+
+
+def _matrix_for_version(version: str) -> CompatibilityMatrix:
+    global _matrix  # pylint: disable=global-statement
+    matrix = _matrix
+    hit = matrix is not None and matrix.version == version
+    count_cache_lookup("compatibility_matrix", hit)
+    if not hit:
+        with _lock:
+            if _matrix is None or _matrix.version != version:
+                _matrix = build_compatibility_matrix(version)
+            matrix = _matrix
+    return matrix
+
+
+def get_compatibility_matrix() -> CompatibilityMatrix:
+    """
+    Return the process wide compatibility matrix.
+
+    The matrix is rebuilt on first use and whenever the shared catalogue version
+    changed, so writes made by other worker processes are picked up as well.
+    """
+    return _matrix_for_version(get_catalogue_version())
+
+
+async def aget_compatibility_matrix() -> CompatibilityMatrix:
+    """
+    ``get_compatibility_matrix`` for async views; only a rebuild leaves the event
+    loop.
+    """
+    version = await aget_catalogue_version()
+    matrix = _matrix
+    if matrix is None or matrix.version != version:
+        matrix = await sync_to_async(_matrix_for_version)(version)
+    else:
+        count_cache_lookup("compatibility_matrix", True)
+    return matrix
+
+
+def invalidate_compatibility_matrix():
+    global _matrix  # pylint: disable=global-statement
+    with _lock:
+        _matrix = None
+
+
+def sync_compatibility_edges(using: str = DEFAULT_DB_ALIAS):
+    """
+    Rebuild the ``BloodType.donates_to`` relation from ``compatible_with``.
+
+    Names that do not match an existing blood type are ignored, so the relation is
+    completed as soon as the referenced blood type gets created.
+    """
+    through = BloodType.donates_to.through
+    blood_types = list(
+        BloodType.objects.using(using).only("id", "blood_type", "compatible_with")
+    )
+    ids_by_name = {blood_type.blood_type: blood_type.id for blood_type in blood_types}
+    edges = [
+        through(from_bloodtype_id=blood_type.id, to_bloodtype_id=ids_by_name[name])
+        for blood_type in blood_types
+        for name in blood_type.compatible_types()
+        if name in ids_by_name
+    ]
+    with transaction.atomic(using=using):
+        through.objects.using(using).all().delete()
+        through.objects.using(using).bulk_create(edges)
+    invalidate_compatibility_matrix()
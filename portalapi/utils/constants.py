@@ -115,7 +115,45 @@ DEFAULT_BLOOD_DATA = [
     },
 ]
 
+# Seeded as "entity.action.level" scopes.
+DEFAULT_SCOPES = [
+    "profile.view.self",
+    "profile.update.self",
+    "donor.search.all",
+    "donor.export.all",
+    "bloodtype.create.all",
+    "bloodtype.update.all",
+    "bloodtype.destroy.all",
+    "bloodrequest.view.all",
+    "donation.create.all",
+    "donation.view.all",
+]
+
+# Roles are matched by name; seeding adds missing scopes but never removes any.
+DEFAULT_ROLES = [
+    {
+        "name": "Donor",
+        "is_public_role": True,
+        "scopes": ["profile.view.self", "profile.update.self"],
+    },
+    {
+        "name": "Administrator",
+        "is_public_role": False,
+        "scopes": DEFAULT_SCOPES,
+    },
+]
+
+DONOR_MIN_AGE = 18
+DONOR_MAX_AGE = 65
+MAX_PAGE_SIZE = 100
+CAMEL_CASE_KEY_CACHE_SIZE = 4096
+DONOR_EXPORT_CHUNK_SIZE = 2000
+DONOR_EXPORT_FLUSH_BYTES = 64 * 1024
+
 
 class ResponseMessage(Enum):
     USERLOGGEDINSUCCESSFULLY = "Logged in Successfully"
     USERREGISTEREDSUCCESSFULLY = "Registered Successfully"
+    USERLOGGEDOUTSUCCESSFULLY = "Logged out Successfully"
+    VERIFICATIONSENT = "Verification code will be sent shortly"
+    VERIFIED = "Verified Successfully"
@@ -0,0 +1,164 @@
+import csv
+import io
+import zlib
+from itertools import chain
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+from portalapi.models import Profile
+from portalapi.utils.constants import DONOR_EXPORT_CHUNK_SIZE, DONOR_EXPORT_FLUSH_BYTES
+from portalapi.utils.database import streaming_alias
+
+# (column, lookup) pairs read with ``values_list``, so no model is instantiated.
+DONOR_EXPORT_FIELDS = (
+    ("id", "id"),
+    ("slug", "slug"),
+    ("email", "user__email"),
+    ("first_name", "user__first_name"),
+    ("last_name", "user__last_name"),
+    ("contact", "user__contact"),
+    ("blood_type", "blood_type__blood_type"),
+    ("house_no", "house_no"),
+    ("state", "state"),
+    ("pin_code", "pin_code"),
+    ("date_of_birth", "date_of_birth"),
+)
+DONOR_EXPORT_COLUMNS = tuple(column for column, _ in DONOR_EXPORT_FIELDS)
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_donors_queryset(
+    blood_type_id: Optional[int] = None, state: Optional[str] = None
+):
+    """
+    Build the flat ``values_list`` queryset of the donor export.
+
+    ``state`` is matched on the normalized column, so the filter shares the index
+    used by the donor search. The rows are read from ``streaming_alias`` so
+    Postgres streams them with a server-side cursor.
+    """
+    queryset = Profile.objects.using(streaming_alias())
+    if blood_type_id is not None:
+        queryset = queryset.filter(blood_type_id=blood_type_id)
+    if state:
+        queryset = queryset.filter(normalized_state=Profile.normalize_state(state))
+    return queryset.order_by("id").values_list(
+        *(lookup for _, lookup in DONOR_EXPORT_FIELDS)
+    )
+
+
+def iter_donor_rows(queryset, chunk_size: int = DONOR_EXPORT_CHUNK_SIZE):
+    contact_index = DONOR_EXPORT_COLUMNS.index("contact")
+    for row in queryset.iterator(chunk_size=chunk_size):
+        row = list(row)
+        # PhoneNumber instances are rendered in the configured (E.164) format.
+        row[contact_index] = str(row[contact_index] or "")
+        yield row
+
+
+def _buffered(lines: Iterable[str], flush_bytes: int) -> Iterator[bytes]:
+    """
+    Join encoded lines into chunks of about ``flush_bytes``. The first line (the
+    CSV header or first record) is yielded on its own so clients get the first
+    byte before the rest of the first chunk is read.
+    """
+    buffer = io.StringIO()
+    first = True
+    for line in lines:
+        buffer.write(line)
+        if first or buffer.tell() >= flush_bytes:
+            first = False
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _csv_lines(rows: Iterable[list]) -> Iterator[str]:
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for row in rows:
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+
+def csv_chunks(rows: Iterable[list], flush_bytes: int = DONOR_EXPORT_FLUSH_BYTES):
+    return _buffered(_csv_lines(chain([DONOR_EXPORT_COLUMNS], rows)), flush_bytes)
+
+
+def ndjson_chunks(rows: Iterable[list], flush_bytes: int = DONOR_EXPORT_FLUSH_BYTES):
+    encoder = DjangoJSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    lines = (
+        encoder.encode(dict(zip(DONOR_EXPORT_COLUMNS, row))) + "\n" for row in rows
+    )
+    return _buffered(lines, flush_bytes)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Gzip a byte stream on the fly. The first chunk is sync flushed so the gzip
+    header and first rows reach the client without waiting for a full window.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if first:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_donors(
+    blood_type_id: Optional[int] = None,
+    state: Optional[str] = None,
+    file_format: str = "csv",
+    compress: bool = True,
+    chunk_size: int = DONOR_EXPORT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Stream the donor export as encoded (and optionally gzipped) byte chunks.
+
+    Rows are fetched with ``iterator(chunk_size=...)``, encoded and written out one
+    buffer at a time, so memory stays flat regardless of the table size.
+    """
+    rows = iter_donor_rows(export_donors_queryset(blood_type_id, state), chunk_size)
+    chunks = ndjson_chunks(rows) if file_format == "ndjson" else csv_chunks(rows)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+async def aiter_chunks(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Iterate a sync byte stream from async code, one chunk per thread hop.
+
+    Served over ASGI, Django reads a sync iterator to the end before sending
+    the first byte. The hops are thread sensitive, so a server-side cursor
+    stays on the connection that opened it.
+    """
+    chunks = iter(chunks)
+    next_chunk = sync_to_async(next)
+    try:
+        while True:
+            chunk = await next_chunk(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def export_filename(file_format: str, compress: bool) -> str:
+    return f"donors.{file_format}{'.gz' if compress else ''}"
@@ -0,0 +1,525 @@
+import csv
+import io
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Lower
+from phonenumber_field.phonenumber import PhoneNumber
+
+from portalapi.models import DonorImport, Profile, User
+from portalapi.utils.compatibility import get_compatibility_matrix
+from portalapi.utils.eligibility import refresh_eligibility
+from portalapi.utils.hashers import init_hash_worker
+from portalapi.utils.ids import generate_xid
+from portalapi.utils.jobs import enqueue, extend_lease, job_handler
+
+logger = logging.getLogger(__name__)
+
+DONOR_IMPORT_COLUMNS = (
+    "email",
+    "contact",
+    "first_name",
+    "last_name",
+    "password",
+    "blood_type",
+    "house_no",
+    "state",
+    "pin_code",
+    "date_of_birth",
+)
+
+
+class DonorImportError(Exception):
+    pass
+
+
+REJECT_COLUMNS = ("row", "error", *DONOR_IMPORT_COLUMNS)
+
+
+def read_csv_rows(handle: IO[str]) -> Iterator[Dict[str, str]]:
+    yield from csv.DictReader(handle)
+
+
+def read_xlsx_rows(source) -> Iterator[Dict[str, str]]:
+    try:
+        # pylint: disable=import-outside-toplevel
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise DonorImportError("Install openpyxl to import .xlsx files.") from exc
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell or "").strip() for cell in next(rows, ())]
+        for values in rows:
+            yield {
+                column: "" if value is None else str(value)
+                for column, value in zip(header, values)
+            }
+    finally:
+        workbook.close()
+
+
+def _file_type(name: str) -> str:
+    suffix = Path(name).suffix.lower()
+    if suffix not in (".csv", ".xlsx"):
+        raise DonorImportError(f"Unsupported donor file type: {suffix or name}")
+    return suffix
+
+
+def read_donor_rows(path) -> Iterator[Dict[str, str]]:
+    """
+    Stream the rows of a CSV or XLSX donor file as dicts keyed by column name.
+    """
+    if _file_type(str(path)) == ".xlsx":
+        yield from read_xlsx_rows(path)
+        return
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        yield from read_csv_rows(handle)
+
+
+def read_donor_upload(upload) -> Iterator[Dict[str, str]]:
+    """
+    Stream the rows of an uploaded CSV or XLSX donor file.
+    """
+    if _file_type(upload.name) == ".xlsx":
+        return read_xlsx_rows(upload)
+    return read_csv_rows(io.TextIOWrapper(upload, encoding="utf-8-sig", newline=""))
+
+
+@dataclass
+class DonorImportResult:
+    processed: int = 0
+    created: int = 0
+    rejected: int = 0
+
+
+class DonorImporter:
+    """
+    Streaming importer creating ``User`` + ``Profile`` rows from donor files.
+
+    Rows are read lazily and handled in chunks of ``batch_size``: each chunk is
+    validated, checked for duplicates with a single query, has its passwords hashed
+    in a process pool and is written with two ``bulk_create`` calls. Invalid rows
+    are written to the ``rejects`` CSV and never abort the run.
+
+    The pool lives while the importer is used as a context manager, ``run`` opens
+    it itself.
+
+    Attributes:
+        batch_size (int): Number of rows validated and inserted together.
+        hash_workers (int): Size of the password hashing process pool; 0 hashes
+            inline.
+        rejects (file): Text file receiving the rejected rows, optional.
+        mp_context: Multiprocessing context of the pool, optional.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        hash_workers: Optional[int] = None,
+        rejects=None,
+        mp_context=None,
+    ):
+        self.batch_size = batch_size
+        self.hash_workers = hash_workers
+        self.mp_context = mp_context
+        self.result = DonorImportResult()
+        self._rejects = None
+        if rejects is not None:
+            self.write_rejects(rejects)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pin_code_field = Profile._meta.get_field("pin_code")
+
+    def __enter__(self):
+        if self.hash_workers != 0:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.hash_workers,
+                mp_context=self.mp_context,
+                initializer=init_hash_worker,
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def write_rejects(self, rejects, header: bool = True):
+        """
+        Write the rows rejected from now on to the ``rejects`` text file.
+        """
+        self._rejects = csv.DictWriter(rejects, fieldnames=REJECT_COLUMNS)
+        if header:
+            self._rejects.writeheader()
+
+    def run(self, rows: Iterable[Dict[str, str]]) -> DonorImportResult:
+        with self:
+            numbered = enumerate(rows, start=2)  # Row 1 is the header.
+            while True:
+                chunk = list(islice(numbered, self.batch_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk)
+                logger.info(
+                    "Imported %s donors, rejected %s",
+                    self.result.created,
+                    self.result.rejected,
+                )
+        return self.result
+
+    def reject(self, number: int, row: Dict[str, str], error: str):
+        self.result.rejected += 1
+        if self._rejects is not None:
+            self._rejects.writerow(
+                {
+                    "row": number,
+                    "error": error,
+                    **{column: row.get(column, "") for column in DONOR_IMPORT_COLUMNS},
+                    # Never persist plain text passwords to the side file.
+                    "password": "",
+                }
+            )
+
+    def clean_row(self, row: Dict[str, str]) -> dict:
+        """
+        Validate a raw row and return the cleaned values.
+
+        Raises:
+            ValidationError: If any value is invalid.
+        """
+        row = {key: (value or "").strip() for key, value in row.items() if key}
+        email = User.objects.normalize_email(row.get("email", ""))
+        validate_email(email)
+
+        contact = ""
+        if row.get("contact"):
+            phone_number = PhoneNumber.from_string(row["contact"])
+            if not phone_number.is_valid():
+                raise ValidationError("Enter a valid contact.")
+            contact = phone_number.as_e164
+
+        blood_type_id = get_compatibility_matrix().resolve(row.get("blood_type"))
+        if blood_type_id is None:
+            raise ValidationError(f"Unknown blood type {row.get('blood_type')!r}.")
+
+        pin_code = row.get("pin_code") or None
+        if pin_code:
+            self._pin_code_field.run_validators(pin_code)
+
+        date_of_birth = None
+        if row.get("date_of_birth"):
+            try:
+                date_of_birth = date.fromisoformat(row["date_of_birth"][:10])
+            except ValueError as exc:
+                raise ValidationError("Date of birth must be YYYY-MM-DD.") from exc
+
+        return {
+            "email": email,
+            "contact": contact,
+            "first_name": row.get("first_name", "")[:150],
+            "last_name": row.get("last_name", "")[:150],
+            "password": row.get("password") or None,
+            "blood_type_id": blood_type_id,
+            "house_no": row.get("house_no") or None,
+            "state": row.get("state") or None,
+            "pin_code": pin_code,
+            "date_of_birth": date_of_birth,
+        }
+
+    def existing_keys(self, cleaned: List[dict]) -> Tuple[set, set]:
+        emails = {values["email"].lower() for values in cleaned}
+        contacts = {values["contact"] for values in cleaned if values["contact"]}
+        existing = (
+            User.objects.annotate(email_lower=Lower("email"))
+            .filter(Q(email_lower__in=emails) | Q(contact__in=contacts))
+            .values_list("email_lower", "contact")
+        )
+        existing_emails, existing_contacts = set(), set()
+        for email, contact in existing:
+            existing_emails.add(email)
+            if contact:
+                existing_contacts.add(str(contact))
+        return existing_emails, existing_contacts
+
+    def hash_passwords(self, passwords: List[Optional[str]]) -> List[str]:
+        if self._pool is None or not any(passwords):
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self._pool._max_workers * 4))
+        return list(self._pool.map(make_password, passwords, chunksize=chunksize))
+
+    def clean_chunk(self, chunk: List[Tuple[int, Dict[str, str]]]) -> list:
+        """
+        Return the ``(number, row, values)`` of the valid rows of a chunk.
+        """
+        accepted = []
+        for number, row in chunk:
+            try:
+                accepted.append((number, row, self.clean_row(row)))
+            except ValidationError as exc:
+                self.reject(number, row, "; ".join(exc.messages))
+        return accepted
+
+    def drop_duplicates(self, accepted: list) -> list:
+        """
+        Reject the rows whose email or contact is taken, by an existing user or
+        an earlier row.
+        """
+        existing_emails, existing_contacts = self.existing_keys(
+            [values for _, _, values in accepted]
+        )
+        unique = []
+        for number, row, values in accepted:
+            email, contact = values["email"].lower(), values["contact"]
+            if email in existing_emails:
+                self.reject(number, row, "User with same email already exists.")
+            elif contact and contact in existing_contacts:
+                self.reject(number, row, "User with same contact already exists.")
+            else:
+                existing_emails.add(email)
+                if contact:
+                    existing_contacts.add(contact)
+                unique.append((number, row, values))
+        return unique
+
+    def import_chunk(self, chunk: List[Tuple[int, Dict[str, str]]]):
+        self.insert_chunk(self.prepare_chunk(chunk))
+
+    def prepare_chunk(self, chunk: List[Tuple[int, Dict[str, str]]]) -> list:
+        """
+        Validate a chunk and hash its passwords, outside of any transaction.
+
+        Returns:
+            list: The ``(number, row, user, profile)`` of the donors to insert.
+        """
+        self.result.processed += len(chunk)
+        accepted = self.clean_chunk(chunk)
+        unique = self.drop_duplicates(accepted) if accepted else []
+        if not unique:
+            return []
+
+        hashes = self.hash_passwords([values["password"] for _, _, values in unique])
+        return [
+            (number, row, *self.build_donor(values, password))
+            for (number, row, values), password in zip(unique, hashes)
+        ]
+
+    def insert_chunk(self, pairs: list):
+        if not pairs:
+            return
+        try:
+            with transaction.atomic():
+                self.insert(pairs)
+        except IntegrityError:
+            # Rows inserted concurrently since the duplicate check; retry one by one.
+            for number, row, user, profile in pairs:
+                try:
+                    with transaction.atomic():
+                        self.insert([(number, row, user, profile)])
+                except IntegrityError as exc:
+                    self.reject(number, row, str(exc))
+
+    def insert(self, pairs):
+        User.objects.bulk_create([user for _, _, user, _ in pairs], self.batch_size)
+        profiles = Profile.objects.bulk_create(
+            [profile for _, _, _, profile in pairs], self.batch_size
+        )
+        # bulk_create skips the signals maintaining the eligibility.
+        refresh_eligibility([profile.pk for profile in profiles])
+        self.result.created += len(pairs)
+
+    @staticmethod
+    def build_donor(values: dict, password: str) -> Tuple[User, Profile]:
+        user = User(
+            id=generate_xid(),
+            username=values["email"],
+            email=values["email"],
+            contact=values["contact"],
+            first_name=values["first_name"],
+            last_name=values["last_name"],
+            password=password,
+        )
+        profile = Profile(
+            user=user,
+            blood_type_id=values["blood_type_id"],
+            house_no=values["house_no"],
+            state=values["state"],
+            pin_code=values["pin_code"],
+            date_of_birth=values["date_of_birth"],
+            slug=generate_xid(),
+        )
+        profile.normalize_location()
+        return user, profile
+
+
+def queue_donor_import(upload, user, batch_size: int = 1000) -> DonorImport:
+    """
+    Store an uploaded donor file and queue its import.
+
+    The import runs on the job workers, which e-mail the summary and the rejected
+    rows to ``user``. Workers must share the default storage with the web
+    processes.
+
+    Raises:
+        DonorImportError: If the file type is not supported.
+    """
+    suffix = _file_type(upload.name)
+    path = default_storage.save(f"donor-imports/{generate_xid()}{suffix}", upload)
+    donor_import = DonorImport.objects.create(
+        path=path, requested_by=user, batch_size=batch_size
+    )
+    enqueue("donor_import.run", {"donor_import_id": donor_import.pk})
+    return donor_import
+
+
+def _rejects_path(donor_import: DonorImport, start: int) -> str:
+    return f"{donor_import.path}.rejects-{start}.csv"
+
+
+def _batch_starts(donor_import: DonorImport) -> range:
+    return range(2, donor_import.next_row, donor_import.batch_size)
+
+
+def _save(path: str, content: str):
+    # Storage backends rename rather than overwrite an existing name.
+    default_storage.delete(path)
+    default_storage.save(path, ContentFile(content.encode()))
+
+
+def _import_batch(
+    importer: DonorImporter,
+    donor_import: DonorImport,
+    chunk: List[Tuple[int, Dict[str, str]]],
+) -> bool:
+    """
+    Import one batch and move the cursor after it, in one transaction.
+
+    Returns:
+        bool: False when another run already imported the batch.
+    """
+    start, end = chunk[0][0], chunk[-1][0] + 1
+    before = DonorImportResult(**vars(importer.result))
+    rejects = io.StringIO()
+    importer.write_rejects(rejects, header=False)
+    pairs = importer.prepare_chunk(chunk)
+    with transaction.atomic():
+        moved = DonorImport.objects.filter(pk=donor_import.pk, next_row=start).update(
+            next_row=end
+        )
+        if not moved:
+            return False
+        importer.insert_chunk(pairs)
+        DonorImport.objects.filter(pk=donor_import.pk).update(
+            processed=F("processed") + len(chunk),
+            created=F("created") + importer.result.created - before.created,
+            rejected=F("rejected") + importer.result.rejected - before.rejected,
+        )
+        if rejects.tell():
+            # Written before the commit: a run retrying the batch rewrites the
+            # same rows.
+            _save(_rejects_path(donor_import, start), rejects.getvalue())
+    donor_import.next_row = end
+    return True
+
+
+def _rows_from(upload, next_row: int) -> Iterator[Tuple[int, Dict[str, str]]]:
+    numbered = enumerate(read_donor_upload(upload), start=2)  # Row 1 is the header.
+    return islice(numbered, next_row - 2, None)
+
+
+@job_handler("donor_import.run", max_attempts=3)
+def run_donor_import(payload: dict):
+    """
+    Import the next ``DONOR_IMPORT_JOB_ROWS`` rows of a queued donor file.
+
+    Each batch commits with the cursor of the import, and the lease of the job is
+    renewed between batches: a run taken over, or retried, continues after the
+    last committed batch. The run queues the next one, or the summary once the
+    file is exhausted.
+    """
+    donor_import = DonorImport.objects.filter(
+        pk=payload["donor_import_id"], finished=False
+    ).first()
+    if donor_import is None:
+        return
+    position = donor_import.next_row
+    importer = DonorImporter(
+        batch_size=donor_import.batch_size,
+        hash_workers=getattr(settings, "DONOR_IMPORT_HASH_WORKERS", None),
+        # Workers run jobs on threads, which a forked child must not inherit.
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    job_rows = getattr(settings, "DONOR_IMPORT_JOB_ROWS", 10000)
+    with default_storage.open(donor_import.path, "rb") as upload, importer:
+        rows = _rows_from(upload, position)
+        exhausted = False
+        while donor_import.next_row - position < job_rows:
+            chunk = list(islice(rows, donor_import.batch_size))
+            exhausted = len(chunk) < donor_import.batch_size
+            if chunk and not (
+                extend_lease() and _import_batch(importer, donor_import, chunk)
+            ):
+                return
+            if exhausted:
+                break
+    with transaction.atomic():
+        # Only the run owning the cursor continues the import.
+        owned = DonorImport.objects.filter(
+            pk=donor_import.pk, next_row=donor_import.next_row, finished=False
+        ).update(finished=exhausted)
+        if owned:
+            enqueue(
+                "donor_import.finish" if exhausted else "donor_import.run",
+                {"donor_import_id": donor_import.pk},
+            )
+
+
+@job_handler("donor_import.finish")
+def finish_donor_import(payload: dict):
+    """
+    E-mail the summary and the rejected rows of an import, then delete its files.
+    """
+    donor_import = (
+        DonorImport.objects.filter(pk=payload["donor_import_id"], finished=True)
+        .select_related("requested_by")
+        .first()
+    )
+    if donor_import is None:
+        return
+    paths = [
+        _rejects_path(donor_import, start) for start in _batch_starts(donor_import)
+    ]
+    paths = [path for path in paths if default_storage.exists(path)]
+    user = donor_import.requested_by
+    if user is not None and user.email:
+        message = EmailMessage(
+            "Donor import finished",
+            f"Processed {donor_import.processed} rows: {donor_import.created} "
+            f"donors created, {donor_import.rejected} rejected.",
+            to=[user.email],
+        )
+        if paths:
+            rejects = io.StringIO()
+            csv.writer(rejects).writerow(REJECT_COLUMNS)
+            for path in paths:
+                with default_storage.open(path, "rb") as batch:
+                    rejects.write(batch.read().decode())
+            message.attach("donor-import-rejects.csv", rejects.getvalue(), "text/csv")
+        message.send()
+    for path in (donor_import.path, *paths):
+        default_storage.delete(path)
+    donor_import.delete()
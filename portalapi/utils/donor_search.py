@@ -0,0 +1,93 @@
+from datetime import date
+from typing import Optional, Tuple
+
+from django.utils import timezone
+
+from portalapi.models import Profile
+from portalapi.utils.compatibility import CompatibilityMatrix, get_compatibility_matrix
+from portalapi.utils.pagination import PartitionedQuerySet
+
+
+def shift_years(day: date, years: int) -> date:
+    try:
+        return day.replace(year=day.year + years)
+    except ValueError:
+        # 29th of February on a non leap year.
+        return day.replace(year=day.year + years, day=28)
+
+
+def date_of_birth_bounds(
+    min_age: int, max_age: int, today: Optional[date] = None
+) -> Tuple[date, date]:
+    """
+    Translate an age range into a ``date_of_birth`` range.
+
+    Returns:
+        tuple: ``(born_after, born_on_or_before)`` so the age filter stays a plain
+        range predicate on the column instead of an expression over every row.
+    """
+    today = today or timezone.localdate()
+    return shift_years(today, -(max_age + 1)), shift_years(today, -min_age)
+
+
+def search_donors(
+    blood_type_id: int,
+    pin_code: Optional[str] = None,
+    state: Optional[str] = None,
+    min_age: Optional[int] = None,
+    max_age: Optional[int] = None,
+    matrix: Optional[CompatibilityMatrix] = None,
+    eligible: bool = False,
+):
+    """
+    Build the donor search queryset for a recipient blood type and location.
+
+    The filters line up with ``profile_blood_pin_idx`` / ``profile_blood_state_idx``
+    (blood type, normalized location, id). Only one blood type at a time is a
+    single index range in ``id`` order: across several compatible types the
+    database has to sort every match, so pages are read through
+    ``partition_by_blood_type``.
+
+    ``eligible`` keeps the donors who can donate today, from the indexed
+    ``DonorEligibility.eligible_from`` date and ``eligible_until``.
+    """
+    matrix = matrix or get_compatibility_matrix()
+    donor_ids = matrix.donor_ids(blood_type_id)
+    queryset = Profile.objects.select_related("user", "blood_type").filter(
+        blood_type_id__in=donor_ids, user__is_active=True
+    )
+    if pin_code:
+        queryset = queryset.filter(
+            normalized_pin_code=Profile.normalize_pin_code(pin_code)
+        )
+    else:
+        queryset = queryset.filter(normalized_state=Profile.normalize_state(state))
+    if min_age is not None and max_age is not None:
+        born_after, born_on_or_before = date_of_birth_bounds(min_age, max_age)
+        queryset = queryset.filter(
+            date_of_birth__gt=born_after, date_of_birth__lte=born_on_or_before
+        )
+    if eligible:
+        today = timezone.localdate()
+        # eligible_until also drops donors who aged out since the last sweep.
+        queryset = queryset.filter(
+            eligibility__eligible_from__lte=today,
+            eligibility__eligible_until__gt=today,
+        )
+    return queryset.order_by("id")
+
+
+def partition_by_blood_type(
+    queryset, blood_type_id: int, matrix: Optional[CompatibilityMatrix] = None
+) -> PartitionedQuerySet:
+    """
+    Split a ``search_donors`` queryset per compatible donor blood type.
+
+    The cursor pagination reads a page from every blood type's index range and
+    merges them, so a deep page costs at most one page of rows per blood type.
+    """
+    matrix = matrix or get_compatibility_matrix()
+    return PartitionedQuerySet(
+        queryset.filter(blood_type_id=donor_id)
+        for donor_id in matrix.donor_ids(blood_type_id)
+    )
@@ -0,0 +1,124 @@
+from datetime import date, timedelta
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from portalapi.models import DonorEligibility, Profile
+from portalapi.utils.constants import DONOR_MAX_AGE, DONOR_MIN_AGE
+from portalapi.utils.donor_search import shift_years
+
+ELIGIBILITY_FIELDS = ("last_donated_on", "eligible_from", "eligible_until")
+
+
+def eligibility_dates(
+    date_of_birth: Optional[date],
+    last_donated_on: Optional[date],
+    today: Optional[date] = None,
+) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Compute the ``(eligible_from, eligible_until)`` dates of a donor.
+
+    A donor may donate from their ``DONOR_MIN_AGE`` birthday and
+    ``settings.DONATION_INTERVAL_DAYS`` after their last donation, until the day
+    they turn ``DONOR_MAX_AGE + 1``. ``eligible_from`` is None when that day has
+    passed or never comes.
+    """
+    if date_of_birth is None:
+        return None, None
+    today = today or timezone.localdate()
+    eligible_from = shift_years(date_of_birth, DONOR_MIN_AGE)
+    if last_donated_on is not None:
+        interval = timedelta(days=getattr(settings, "DONATION_INTERVAL_DAYS", 90))
+        eligible_from = max(eligible_from, last_donated_on + interval)
+    eligible_until = shift_years(date_of_birth, DONOR_MAX_AGE + 1)
+    if eligible_from >= eligible_until or eligible_until <= today:
+        eligible_from = None
+    return eligible_from, eligible_until
+
+
+def refresh_eligibility(
+    profile_ids: Iterable[int], today: Optional[date] = None
+) -> int:
+    """
+    Recompute the eligibility of the given profiles.
+
+    One query reads the profiles with their last donation and one the current
+    rows; only the rows that are missing or whose dates changed are written,
+    with a single upsert.
+
+    Returns:
+        int: The number of rows written.
+    """
+    today = today or timezone.localdate()
+    profiles = (
+        Profile.objects.filter(pk__in=list(profile_ids))
+        .annotate(last_donated_on=Max("user__donations__donated_on"))
+        .values_list("pk", "date_of_birth", "last_donated_on")
+    )
+    expected = {
+        pk: (last_donated_on, *eligibility_dates(date_of_birth, last_donated_on, today))
+        for pk, date_of_birth, last_donated_on in profiles
+    }
+    current = {
+        pk: tuple(values)
+        for pk, *values in DonorEligibility.objects.filter(
+            profile_id__in=list(expected)
+        ).values_list("profile_id", *ELIGIBILITY_FIELDS)
+    }
+    changed = [
+        DonorEligibility(profile_id=pk, **dict(zip(ELIGIBILITY_FIELDS, values)))
+        for pk, values in expected.items()
+        if current.get(pk) != values
+    ]
+    DonorEligibility.objects.bulk_create(
+        changed,
+        update_conflicts=True,
+        unique_fields=["profile"],
+        update_fields=ELIGIBILITY_FIELDS,
+    )
+    return len(changed)
+
+
+def sweep_eligibility(
+    batch_size: int = 2000, today: Optional[date] = None, full: bool = False
+) -> int:
+    """
+    Refresh the eligibility rows the passing days invalidated, in batches of
+    ``batch_size`` ids.
+
+    Meant to run nightly. Only two kinds of rows can go stale without a write:
+    donors who aged out (``eligible_until`` reached while ``eligible_from`` is
+    set, found through a partial index) and profiles without a row (created with
+    ``bulk_create``). ``full`` re-reads every profile instead, to repair rows
+    after bulk ``update`` calls.
+
+    Returns:
+        int: The number of rows written.
+    """
+    today = today or timezone.localdate()
+    if full:
+        candidates = [Profile.objects.all()]
+    else:
+        candidates = [
+            DonorEligibility.objects.filter(
+                eligible_from__isnull=False, eligible_until__lte=today
+            ),
+            Profile.objects.filter(eligibility__isnull=True),
+        ]
+    return sum(_sweep(queryset, batch_size, today) for queryset in candidates)
+
+
+def _sweep(queryset, batch_size: int, today: date) -> int:
+    written, last_id = 0, 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return written
+        written += refresh_eligibility(ids, today)
+        last_id = ids[-1]
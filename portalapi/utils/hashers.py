@@ -0,0 +1,35 @@
+from time import perf_counter
+
+import django
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from portalapi.utils.instrumentation import timed
+from portalapi.utils.metrics import observe_password_hash
+
+
+class TimedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher, reporting the time of every key derivation.
+
+    The algorithm name and the stored format are unchanged. ``verify`` derives
+    through ``encode`` as well, so logins, registrations and password changes are
+    all measured.
+    """
+
+    @timed("hash")
+    def encode(self, password, salt, iterations=None):
+        started = perf_counter()
+        try:
+            return super().encode(password, salt, iterations)
+        finally:
+            observe_password_hash(perf_counter() - started)
+
+
+def init_hash_worker():
+    """
+    Set Django up in a password hashing process started with "spawn".
+
+    Lives here rather than next to the pools: a spawned child imports the module
+    of its initializer before running it, and this one loads no models.
+    """
+    django.setup()
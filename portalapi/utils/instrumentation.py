@@ -0,0 +1,324 @@
+import logging
+import random
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+from typing import Dict, List, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from portalapi.utils.metrics import observe_request, view_label
+
+logger = logging.getLogger(__name__)
+
+# Timing of the request being handled, None when nothing is recorded.
+_current: ContextVar[Optional["RequestTiming"]] = ContextVar(
+    "request_timing", default=None
+)
+
+_FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def sql_fingerprint(sql: str) -> str:
+    """
+    Normalize a statement so the same query with other parameters compares equal.
+
+    Literals and placeholders become ``?`` and ``IN`` lists collapse to ``(...)``.
+    """
+    for pattern, replacement in _FINGERPRINT_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+class RequestTiming:
+    """
+    Time spent by a request.
+
+    Only sampled (``detailed``) requests record their statements and phases,
+    the others only count their queries for the metrics.
+
+    Attributes:
+        detailed (bool): Whether the request is sampled.
+        queries (int): Number of database queries.
+        db (float): Seconds spent executing them.
+        statements (list): SQL of the queries, in execution order.
+        phases (dict): Seconds spent per phase (``serialize``, ``render``).
+        running (set): Phases being timed, nested calls are not counted twice.
+    """
+
+    __slots__ = ("detailed", "queries", "db", "statements", "phases", "running")
+
+    def __init__(self, detailed: bool = True):
+        self.detailed = detailed
+        self.queries = 0
+        self.db = 0.0
+        self.statements: List[str] = []
+        self.phases: Dict[str, float] = {}
+        self.running = set()
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f'db;dur={self.db * 1000:.3f};desc="{self.queries} queries"']
+        metrics.extend(
+            f"{phase};dur={seconds * 1000:.3f}"
+            for phase, seconds in self.phases.items()
+        )
+        metrics.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(metrics)
+
+    def fingerprints(self, limit: int = 10):
+        """
+        Returns the ``limit`` most frequent query fingerprints with their count.
+        """
+        return Counter(map(sql_fingerprint, self.statements)).most_common(limit)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    ``execute_wrapper`` adding the query to the timing of the current request.
+
+    It stays registered on every connection, see ``time_queries``: connections
+    are per thread, and the queries of an async view run in ``sync_to_async``
+    threads which only share the request's context.
+    """
+    timing = _current.get()
+    if timing is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timing.db += perf_counter() - started
+        timing.queries += 1
+        if timing.detailed:
+            timing.statements.append(sql)
+
+
+def time_queries(connection):
+    """
+    Register ``record_query`` on a connection, once. Called on
+    ``connection_created``.
+    """
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def timed(phase: str):
+    """
+    Decorator adding the time spent in the function to the ``phase`` of the
+    sampled request. Outside a sampled request it only costs a context lookup.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            timing = _current.get()
+            if timing is None or not timing.detailed or phase in timing.running:
+                return func(*args, **kwargs)
+            timing.running.add(phase)
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timing.add(phase, perf_counter() - started)
+                timing.running.discard(phase)
+
+        return wrapper
+
+    return decorator
+
+
+_serializers_timed = False
+
+
+def time_serializers():
+    """
+    Time DRF serializer validation and representation as the ``serialize`` phase.
+
+    ``BaseSerializer.data`` and ``is_valid`` are wrapped once per process, nested
+    serializers are covered by the outermost call.
+    """
+    global _serializers_timed  # pylint: disable=global-statement
+    if _serializers_timed:
+        return
+    # pylint: disable=import-outside-toplevel
+    from rest_framework.serializers import BaseSerializer
+
+    BaseSerializer.data = property(timed("serialize")(BaseSerializer.data.fget))
+    BaseSerializer.is_valid = timed("serialize")(BaseSerializer.is_valid)
+    _serializers_timed = True
+
+
+class EndpointStats:
+    __slots__ = ("count", "total", "max", "queries", "db", "phases")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.queries = 0
+        self.db = 0.0
+        self.phases: Dict[str, float] = {}
+
+    def add(self, timing: RequestTiming, total: float):
+        self.count += 1
+        self.total += total
+        self.max = max(self.max, total)
+        self.queries += timing.queries
+        self.db += timing.db
+        for phase, seconds in timing.phases.items():
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+            "queries_per_request": round(self.queries / self.count, 2),
+            "db_mean_ms": round(self.db / self.count * 1000, 3),
+            **{
+                f"{phase}_mean_ms": round(seconds / self.count * 1000, 3)
+                for phase, seconds in self.phases.items()
+            },
+        }
+
+
+_endpoint_stats: Dict[str, EndpointStats] = {}
+_endpoint_stats_lock = threading.Lock()
+
+
+def endpoint_stats() -> Dict[str, dict]:
+    """
+    Aggregates of the requests sampled by this process, keyed by
+    ``"<method> <route>"``.
+    """
+    with _endpoint_stats_lock:
+        return {key: stats.as_dict() for key, stats in _endpoint_stats.items()}
+
+
+def reset_endpoint_stats():
+    with _endpoint_stats_lock:
+        _endpoint_stats.clear()
+
+
+def endpoint_key(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    return f"{request.method} {match.route if match else '<unresolved>'}"
+
+
+class RequestTimingMiddleware:
+    """
+    Reports where the time of a request goes.
+
+    ``settings.REQUEST_TIMING_SAMPLE_RATE`` of the requests are sampled: their
+    database queries (recorded by the ``record_query`` execute wrapper),
+    serializer, render and total time are returned in a ``Server-Timing`` header
+    and aggregated per endpoint, see ``endpoint_stats``. Requests slower than
+    ``settings.SLOW_REQUEST_THRESHOLD_MS`` are logged, with the fingerprints of
+    their queries when sampled.
+
+    With ``settings.METRICS_ENABLED`` every request is counted in the metrics,
+    see ``portalapi.utils.metrics``. With neither, a request only reads the
+    clock twice.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 0)
+        self.metrics = getattr(settings, "METRICS_ENABLED", False)
+        threshold = getattr(settings, "SLOW_REQUEST_THRESHOLD_MS", None)
+        self.slow_threshold = threshold / 1000 if threshold is not None else None
+        if self.sample_rate:
+            time_serializers()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def start(self) -> Optional[RequestTiming]:
+        sampled = bool(self.sample_rate) and (
+            self.sample_rate >= 1 or random.random() < self.sample_rate
+        )
+        if sampled or self.metrics:
+            return RequestTiming(detailed=sampled)
+        return None
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timing = self.start()
+        if timing is None:
+            started = perf_counter()
+            response = self.get_response(request)
+            self.finish(request, response, None, perf_counter() - started)
+            return response
+        token = _current.set(timing)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timing, perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timing = self.start()
+        if timing is None:
+            started = perf_counter()
+            response = await self.get_response(request)
+            self.finish(request, response, None, perf_counter() - started)
+            return response
+        token = _current.set(timing)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, timing, perf_counter() - started)
+        return response
+
+    def finish(self, request, response, timing: Optional[RequestTiming], total):
+        if timing is not None and self.metrics:
+            observe_request(
+                view_label(request),
+                request.method,
+                response.status_code,
+                total,
+                timing.queries,
+                timing.db,
+            )
+        if timing is not None and timing.detailed:
+            response["Server-Timing"] = timing.server_timing(total)
+            key = endpoint_key(request)
+            with _endpoint_stats_lock:
+                stats = _endpoint_stats.get(key)
+                if stats is None:
+                    stats = _endpoint_stats[key] = EndpointStats()
+                stats.add(timing, total)
+        if self.slow_threshold is not None and total >= self.slow_threshold:
+            self.log_slow_request(request, response, timing, total)
+
+    def log_slow_request(self, request, response, timing, total):
+        message = "Slow request %s %s (%s) took %.1f ms"
+        args = [request.method, request.path, response.status_code, total * 1000]
+        if timing is not None:
+            message += ", %d queries in %.1f ms"
+            args += [timing.queries, timing.db * 1000]
+            for fingerprint, count in timing.fingerprints() if timing.detailed else ():
+                message += "\n  %4d x %s"
+                args += [count, fingerprint]
+        logger.warning(message, *args)
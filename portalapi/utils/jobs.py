@@ -0,0 +1,287 @@
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Callable, Dict, List, NamedTuple, Optional
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from portalapi.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+class JobHandler(NamedTuple):
+    func: Callable
+    batch_size: Optional[int]
+    max_attempts: int
+
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(name: str, batch_size: Optional[int] = None, max_attempts: int = 5):
+    """
+    Register the decorated function as the handler of the ``name`` jobs.
+
+    A handler is called with the payload of a job, or with ``batch_size``
+    payloads at most when given, e.g. to send a batch of messages over a single
+    connection. A batch fails or succeeds as a whole. A failed job is retried
+    with an exponential backoff until it ran ``max_attempts`` times.
+
+    Jobs run at least once: a worker dying mid-job leaves it to be claimed again
+    once its lease expires, so handlers must be idempotent. The expired claim
+    counts as an attempt. Handlers running for longer than ``settings.JOB_LEASE``
+    must call ``extend_lease`` as they progress.
+    """
+
+    def decorator(func):
+        _handlers[name] = JobHandler(func, batch_size, max_attempts)
+        return func
+
+    return decorator
+
+
+def enqueue(
+    name: str,
+    payload: Optional[dict] = None,
+    run_at: Optional[datetime] = None,
+    priority: int = 0,
+) -> Job:
+    """
+    Add a job to the queue.
+
+    The job is written in the caller's transaction, so it only runs if the
+    transaction commits.
+    """
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or timezone.now(),
+        priority=priority,
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """
+    Seconds before a job failed ``attempts`` times runs again: exponential from
+    ``settings.JOB_RETRY_DELAY``, capped at ``settings.JOB_MAX_RETRY_DELAY``,
+    with up to 10% jitter.
+    """
+    base = getattr(settings, "JOB_RETRY_DELAY", 10)
+    cap = getattr(settings, "JOB_MAX_RETRY_DELAY", 60 * 60)
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(1, 1.1)
+
+
+def _lease() -> timedelta:
+    return timedelta(seconds=getattr(settings, "JOB_LEASE", 300))
+
+
+def claim_jobs(limit: int) -> List[Job]:
+    """
+    Claim up to ``limit`` runnable jobs for this worker.
+
+    The candidates are locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` where
+    the database supports it, so concurrent workers pick different jobs. They
+    are then marked with a random claim token by a conditional ``UPDATE`` which
+    only matches jobs still runnable; on SQLite, which has no row locks, that is
+    what keeps two workers from running the same job. Jobs whose lease expired
+    are runnable again, unless that was their last allowed attempt: those are
+    marked failed instead.
+    """
+    now = timezone.now()
+    runnable = Q(status=Job.Status.QUEUED, run_at__lte=now) | Q(
+        status=Job.Status.RUNNING, locked_until__lt=now
+    )
+    claim = uuid4().hex
+    lease = _lease()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(runnable)
+            .order_by("priority", "run_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        Job.objects.filter(runnable, id__in=ids).update(
+            status=Job.Status.RUNNING,
+            claim=claim,
+            locked_until=now + lease,
+            attempts=F("attempts") + 1,
+        )
+    jobs = list(Job.objects.filter(claim=claim).order_by("priority", "run_at", "id"))
+    exhausted = [job for job in jobs if job.attempts > _max_attempts(job)]
+    if exhausted:
+        _failed(exhausted, None, "Lease expired after the last allowed attempt.")
+    return [job for job in jobs if job.attempts <= _max_attempts(job)]
+
+
+def _max_attempts(job: Job) -> int:
+    handler = _handlers.get(job.name)
+    # Unknown jobs run once, to be failed by run_jobs.
+    return handler.max_attempts if handler is not None else 1
+
+
+_running = threading.local()
+
+
+def extend_lease() -> bool:
+    """
+    Renew the lease of the jobs the calling handler runs, for long handlers.
+
+    Returns:
+        bool: False when another worker took the jobs over after their lease
+        expired; the handler should stop without committing more work.
+    """
+    jobs = getattr(_running, "jobs", None)
+    if not jobs:
+        return True
+    return len(_renew_lease(jobs)) == len(jobs)
+
+
+def _renew_lease(jobs: List[Job]) -> List[Job]:
+    """
+    Renew the lease of claimed jobs and return the ones the claim still holds.
+    """
+    ids = [job.pk for job in jobs]
+    held = Job.objects.filter(pk__in=ids, claim=jobs[0].claim)
+    if held.update(locked_until=timezone.now() + _lease()) == len(jobs):
+        return jobs
+    held_ids = set(held.values_list("pk", flat=True))
+    return [job for job in jobs if job.pk in held_ids]
+
+
+def _failed(jobs: List[Job], handler: Optional[JobHandler], error: str):
+    now = timezone.now()
+    for job in jobs:
+        if handler is not None and job.attempts < handler.max_attempts:
+            Job.objects.filter(pk=job.pk, claim=job.claim).update(
+                status=Job.Status.QUEUED,
+                claim="",
+                locked_until=None,
+                run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+                last_error=error,
+            )
+        else:
+            Job.objects.filter(pk=job.pk, claim=job.claim).update(
+                status=Job.Status.FAILED,
+                claim="",
+                locked_until=None,
+                last_error=error,
+            )
+            logger.error("Job %s %s failed: %s", job.pk, job.name, error)
+
+
+def run_jobs(jobs: List[Job]):
+    """
+    Run claimed jobs, grouped in batches for the batch handlers.
+
+    The lease of a batch is renewed right before it runs, so jobs waiting
+    behind long ones are not taken over; jobs already taken over are skipped.
+    Completed jobs are deleted, failed ones are queued again or marked failed.
+    """
+    jobs = sorted(jobs, key=lambda job: job.name)
+    for name, group in groupby(jobs, key=lambda job: job.name):
+        group = list(group)
+        handler = _handlers.get(name)
+        if handler is None:
+            _failed(group, None, f"No handler registered for {name!r}.")
+            continue
+        size = handler.batch_size or 1
+        for start in range(0, len(group), size):
+            end = start + size
+            batch = _renew_lease(group[start:end])
+            if not batch:
+                continue
+            _running.jobs = batch
+            try:
+                if handler.batch_size:
+                    handler.func([job.payload for job in batch])
+                else:
+                    handler.func(batch[0].payload)
+            except Exception:  # pylint: disable=broad-except
+                _failed(batch, handler, traceback.format_exc())
+            else:
+                # Unless another worker took it over after the lease expired.
+                Job.objects.filter(
+                    pk__in=[job.pk for job in batch], claim=batch[0].claim
+                ).delete()
+            finally:
+                _running.jobs = None
+
+
+def work(limit: Optional[int] = None) -> int:
+    """
+    Claim and run one round of jobs.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    jobs = claim_jobs(limit or getattr(settings, "JOB_CLAIM_LIMIT", 10))
+    if jobs:
+        run_jobs(jobs)
+    return len(jobs)
+
+
+def work_until_idle(limit: Optional[int] = None) -> int:
+    """
+    Run jobs until none is runnable, e.g. in tests.
+
+    Returns:
+        int: The number of jobs run.
+    """
+    total = 0
+    while True:
+        count = work(limit)
+        if not count:
+            return total
+        total += count
+
+
+class Worker:
+    """
+    Runs jobs on ``concurrency`` threads, each polling the queue every
+    ``interval`` seconds while it is empty, until ``stop`` is called.
+    """
+
+    def __init__(self, concurrency: int = 1, interval: float = 1.0):
+        self.concurrency = concurrency
+        self.interval = interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self._loop, name=f"job-worker-{number}")
+            for number in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _loop(self):
+        while not self._stopping.is_set():
+            try:
+                count = work()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Job worker %s failed to claim jobs", self.name)
+                count = 0
+            finally:
+                close_old_connections()
+            if not count:
+                self._stopping.wait(self.interval)
+        connection.close()
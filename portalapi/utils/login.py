@@ -0,0 +1,258 @@
+import contextvars
+import itertools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import user_login_failed
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from portalapi.models import User
+from portalapi.utils.metrics import count_login_rejection
+from portalapi.utils.throttling import SlidingWindow, cache_ident
+
+TRUSTED_CLIENT_PREFIX = "login:trusted"
+
+
+class HashingPoolFull(Exception):
+    pass
+
+
+class HashingPool:
+    """
+    Bounded pool of threads running password key derivations.
+
+    PBKDF2 releases the GIL, so the pool bounds the CPU a worker process spends
+    on hashing while the other requests keep running. At most ``threads`` hashes
+    run at once and ``queue_size`` more may wait; beyond that ``submit`` fails
+    at once instead of queueing. Priority tasks (clients that logged in before)
+    are served first and admitted up to twice the queue size, so they still get
+    through while a flood of unknown clients fills the pool.
+
+    Attributes:
+        threads (int): Number of hashing threads.
+        queue_size (int): Tasks allowed to wait for a thread.
+    """
+
+    def __init__(self, threads: int, queue_size: int):
+        self.threads = threads
+        self.queue_size = queue_size
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._workers = []
+
+    def submit(self, func, *args, priority: bool = False) -> Future:
+        """
+        Raises:
+            HashingPoolFull: If the pool cannot take the task.
+        """
+        limit = self.threads + self.queue_size * (2 if priority else 1)
+        with self._lock:
+            if self._pending >= limit:
+                raise HashingPoolFull()
+            self._pending += 1
+            if len(self._workers) < self.threads:
+                worker = threading.Thread(
+                    target=self._work, name="password-hashing", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+        future = Future()
+        # The caller's context carries the request timing into the thread.
+        context = contextvars.copy_context()
+        task = (0 if priority else 1, next(self._order), future, context, func, args)
+        self._queue.put(task)
+        return future
+
+    def _work(self):
+        while True:
+            _, _, future, context, func, args = self._queue.get()
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(context.run(func, *args))
+                    except BaseException as exc:  # pylint: disable=broad-except
+                        future.set_exception(exc)
+            finally:
+                with self._lock:
+                    self._pending -= 1
+
+    def run(self, func, *args, priority: bool = False, timeout: float = None):
+        """
+        Run ``func`` on the pool and wait for its result.
+
+        Raises:
+            HashingPoolFull: If the pool is full or the task did not start within
+                ``timeout`` seconds.
+        """
+        future = self.submit(func, *args, priority=priority)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise HashingPoolFull() from None
+            return future.result()
+
+
+_pool: Optional[HashingPool] = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool() -> HashingPool:
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    getattr(settings, "LOGIN_HASH_THREADS", 1),
+                    getattr(settings, "LOGIN_HASH_QUEUE_SIZE", 2),
+                )
+    return _pool
+
+
+def _reset_pool():
+    # Threads do not survive a fork, the child starts its own pool.
+    global _pool, _pool_lock  # pylint: disable=global-statement
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool)
+
+
+def _window(name: str) -> Optional[SlidingWindow]:
+    rate = getattr(settings, name, None)
+    return SlidingWindow(name.lower(), *rate) if rate else None
+
+
+def client_ip(request) -> str:
+    """
+    Client address, honouring ``REST_FRAMEWORK["NUM_PROXIES"]`` like DRF throttles.
+    """
+    return BaseThrottle().get_ident(request)
+
+
+def _verify(password: str, encoded: str):
+    # Runs on the pool: no database access, the hash upgrade is left to the caller.
+    upgrade = []
+    valid = check_password(password, encoded, setter=upgrade.append)
+    return valid, bool(upgrade)
+
+
+def _reject(reason: str, wait: Optional[int], detail: str):
+    count_login_rejection(reason)
+    raise Throttled(wait=wait, detail=detail)
+
+
+def _hash(func, *args, priority: bool = False):
+    """
+    Run a key derivation on the pool, never on the request thread.
+
+    Raises:
+        Throttled: If the pool is full.
+    """
+    timeout = getattr(settings, "LOGIN_HASH_TIMEOUT", 10)
+    try:
+        return hashing_pool().run(func, *args, priority=priority, timeout=timeout)
+    except HashingPoolFull:
+        _reject("pool", 1, "Too many logins in progress, try again shortly.")
+
+
+def _check_throttles(ip_ident: str, account: str, trusted_key: str, now: float) -> bool:
+    """
+    Apply the login throttles, counting the attempt against the client address.
+
+    Returns:
+        bool: Whether the account logged in from this address before.
+
+    Raises:
+        Throttled: If a throttle is exceeded.
+    """
+    ip_window = _window("LOGIN_THROTTLE_IP")
+    account_window = _window("LOGIN_THROTTLE_ACCOUNT")
+    keys = [trusted_key]
+    if ip_window:
+        keys += ip_window.keys(ip_ident, now)
+    if account_window:
+        keys += account_window.keys(account, now)
+    values = cache.get_many(keys)
+    if ip_window:
+        wait = ip_window.wait(values, ip_ident, now)
+        if wait is not None:
+            _reject("ip", wait, "Too many login attempts from this address.")
+        ip_window.hit(ip_ident, now)
+    trusted = trusted_key in values
+    # Failures from elsewhere must not lock the owner out from a known address.
+    if account_window and not trusted:
+        wait = account_window.wait(values, account, now)
+        if wait is not None:
+            _reject("account", wait, "Too many failed login attempts for this account.")
+    return trusted
+
+
+def authenticate_login(request, username: str, password: str) -> Optional[User]:
+    """
+    Check login credentials behind throttles, hashing on the bounded pool.
+
+    ``settings.LOGIN_THROTTLE_IP`` limits the attempts per client address and
+    ``settings.LOGIN_THROTTLE_ACCOUNT`` the failed attempts per account, both as
+    ``(attempts, seconds)`` sliding windows in the shared cache. A single
+    ``get_many`` reads them along with the trusted client marker, set once an
+    account logged in from an address: those logins skip the account throttle
+    and get priority on the pool.
+    Unknown usernames are hashed as well, so they take as long as wrong
+    passwords.
+
+    Returns:
+        User or None: The user, None when the credentials are not valid.
+
+    Raises:
+        Throttled: If a throttle is exceeded or the hashing pool is full.
+    """
+    # The Django request, when given a DRF one.
+    request = getattr(request, "_request", request)
+    ip = client_ip(request) if request is not None else ""
+    account = cache_ident(username.lower())
+    ip_ident = cache_ident(ip)
+    trusted_key = f"{TRUSTED_CLIENT_PREFIX}:{cache_ident(username.lower(), ip)}"
+    now = time.time()
+    trusted = _check_throttles(ip_ident, account, trusted_key, now)
+
+    user = User._default_manager.filter(**{User.USERNAME_FIELD: username}).first()
+    encoded = user.password if user is not None else None
+    if encoded:
+        valid, upgrade = _hash(_verify, password, encoded, priority=trusted)
+    else:
+        _hash(make_password, password)
+        valid = upgrade = False
+
+    if valid and user.is_active:
+        if upgrade:
+            # Same password, new hash: set_password would bump auth_version and
+            # revoke the tokens of every user logging in with a legacy hash.
+            user.password = _hash(make_password, password, priority=True)
+            User._default_manager.filter(pk=user.pk).update(password=user.password)
+        cache.set(
+            trusted_key,
+            True,
+            getattr(settings, "LOGIN_TRUSTED_CLIENT_TIMEOUT", 60 * 60 * 24 * 30),
+        )
+        return user
+    account_window = _window("LOGIN_THROTTLE_ACCOUNT")
+    if account_window:
+        account_window.hit(account, now)
+    user_login_failed.send(
+        sender=__name__, credentials={"username": username}, request=request
+    )
+    return None
@@ -0,0 +1,467 @@
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows.
+    fcntl = None
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Metric(NamedTuple):
+    name: str
+    kind: str
+    help: str
+    buckets: Tuple[float, ...] = ()
+
+
+REQUEST_DURATION = Metric(
+    "portalapi_request_duration_seconds",
+    "histogram",
+    "Request latency by view action.",
+    LATENCY_BUCKETS,
+)
+REQUESTS = Metric(
+    "portalapi_requests_total", "counter", "Requests by view action and status."
+)
+DB_QUERIES = Metric(
+    "portalapi_db_queries_total", "counter", "Database queries by view action."
+)
+DB_DURATION = Metric(
+    "portalapi_db_query_seconds_total",
+    "counter",
+    "Time spent executing database queries by view action.",
+)
+CACHE_LOOKUPS = Metric(
+    "portalapi_cache_lookups_total", "counter", "Cache lookups by cache and result."
+)
+LOGIN_REJECTIONS = Metric(
+    "portalapi_login_rejections_total",
+    "counter",
+    "Logins rejected with 429 by throttle or full hashing pool.",
+)
+PASSWORD_HASH_DURATION = Metric(
+    "portalapi_password_hash_duration_seconds",
+    "histogram",
+    "Time spent deriving password hashes.",
+    HASH_BUCKETS,
+)
+METRICS = {
+    metric.name: metric
+    for metric in (
+        REQUEST_DURATION,
+        REQUESTS,
+        DB_QUERIES,
+        DB_DURATION,
+        CACHE_LOOKUPS,
+        LOGIN_REJECTIONS,
+        PASSWORD_HASH_DURATION,
+    )
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_HEADER = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+
+
+@lru_cache(maxsize=4096)
+def sample_key(name: str, labels: Labels) -> str:
+    return json.dumps([name, dict(labels)], separators=(",", ":"))
+
+
+class ValueFile:
+    """
+    Float values keyed by sample, in a memory-mapped file written by one process.
+
+    Entries are appended as ``<length><key><value>`` aligned on 8 bytes and the
+    used size in the header is only updated once an entry is complete, so other
+    processes can read the file at any time without a lock. Without a ``path``
+    the values live in anonymous memory, visible to this process only.
+    """
+
+    def __init__(self, path: Optional[str] = None, size: int = 1 << 16):
+        self.path = path
+        self._file = None
+        if path is None:
+            self._map = mmap.mmap(-1, size)
+        else:
+            # pylint: disable=consider-using-with
+            self._file = open(path, "a+b")
+            size = max(size, os.fstat(self._file.fileno()).st_size)
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self.used = _HEADER.unpack_from(self._map)[0] or _HEADER.size
+        # Value index in ``_doubles`` by sample key.
+        self.positions = {
+            key: offset // _VALUE.size for key, offset, _ in _entries(self._map)
+        }
+        self._doubles = memoryview(self._map).cast("d")
+        self.lock = threading.Lock()
+
+    def _append(self, key: str) -> int:
+        encoded = key.encode()
+        value_offset = _align(self.used + _LENGTH.size + len(encoded))
+        end = value_offset + _VALUE.size
+        if end > len(self._map):
+            self._grow(end)
+        _LENGTH.pack_into(self._map, self.used, len(encoded))
+        start = self.used + _LENGTH.size
+        end_of_key = start + len(encoded)
+        self._map[start:end_of_key] = encoded
+        _VALUE.pack_into(self._map, value_offset, 0.0)
+        self.used = end
+        _HEADER.pack_into(self._map, 0, end)
+        index = self.positions[key] = value_offset // _VALUE.size
+        return index
+
+    def _grow(self, needed: int):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._doubles.release()
+        if self._file is None:
+            grown = mmap.mmap(-1, size)
+            grown[: len(self._map)] = self._map
+            self._map.close()
+            self._map = grown
+        else:
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self._doubles = memoryview(self._map).cast("d")
+
+    def inc(self, updates: Iterable[Tuple[str, float]]):
+        """
+        Add to values, the caller holds ``lock``.
+        """
+        doubles = self._doubles
+        for key, amount in updates:
+            index = self.positions.get(key)
+            if index is None:
+                index = self._append(key)
+                doubles = self._doubles
+            doubles[index] += amount
+
+    def items(self) -> Iterator[Tuple[str, float]]:
+        for key, _, value in _entries(self._map):
+            yield key, value
+
+    def close(self):
+        self._doubles.release()
+        self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _entries(data) -> Iterator[Tuple[str, int, float]]:
+    used = _HEADER.unpack_from(data)[0]
+    offset = _HEADER.size
+    while offset < used:
+        (length,) = _LENGTH.unpack_from(data, offset)
+        start = offset + _LENGTH.size
+        end = start + length
+        key = bytes(data[start:end]).decode()
+        value_offset = _align(end)
+        yield key, value_offset, _VALUE.unpack_from(data, value_offset)[0]
+        offset = value_offset + _VALUE.size
+
+
+def read_values(path: str) -> Iterator[Tuple[str, float]]:
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if len(data) >= _HEADER.size:
+        for key, _, value in _entries(data):
+            yield key, value
+
+
+_directory: Optional[str] = None
+_values: Optional[ValueFile] = None
+_values_pid: Optional[int] = None
+_values_lock = threading.Lock()
+
+
+def metrics_directory() -> Optional[str]:
+    """
+    Directory shared by the worker processes, each writing its own value file.
+
+    Without one (``settings.METRICS_DIR`` unset and ``use_directory`` not called)
+    the metrics cover the current process only.
+    """
+    return _directory or getattr(settings, "METRICS_DIR", None)
+
+
+def use_directory(directory: str, clear: bool = True):
+    """
+    Share the metrics of the processes forked from now on through ``directory``.
+
+    Called by the ``serve`` command in the master process; ``clear`` drops the
+    values left by a previous run.
+    """
+    global _directory, _values, _values_pid  # pylint: disable=global-statement
+    os.makedirs(directory, exist_ok=True)
+    if clear:
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.unlink(path)
+    with _values_lock:
+        _directory = directory
+        _values = _values_pid = None
+
+
+def process_values() -> ValueFile:
+    """
+    Value file of the current process, a new one after a fork.
+    """
+    global _values, _values_pid  # pylint: disable=global-statement
+    pid = os.getpid()
+    if _values_pid != pid:
+        with _values_lock:
+            if _values_pid != pid:
+                directory = metrics_directory()
+                path = directory and os.path.join(directory, f"values_{pid}.db")
+                _values = ValueFile(path)
+                _values_pid = pid
+    return _values
+
+
+def _bucket(metric: Metric, value: float) -> str:
+    # Buckets are stored per interval and made cumulative when collected.
+    index = bisect_left(metric.buckets, value)
+    return str(metric.buckets[index]) if index < len(metric.buckets) else "+Inf"
+
+
+def _histogram_keys(metric: Metric, labels: Labels, bucket: str) -> Tuple[str, ...]:
+    return (
+        sample_key(f"{metric.name}_bucket", labels + (("le", bucket),)),
+        sample_key(f"{metric.name}_sum", labels),
+        sample_key(f"{metric.name}_count", labels),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _request_keys(view: str, method: str, status: int, bucket: str):
+    labels = (("view", view),)
+    return (
+        *_histogram_keys(REQUEST_DURATION, labels, bucket),
+        sample_key(
+            REQUESTS.name, labels + (("method", method), ("status", str(status)))
+        ),
+        sample_key(DB_QUERIES.name, labels),
+        sample_key(DB_DURATION.name, labels),
+    )
+
+
+def observe_request(
+    view: str, method: str, status: int, seconds: float, queries: int, db: float
+):
+    keys = _request_keys(view, method, status, _bucket(REQUEST_DURATION, seconds))
+    values = process_values()
+    with values.lock:
+        values.inc(zip(keys, (1.0, seconds, 1.0, 1.0, queries, db)))
+
+
+def observe_password_hash(seconds: float):
+    keys = _histogram_keys(
+        PASSWORD_HASH_DURATION, (), _bucket(PASSWORD_HASH_DURATION, seconds)
+    )
+    values = process_values()
+    with values.lock:
+        values.inc(zip(keys, (1.0, seconds, 1.0)))
+
+
+@lru_cache(maxsize=256)
+def _cache_key(name: str, hit: bool) -> str:
+    return sample_key(
+        CACHE_LOOKUPS.name, (("cache", name), ("result", "hit" if hit else "miss"))
+    )
+
+
+def count_cache_lookup(name: str, hit: bool):
+    key = _cache_key(name, hit)
+    values = process_values()
+    with values.lock:
+        values.inc(((key, 1.0),))
+
+
+def count_login_rejection(reason: str):
+    key = sample_key(LOGIN_REJECTIONS.name, (("reason", reason),))
+    values = process_values()
+    with values.lock:
+        values.inc(((key, 1.0),))
+
+
+def view_label(request) -> str:
+    """
+    ``<View>.<action>`` of the view that handled the request, e.g.
+    ``AuthViewSet.login``.
+    """
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    view_class = getattr(match.func, "cls", None) or getattr(
+        match.func, "view_class", None
+    )
+    if view_class is None:
+        return match.view_name or f"{match.func.__module__}.{match.func.__name__}"
+    method = request.method.lower()
+    actions = getattr(match.func, "actions", None) or {}
+    if method == "head" and "head" not in actions:
+        method = "get"
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _compact(directory: str, paths):
+    """
+    Merge the value files of exited processes (e.g. workers recycled after
+    ``--max-requests``) into ``archive.db``, so the directory does not grow.
+    """
+    dead = []
+    for path in paths:
+        pid = os.path.splitext(os.path.basename(path))[0].rpartition("_")[2]
+        if pid.isdigit() and not _alive(int(pid)):
+            dead.append(path)
+    if not dead:
+        return
+    archive_path = os.path.join(directory, "archive.db")
+    totals: Dict[str, float] = defaultdict(float)
+    for path in [archive_path, *dead]:
+        if os.path.exists(path):
+            for key, value in read_values(path):
+                totals[key] += value
+    staging_path = os.path.join(directory, "archive.tmp")
+    if os.path.exists(staging_path):
+        os.unlink(staging_path)
+    staging = ValueFile(staging_path)
+    staging.inc(totals.items())
+    staging.close()
+    os.replace(staging_path, archive_path)
+    for path in dead:
+        os.unlink(path)
+
+
+def collect() -> Dict[str, float]:
+    """
+    Sum the values of every process sharing the metrics directory.
+
+    Only the collecting processes synchronize (on a lock file), the request path
+    never waits on them.
+    """
+    directory = metrics_directory()
+    totals: Dict[str, float] = defaultdict(float)
+    if directory is None:
+        values = process_values()
+        with values.lock:
+            items = list(values.items())
+        for key, value in items:
+            totals[key] += value
+        return totals
+    process_values()
+    with open(os.path.join(directory, "collect.lock"), "a", encoding="utf-8") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            _compact(directory, glob.glob(os.path.join(directory, "values_*.db")))
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            for key, value in read_values(path):
+                totals[key] += value
+    return totals
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_sample(name: str, labels: dict, value: float) -> str:
+    if labels:
+        pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+        name = f"{name}{{{pairs}}}"
+    return f"{name} {value!r}"
+
+
+def render_metrics() -> str:
+    """
+    Render the collected metrics in the Prometheus text exposition format.
+    """
+    samples = defaultdict(list)
+    for key, value in collect().items():
+        name, labels = json.loads(key)
+        samples[name].append((labels, value))
+    lines = []
+    for metric in METRICS.values():
+        if metric.kind == "histogram":
+            series = _render_histogram(metric, samples)
+        else:
+            series = [
+                _format_sample(metric.name, labels, value)
+                for labels, value in sorted(
+                    samples[metric.name], key=lambda sample: list(sample[0].items())
+                )
+            ]
+        if series:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(series)
+    return "\n".join(lines) + "\n"
+
+
+def _render_histogram(metric: Metric, samples) -> list:
+    buckets = defaultdict(dict)
+    for labels, value in samples[f"{metric.name}_bucket"]:
+        le = labels.pop("le")
+        buckets[tuple(sorted(labels.items()))][le] = value
+    sums = {
+        tuple(sorted(labels.items())): value
+        for labels, value in samples[f"{metric.name}_sum"]
+    }
+    counts = {
+        tuple(sorted(labels.items())): value
+        for labels, value in samples[f"{metric.name}_count"]
+    }
+    lines = []
+    for labels in sorted(counts):
+        cumulative = 0.0
+        observed = buckets[labels]
+        for bucket in [*map(str, metric.buckets), "+Inf"]:
+            cumulative += observed.get(bucket, 0.0)
+            lines.append(
+                _format_sample(
+                    f"{metric.name}_bucket",
+                    {**dict(labels), "le": bucket},
+                    cumulative,
+                )
+            )
+        lines.append(
+            _format_sample(f"{metric.name}_sum", dict(labels), sums.get(labels, 0.0))
+        )
+        lines.append(
+            _format_sample(f"{metric.name}_count", dict(labels), counts[labels])
+        )
+    return lines
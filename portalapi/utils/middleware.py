@@ -0,0 +1,31 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from djangorestframework_camel_case.settings import api_settings as camel_settings
+
+from portalapi.utils.camel_case import underscoreize
+
+
+class CamelCaseMiddleware:
+    """
+    Converts camelCase query parameters to snake_case with memoized keys.
+
+    The middleware is sync and async capable, so it does not force a thread hop in
+    front of async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.GET = underscoreize(request.GET, **camel_settings.JSON_UNDERSCOREIZE)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.GET = underscoreize(request.GET, **camel_settings.JSON_UNDERSCOREIZE)
+        return await self.get_response(request)
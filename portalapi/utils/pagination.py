@@ -0,0 +1,179 @@
+import heapq
+from itertools import islice
+from operator import attrgetter
+from typing import List
+
+from django.core import signing
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    _positive_int,
+    _reverse_ordering,
+)
+from rest_framework.utils.urls import replace_query_param
+
+from portalapi.utils.constants import MAX_PAGE_SIZE
+
+
+class PartitionedQuerySet:
+    """
+    Querysets paginated as one, e.g. a search split per indexed key.
+
+    Each part is paged with its own range predicate and limit, so it is read from
+    a single index range in the cursor ordering; the page is merged from the
+    parts. Parts must not share rows.
+
+    Attributes:
+        parts (list): The querysets.
+    """
+
+    def __init__(self, parts):
+        self.parts = list(parts)
+
+    def order_by(self, *ordering):
+        return PartitionedQuerySet(part.order_by(*ordering) for part in self.parts)
+
+    def filter(self, **lookups):
+        return PartitionedQuerySet(part.filter(**lookups) for part in self.parts)
+
+    def __getitem__(self, page):
+        # Every part is read from its start: the offset applies to the merge.
+        return PartitionedQuerySet(part[: page.stop] for part in self.parts)
+
+
+class SignedCursorPagination(CursorPagination):
+    """
+    Project wide keyset pagination with opaque, signed cursors.
+
+    Pages are selected with a range predicate on the ordering column instead of an
+    OFFSET, so a deep page costs the same index range scan as the first one. The
+    default ordering is the time ordered primary key (newest first); views can pick
+    another stable indexed ordering (e.g. ``"-modified_date"``) through
+    ``cursor_ordering``.
+
+    Cursors are signed with the project ``SECRET_KEY`` and bound to the ordering
+    they were issued for, so clients cannot forge positions or replay a cursor
+    against a different ordering; such cursors are rejected with a 400.
+
+    ``paginate_queryset`` is split into building the page query and consuming its
+    rows, so async views can fetch the page with ``apaginate_queryset``. A
+    ``PartitionedQuerySet`` is paged part by part and merged.
+    """
+
+    ordering = "-pk"
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+    cursor_salt = "portalapi.pagination.cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        if isinstance(queryset, PartitionedQuerySet):
+            return self.set_page(self.merge([list(part) for part in queryset.parts]))
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        if isinstance(queryset, PartitionedQuerySet):
+            parts = [[item async for item in part] for part in queryset.parts]
+            return self.set_page(self.merge(parts))
+        return self.set_page([item async for item in queryset])
+
+    def merge(self, parts: List[list]) -> list:
+        """
+        Merge the rows of the parts of a page, each in the page ordering.
+        """
+        offset, reverse, _ = self.cursor or (0, False, None)
+        order = self.ordering[0]
+        rows = heapq.merge(
+            *parts,
+            key=attrgetter(order.lstrip("-")),
+            reverse=reverse != order.startswith("-"),
+        )
+        return list(islice(rows, offset, offset + self.page_size + 1))
+
+    def get_page_queryset(self, queryset, request, view=None):
+        """
+        Return the (unevaluated) query fetching the requested page plus one row.
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, position = self.cursor or (0, False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            order = self.ordering[0]
+            lookup = "lt" if reverse != order.startswith("-") else "gt"
+            queryset = queryset.filter(**{f"{order.lstrip('-')}__{lookup}": position})
+        limit = offset + self.page_size + 1
+        return queryset[offset:limit]
+
+    def set_page(self, results):
+        """
+        Build the page and the next/previous positions from the fetched rows.
+        """
+        offset, reverse, position = self.cursor or (0, False, None)
+        self.page = list(results[: self.page_size])
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None or offset > 0
+            self.has_previous = following is not None
+            self.next_position, self.previous_position = position, following
+        else:
+            self.has_next = following is not None
+            self.has_previous = position is not None or offset > 0
+            self.next_position, self.previous_position = following, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", None)
+        if ordering is not None:
+            return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            tokens = signing.loads(encoded, salt=self.cursor_salt)
+            if tokens.get("s") != list(self.ordering):
+                raise ValueError("Cursor issued for another ordering.")
+            offset = _positive_int(tokens.get("o", 0), cutoff=self.offset_cutoff)
+            return Cursor(
+                offset=offset,
+                reverse=bool(tokens.get("r")),
+                position=tokens.get("p"),
+            )
+        except (signing.BadSignature, AttributeError, TypeError, ValueError) as exc:
+            raise ValidationError(
+                {self.cursor_query_param: [self.invalid_cursor_message]}
+            ) from exc
+
+    def encode_cursor(self, cursor):
+        tokens = {"s": list(self.ordering)}
+        if cursor.offset:
+            tokens["o"] = cursor.offset
+        if cursor.reverse:
+            tokens["r"] = 1
+        if cursor.position is not None:
+            tokens["p"] = str(cursor.position)
+        encoded = signing.dumps(tokens, salt=self.cursor_salt, compress=True)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
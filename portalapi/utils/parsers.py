@@ -0,0 +1,70 @@
+import json
+
+from django.conf import settings
+from django.http.multipartparser import MultiPartParser as DjangoMultiPartParser
+from django.http.multipartparser import MultiPartParserError
+from djangorestframework_camel_case.settings import api_settings as camel_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import DataAndFiles, FormParser, JSONParser, MultiPartParser
+
+from portalapi.utils.camel_case import underscoreize
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class CamelCaseJSONParser(JSONParser):
+    """
+    JSON parser converting camelCase keys with the memoized ``underscoreize``.
+
+    Bodies are decoded with orjson when it is installed. Documents orjson rejects
+    but ``json`` accepts (NaN, integers above 64 bits) go through ``json`` so the
+    accepted input does not change.
+    """
+
+    json_underscoreize = camel_settings.JSON_UNDERSCOREIZE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        try:
+            data = stream.read().decode(encoding)
+            try:
+                if orjson is None:
+                    raise ValueError
+                parsed = orjson.loads(data)
+            except ValueError:
+                parsed = json.loads(data)
+            return underscoreize(parsed, **self.json_underscoreize)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
+
+
+class CamelCaseFormParser(FormParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        return underscoreize(
+            super().parse(stream, media_type, parser_context),
+            **camel_settings.JSON_UNDERSCOREIZE,
+        )
+
+
+class CamelCaseMultiPartParser(MultiPartParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        request = parser_context["request"]
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        meta = request.META.copy()
+        meta["CONTENT_TYPE"] = media_type
+        try:
+            parser = DjangoMultiPartParser(
+                meta, stream, request.upload_handlers, encoding
+            )
+            data, files = parser.parse()
+        except MultiPartParserError as exc:
+            raise ParseError(f"Multipart form parse error - {exc}") from exc
+        return DataAndFiles(
+            underscoreize(data, **camel_settings.JSON_UNDERSCOREIZE),
+            underscoreize(files, **camel_settings.JSON_UNDERSCOREIZE),
+        )
@@ -0,0 +1,44 @@
+from rest_framework.permissions import BasePermission
+
+from portalapi.utils.rbac import get_role_scopes
+
+
+class HasRoleScope(BasePermission):
+    """
+    Permission enforcing the "entity.action.level" scopes of the user's role.
+
+    Views declare the entity they operate on through ``scope_entity``. The DRF
+    action is mapped to a scope action through ``action_map`` (extendable per view
+    with ``scope_action_map``), and actions listed in ``scope_public_actions`` are
+    open to everyone. Superusers are always allowed.
+
+    The granted levels are stored on ``request.scope_levels`` so views can narrow
+    the data they expose.
+    """
+
+    action_map = {
+        "list": "view",
+        "retrieve": "view",
+        "create": "create",
+        "update": "update",
+        "partial_update": "update",
+        "destroy": "destroy",
+    }
+
+    def has_permission(self, request, view):
+        action = getattr(view, "action", None) or request.method.lower()
+        if action in getattr(view, "scope_public_actions", ()):
+            return True
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        if user.is_superuser:
+            return True
+        if user.role_id is None:
+            return False
+        action_map = {**self.action_map, **getattr(view, "scope_action_map", {})}
+        levels = get_role_scopes(user.role_id).levels(
+            view.scope_entity, action_map.get(action, action)
+        )
+        request.scope_levels = levels
+        return bool(levels)
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from portalapi.models import Scope
+from portalapi.utils.metrics import count_cache_lookup
+
+WILDCARD = "*"
+
+
+class CompiledScopes:
+    """
+    Immutable, precompiled scope set of a role.
+
+    Scopes are folded into a mapping of ``(entity, action)`` to the granted levels.
+    A ``*`` in any part of a scope acts as a wildcard, so a lookup is at most four
+    dict accesses regardless of how many scopes the role has.
+
+    Methods:
+        levels: Returns the levels granted for an entity/action pair.
+        allows: Checks whether an entity/action (and optionally level) is granted.
+    """
+
+    __slots__ = ("_levels",)
+
+    def __init__(self, scopes: Iterable[Tuple[str, str, str]]):
+        levels: Dict[Tuple[str, str], set] = {}
+        for entity, action, level in scopes:
+            key = ((entity or WILDCARD).lower(), (action or WILDCARD).lower())
+            levels.setdefault(key, set()).add((level or WILDCARD).lower())
+        self._levels = {key: frozenset(value) for key, value in levels.items()}
+
+    def __getstate__(self):
+        return self._levels
+
+    def __setstate__(self, state):
+        self._levels = state
+
+    def levels(self, entity: str, action: str) -> FrozenSet[str]:
+        entity, action = entity.lower(), action.lower()
+        granted: FrozenSet[str] = frozenset()
+        for key in (
+            (entity, action),
+            (entity, WILDCARD),
+            (WILDCARD, action),
+            (WILDCARD, WILDCARD),
+        ):
+            found = self._levels.get(key)
+            if found:
+                granted = granted | found
+        return granted
+
+    def allows(self, entity: str, action: str, level: Optional[str] = None) -> bool:
+        levels = self.levels(entity, action)
+        if level is None:
+            return bool(levels)
+        return level.lower() in levels or WILDCARD in levels
+
+
+class _LocalLRU:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local_scopes = _LocalLRU(getattr(settings, "RBAC_LOCAL_CACHE_SIZE", 256))
+
+
+def _version_key(role_id) -> str:
+    return f"rbac:role:{role_id}:version"
+
+
+def _scopes_key(role_id, version) -> str:
+    return f"rbac:role:{role_id}:scopes:{version}"
+
+
+def _role_version(role_id) -> str:
+    key = _version_key(role_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_role_scopes(role_id) -> CompiledScopes:
+    """
+    Return the compiled scopes of a role.
+
+    Lookups go through a process local LRU keyed by the role's version token, then
+    the shared cache, and only hit the database when the role changed. Versions are
+    random tokens rather than counters, so an evicted version can never resurrect a
+    stale local entry.
+    """
+    version = _role_version(role_id)
+    compiled = _local_scopes.get((role_id, version))
+    count_cache_lookup("role_scopes_local", compiled is not None)
+    if compiled is not None:
+        return compiled
+    key = _scopes_key(role_id, version)
+    compiled = cache.get(key)
+    count_cache_lookup("role_scopes", compiled is not None)
+    if compiled is None:
+        compiled = CompiledScopes(
+            Scope.objects.filter(role=role_id).values_list("entity", "action", "level")
+        )
+        cache.set(key, compiled, timeout=getattr(settings, "RBAC_CACHE_TIMEOUT", 3600))
+    _local_scopes.set((role_id, version), compiled)
+    return compiled
+
+
+def invalidate_role_scopes(*role_ids):
+    cache.set_many({_version_key(role_id): uuid4().hex for role_id in role_ids}, None)
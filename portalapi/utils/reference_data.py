@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, List, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from portalapi.models import BloodType, ReferenceData, Role, Scope
+from portalapi.utils.catalogue import bump_catalogue_version
+from portalapi.utils.compatibility import sync_compatibility_edges
+from portalapi.utils.constants import DEFAULT_BLOOD_DATA, DEFAULT_ROLES, DEFAULT_SCOPES
+
+logger = logging.getLogger(__name__)
+
+
+def fixture_checksum(data) -> str:
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+def seed_blood_types(using: str):
+    """
+    Upsert the default blood types by name with a single ``bulk_create``.
+
+    ``save`` and its signals are bypassed, so the compatibility edges are rebuilt
+    and the catalogue version is bumped here.
+    """
+    blood_types = []
+    for data in DEFAULT_BLOOD_DATA:
+        blood_type = BloodType(**data)
+        blood_type.compatible_with = ", ".join(blood_type.compatible_types())
+        blood_types.append(blood_type)
+    BloodType.objects.using(using).bulk_create(
+        blood_types,
+        update_conflicts=True,
+        unique_fields=["blood_type"],
+        update_fields=["compatible_with"],
+    )
+    sync_compatibility_edges(using)
+    transaction.on_commit(bump_catalogue_version, using=using)
+
+
+def seed_scopes(using: str):
+    existing = set(
+        Scope.objects.using(using)
+        .filter(scope__in=DEFAULT_SCOPES)
+        .values_list("scope", flat=True)
+    )
+    scopes = []
+    for scope in DEFAULT_SCOPES:
+        if scope not in existing:
+            entity, action, level = scope.split(".")
+            scopes.append(Scope(entity=entity, action=action, level=level, scope=scope))
+    Scope.objects.using(using).bulk_create(scopes)
+
+
+def seed_roles(using: str):
+    """
+    Create the default roles missing by name and grant them their scopes.
+
+    Scopes granted to a role by an administrator are kept.
+    """
+    # Neither column is unique, the first (oldest) row of a name wins.
+    scopes = {}
+    for scope in (
+        Scope.objects.using(using)
+        .filter(scope__in={scope for role in DEFAULT_ROLES for scope in role["scopes"]})
+        .order_by("-id")
+    ):
+        scopes[scope.scope] = scope
+    roles = {}
+    for role in (
+        Role.objects.using(using)
+        .filter(name__in=[role["name"] for role in DEFAULT_ROLES])
+        .order_by("-id")
+    ):
+        roles[role.name] = role
+    for data in DEFAULT_ROLES:
+        role = roles.get(data["name"])
+        if role is None:
+            role = Role.objects.using(using).create(
+                name=data["name"], is_public_role=data["is_public_role"]
+            )
+        # ``add`` skips the existing links and fires the cache invalidation.
+        role.scopes.add(*(scopes[scope] for scope in data["scopes"]))
+
+
+# Applied in order; roles reference the seeded scopes.
+REFERENCE_DATA: Dict[str, Tuple[object, Callable[[str], None]]] = {
+    "blood_types": (DEFAULT_BLOOD_DATA, seed_blood_types),
+    "scopes": (DEFAULT_SCOPES, seed_scopes),
+    "roles": (DEFAULT_ROLES, seed_roles),
+}
+
+
+def seed_reference_data(
+    using: str = DEFAULT_DB_ALIAS, force: bool = False
+) -> List[str]:
+    """
+    Apply the reference data fixtures whose checksum differs from the stored one.
+
+    When everything is up to date this costs a single query, which keeps it cheap
+    on every ``migrate`` and test database setup. Returns the names of the data
+    sets applied.
+    """
+    stored = dict(ReferenceData.objects.using(using).values_list("name", "checksum"))
+    applied = []
+    for name, (fixture, seed) in REFERENCE_DATA.items():
+        checksum = fixture_checksum(fixture)
+        if not force and stored.get(name) == checksum:
+            continue
+        with transaction.atomic(using=using):
+            seed(using)
+            ReferenceData.objects.using(using).update_or_create(
+                name=name, defaults={"checksum": checksum}
+            )
+        applied.append(name)
+        logger.info("Applied %s reference data", name)
+    return applied
@@ -0,0 +1,66 @@
+from djangorestframework_camel_case.settings import api_settings as camel_settings
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from portalapi.utils.camel_case import UnsafeFloat, camelize
+from portalapi.utils.instrumentation import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class CamelCaseJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement of ``djangorestframework_camel_case``'s JSON renderer.
+
+    Keys are converted through the memoized ``camelize`` and the result is encoded
+    with orjson when it is installed. The output is byte for byte the one of DRF's
+    ``JSONRenderer``: payloads orjson would format differently (floats written
+    with an exponent, NaN, integers above 64 bits, ...) and indented output fall
+    back to the standard encoder.
+    """
+
+    json_underscoreize = camel_settings.JSON_UNDERSCOREIZE
+
+    @timed("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        fast = (
+            orjson is not None
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {}) is None
+        )
+        if fast:
+            try:
+                content = orjson.dumps(
+                    camelize(data, check_floats=True, **self.json_underscoreize),
+                    default=self.encoder_class().default,
+                    option=orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_PASSTHROUGH_DATACLASS,
+                )
+            except (UnsafeFloat, orjson.JSONEncodeError):
+                pass
+            else:
+                # Same escaping as DRF, keeping the output a strict JS subset.
+                return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+                    b"\xe2\x80\xa9", b"\\u2029"
+                )
+        return super().render(
+            camelize(data, **self.json_underscoreize),
+            accepted_media_type,
+            renderer_context,
+        )
+
+
+class CamelCaseBrowsableAPIRenderer(BrowsableAPIRenderer):
+    @timed("render")
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(
+            camelize(data, **camel_settings.JSON_UNDERSCOREIZE),
+            accepted_media_type,
+            renderer_context,
+        )
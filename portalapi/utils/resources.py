@@ -1,8 +1,21 @@
 from import_export import resources
 
 from portalapi.models import BloodType
+from portalapi.utils.catalogue import bump_catalogue_version
+from portalapi.utils.compatibility import sync_compatibility_edges
 
 
 class BloodTypeResource(resources.ModelResource):
     class Meta:
         model = BloodType
+        exclude = ("donates_to",)
+
+    def after_import(self, dataset, result, **kwargs):
+        """
+        Rebuild the compatibility relation and publish a new catalogue version once
+        per import, also covering rows written without model signals (bulk mode).
+        """
+        super().after_import(dataset, result, **kwargs)
+        if not kwargs.get("dry_run"):
+            sync_compatibility_edges()
+            bump_catalogue_version()
@@ -0,0 +1,273 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from portalapi.models import RevokedToken
+from portalapi.utils.metrics import count_cache_lookup
+
+# Claim shared by a refresh token and the access tokens derived from it.
+SESSION_CLAIM = "sid"
+
+REVOCATION_VERSION_KEY = "auth:revoked:version"
+
+# Rows revoked this long before a sync may not have been committed at the time.
+SYNC_OVERLAP = timedelta(minutes=1)
+
+
+class BloomFilter:
+    """
+    Set of strings in a fixed bit array: membership tests have no false negatives
+    and about ``error_rate`` false positives while ``capacity`` items are stored.
+
+    Attributes:
+        size (int): Number of bits.
+        hashes (int): Bits set per item.
+        count (int): Items added.
+    """
+
+    __slots__ = ("size", "hashes", "count", "_bits")
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        # Odd, so the positions do not repeat when the size is even.
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(
+            bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class RevocationFilter:
+    """
+    Bloom filter of the unexpired ``RevokedToken`` ids, local to the process.
+
+    It is synchronized when the revocation version in the shared cache changes,
+    reading only the rows revoked since the previous sync. It is rebuilt from the
+    table, dropping the expired ids, once it holds
+    ``settings.REVOKED_TOKENS_FILTER_CAPACITY`` ids or is older than a refresh
+    token lifetime.
+
+    Attributes:
+        version (str): The revocation version the filter is synchronized with.
+        bloom (BloomFilter): The revoked ids.
+    """
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.bloom: Optional[BloomFilter] = None
+        self._built_at: Optional[datetime] = None
+        self._synced_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def sync(self, version: str):
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            now = timezone.now()
+            capacity = getattr(settings, "REVOKED_TOKENS_FILTER_CAPACITY", 100_000)
+            rows = RevokedToken.objects.filter(expires_at__gt=now)
+            if (
+                self.bloom is None
+                or self.bloom.count >= capacity
+                or now - self._built_at >= api_settings.REFRESH_TOKEN_LIFETIME
+            ):
+                revoked_ids = list(rows.values_list("jti", flat=True))
+                bloom = BloomFilter(
+                    max(capacity, 2 * len(revoked_ids)),
+                    getattr(settings, "REVOKED_TOKENS_FILTER_ERROR_RATE", 0.001),
+                )
+                for revoked_id in revoked_ids:
+                    bloom.add(revoked_id)
+                self.bloom = bloom
+                self._built_at = now
+            else:
+                for revoked_id in rows.filter(
+                    revoked_at__gte=self._synced_at - SYNC_OVERLAP
+                ).values_list("jti", flat=True):
+                    self.bloom.add(revoked_id)
+            self._synced_at = now
+            self.version = version
+
+    def add(self, revoked_id: str):
+        if self.bloom is not None:
+            self.bloom.add(revoked_id)
+
+
+_revocations = RevocationFilter()
+
+
+def get_revocation_version() -> str:
+    """
+    Return the revocation version shared by all worker processes, a random
+    token replaced after every revocation.
+    """
+    version = cache.get(REVOCATION_VERSION_KEY)
+    if version is None:
+        cache.add(REVOCATION_VERSION_KEY, uuid4().hex, None)
+        version = cache.get(REVOCATION_VERSION_KEY)
+    return version
+
+
+async def aget_revocation_version() -> str:
+    version = await cache.aget(REVOCATION_VERSION_KEY)
+    if version is None:
+        await cache.aadd(REVOCATION_VERSION_KEY, uuid4().hex, None)
+        version = await cache.aget(REVOCATION_VERSION_KEY)
+    return version
+
+
+def bump_revocation_version():
+    cache.set(REVOCATION_VERSION_KEY, uuid4().hex, None)
+
+
+def _revoked_key(revoked_id: str) -> str:
+    return f"auth:revoked:{revoked_id}"
+
+
+def _candidate_keys(token) -> Dict[str, str]:
+    # Cache keys of the token's ids the filter does not rule out.
+    bloom = _revocations.bloom
+    return {
+        _revoked_key(revoked_id): revoked_id
+        for revoked_id in (token.get(SESSION_CLAIM), token.get(api_settings.JTI_CLAIM))
+        if revoked_id and revoked_id in bloom
+    }
+
+
+def _cache_timeout(token) -> int:
+    return max(1, int(token.get("exp", 0) - time.time()))
+
+
+def is_token_revoked(token) -> bool:
+    """
+    Check whether a token, or the session it belongs to, was revoked.
+
+    The process' ``RevocationFilter`` answers for tokens that were not revoked,
+    after one cache read of the revocation version. The others are looked up in
+    the cache, then in the ``RevokedToken`` table.
+    """
+    _revocations.sync(get_revocation_version())
+    keys = _candidate_keys(token)
+    if not keys:
+        return False
+    cached = cache.get_many(keys)
+    count_cache_lookup("revoked_token", len(cached) == len(keys))
+    if any(cached.values()):
+        return True
+    missing = [revoked_id for key, revoked_id in keys.items() if key not in cached]
+    if not missing:
+        return False
+    revoked = set(
+        RevokedToken.objects.filter(jti__in=missing).values_list("jti", flat=True)
+    )
+    cache.set_many(
+        {_revoked_key(revoked_id): revoked_id in revoked for revoked_id in missing},
+        _cache_timeout(token),
+    )
+    return bool(revoked)
+
+
+async def ais_token_revoked(token) -> bool:
+    """
+    ``is_token_revoked`` for async views; only a filter sync leaves the event
+    loop.
+    """
+    version = await aget_revocation_version()
+    if version != _revocations.version:
+        await sync_to_async(_revocations.sync)(version)
+    keys = _candidate_keys(token)
+    if not keys:
+        return False
+    cached = await cache.aget_many(keys)
+    count_cache_lookup("revoked_token", len(cached) == len(keys))
+    if any(cached.values()):
+        return True
+    missing = [revoked_id for key, revoked_id in keys.items() if key not in cached]
+    if not missing:
+        return False
+    revoked = {
+        revoked_id
+        async for revoked_id in RevokedToken.objects.filter(
+            jti__in=missing
+        ).values_list("jti", flat=True)
+    }
+    await cache.aset_many(
+        {_revoked_key(revoked_id): revoked_id in revoked for revoked_id in missing},
+        _cache_timeout(token),
+    )
+    return bool(revoked)
+
+
+def revoke_token(token, session: bool = True):
+    """
+    Revoke a token until it expires.
+
+    With ``session``, every token sharing its ``sid`` claim is revoked: the
+    refresh token issued at login and the access tokens derived from it. Tokens
+    issued before the claim existed are revoked on their own.
+    """
+    session_id = token.get(SESSION_CLAIM) if session else None
+    if session_id:
+        # Access tokens derived from the session outlive its refresh token.
+        revoked_id = session_id
+        expires_at = timezone.now() + max(
+            api_settings.ACCESS_TOKEN_LIFETIME, api_settings.REFRESH_TOKEN_LIFETIME
+        )
+    else:
+        revoked_id = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], dt_timezone.utc)
+    RevokedToken.objects.get_or_create(
+        jti=revoked_id, defaults={"expires_at": expires_at}
+    )
+    # A false positive at worst if the transaction rolls back.
+    _revocations.add(revoked_id)
+    timeout = max(1, int((expires_at - timezone.now()).total_seconds()))
+
+    def publish():
+        cache.set(_revoked_key(revoked_id), True, timeout)
+        bump_revocation_version()
+
+    transaction.on_commit(publish)
+
+
+def purge_revoked_tokens() -> int:
+    """
+    Delete the revocations of tokens that have expired since.
+
+    Returns:
+        int: The number of rows deleted.
+    """
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,197 @@
+import hashlib
+import importlib
+import json
+import pkgutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+import drf_yasg
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import URLResolver, get_resolver
+from django.utils.encoding import force_bytes
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.renderers import _SpecRenderer
+from drf_yasg.views import get_schema_view
+from rest_framework.serializers import BaseSerializer
+
+import portalapi.serializers
+from portalapi.utils.http import make_etag, not_modified, set_validators
+
+SCHEMA_FINGERPRINT_KEY = "x-schema-fingerprint"
+
+
+def _describe_patterns(patterns, prefix=""):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _describe_patterns(
+                pattern.url_patterns, prefix + str(pattern.pattern)
+            )
+            continue
+        callback = pattern.callback
+        view = getattr(callback, "cls", None) or callback
+        actions = sorted((getattr(callback, "actions", None) or {}).items())
+        overrides = sorted(
+            f"{name}:{sorted(getattr(method, '_swagger_auto_schema', {}))}"
+            for name in dir(view)
+            if not name.startswith("__")
+            for method in [getattr(view, name, None)]
+            if hasattr(method, "_swagger_auto_schema")
+        )
+        yield (
+            f"{prefix}{pattern.pattern} {view.__module__}.{view.__qualname__} "
+            f"{actions} {overrides}"
+        )
+
+
+def _serializer_classes(cls=BaseSerializer):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _serializer_classes(subclass)
+
+
+def _project_serializer_classes():
+    # Import every serializer module so the set does not depend on which modules
+    # the current process happened to load already.
+    for module in pkgutil.walk_packages(
+        portalapi.serializers.__path__, f"{portalapi.serializers.__name__}."
+    ):
+        importlib.import_module(module.name)
+    return {
+        cls for cls in _serializer_classes() if cls.__module__.startswith("portalapi.")
+    }
+
+
+def _describe_serializer(serializer_class):
+    meta = getattr(serializer_class, "Meta", None)
+    model = getattr(meta, "model", None)
+    return (
+        f"{serializer_class.__module__}.{serializer_class.__qualname__} "
+        f"{sorted(getattr(serializer_class, '_declared_fields', {}))} "
+        f"{model._meta.label if model else ''} "
+        f"{getattr(meta, 'fields', '')} {getattr(meta, 'exclude', '')} "
+        f"{getattr(meta, 'read_only_fields', '')}"
+    )
+
+
+def schema_fingerprint() -> str:
+    """
+    Fingerprint of everything the schema is generated from: the URLconf (routes,
+    views, actions and ``swagger_auto_schema`` overrides), the declared fields of
+    every project serializer, the swagger settings and the drf_yasg version.
+    """
+    parts = [
+        drf_yasg.__version__,
+        repr(sorted(getattr(settings, "SWAGGER_SETTINGS", {}).items())),
+        *_describe_patterns(get_resolver().url_patterns),
+        *sorted(_describe_serializer(cls) for cls in _project_serializer_classes()),
+    ]
+    return hashlib.blake2b("\n".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def generate_schema(info=None, generator_class=None, fingerprint=None) -> OrderedDict:
+    info = info or swagger_settings.DEFAULT_INFO
+    generator_class = generator_class or swagger_settings.DEFAULT_GENERATOR_CLASS
+    # Without a request the schema carries no host, so clients use the host the
+    # file was served from.
+    spec = generator_class(info).get_schema(request=None, public=True).as_odict()
+    spec[SCHEMA_FINGERPRINT_KEY] = fingerprint or schema_fingerprint()
+    return spec
+
+
+def load_schema_file(path) -> Optional[OrderedDict]:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle, object_pairs_hook=OrderedDict)
+    except (OSError, ValueError):
+        return None
+
+
+def write_schema_file(path, spec: OrderedDict):
+    path = Path(path)
+    temporary = path.with_suffix(f"{path.suffix}.tmp")
+    temporary.write_text(json.dumps(spec, ensure_ascii=False), encoding="utf-8")
+    temporary.replace(path)
+
+
+class SchemaDocument:
+    """
+    Generated OpenAPI document with its encodings memoized per spec renderer.
+
+    Attributes:
+        spec (OrderedDict): The schema as generated by drf_yasg.
+        fingerprint (str): The ``schema_fingerprint`` the schema was generated for.
+    """
+
+    def __init__(self, spec: OrderedDict):
+        self.spec = spec
+        self.fingerprint = spec.get(SCHEMA_FINGERPRINT_KEY, "")
+        self._rendered: Dict[str, bytes] = {}
+
+    def etag(self, renderer) -> str:
+        return make_etag("openapi", self.fingerprint, renderer.media_type)
+
+    def render(self, renderer) -> bytes:
+        key = renderer.media_type
+        if key not in self._rendered:
+            codec = renderer.codec_class(renderer.validators)
+            # The codecs only accept Swagger objects in ``encode``; the dict the
+            # document is stored as goes through the same dump they use.
+            self._rendered[key] = force_bytes(codec._dump_dict(self.spec))
+        return self._rendered[key]
+
+
+_lock = threading.Lock()
+_document: Optional[SchemaDocument] = None
+
+
+def get_schema_document(info=None, generator_class=None) -> SchemaDocument:
+    """
+    Return the process wide schema document.
+
+    On first use the file written by ``generate_schema`` is loaded. It is only
+    regenerated in-process when its fingerprint no longer matches the running
+    code, e.g. when the file is missing or stale after a deploy.
+    """
+    global _document  # pylint: disable=global-statement
+    document = _document
+    if document is None:
+        with _lock:
+            if _document is None:
+                fingerprint = schema_fingerprint()
+                spec = load_schema_file(settings.OPENAPI_SCHEMA_PATH)
+                if spec is None or spec.get(SCHEMA_FINGERPRINT_KEY) != fingerprint:
+                    spec = generate_schema(info, generator_class, fingerprint)
+                _document = SchemaDocument(spec)
+            document = _document
+    return document
+
+
+def get_cached_schema_view(info, **kwargs):
+    """
+    ``drf_yasg.views.get_schema_view`` serving the spec from ``get_schema_document``.
+
+    The spec is rendered once per format and validated with an ETag, so polling
+    clients get a 304 without touching the generator. The Swagger/ReDoc pages keep
+    the stock (cheap, pattern-less) behaviour.
+    """
+    schema_view = get_schema_view(info, **kwargs)
+
+    class CachedSchemaView(schema_view):
+        def get(self, request, version="", format=None):
+            renderer = request.accepted_renderer
+            if not isinstance(renderer, _SpecRenderer):
+                return super().get(request, version, format)
+            document = get_schema_document(info, self.generator_class)
+            etag = document.etag(renderer)
+            response = not_modified(request, etag)
+            if response is None:
+                response = HttpResponse(
+                    document.render(renderer),
+                    content_type=f"{renderer.media_type}; charset={renderer.charset}",
+                )
+            return set_validators(response, etag, cache_control="public, no-cache")
+
+    return CachedSchemaView
@@ -0,0 +1,124 @@
+import gc
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+from gunicorn.app.base import BaseApplication
+from rest_framework.settings import api_settings
+
+from portalapi.utils import metrics
+from portalapi.utils.catalogue import get_catalogue
+from portalapi.utils.compatibility import get_compatibility_matrix
+from portalapi.utils.schema import get_schema_document
+
+logger = logging.getLogger(__name__)
+
+ASGI_WORKER_CLASS = "uvicorn.workers.UvicornWorker"
+
+# Settings that import their classes lazily on first use.
+_API_SETTINGS = (
+    "DEFAULT_RENDERER_CLASSES",
+    "DEFAULT_PARSER_CLASSES",
+    "DEFAULT_AUTHENTICATION_CLASSES",
+    "DEFAULT_PERMISSION_CLASSES",
+    "DEFAULT_PAGINATION_CLASS",
+    "DEFAULT_SCHEMA_CLASS",
+    "EXCEPTION_HANDLER",
+)
+
+
+def available_cpus() -> int:
+    """
+    Number of CPUs the process may use, honouring the affinity mask and a cgroup
+    v2 CPU quota (``docker run --cpus``).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, -(-int(quota) // int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY") or available_cpus() * 2 + 1)
+
+
+def warm_up():
+    """
+    Build everything workers would otherwise build lazily on their first requests.
+
+    Runs once in the master before forking so the URLconf, views, serializers,
+    API settings, schema document and reference data caches are shared
+    copy-on-write. Database connections opened here are closed again; forked
+    workers must never share a socket.
+    """
+    resolver = get_resolver()
+    resolver.url_patterns  # pylint: disable=pointless-statement
+    resolver.reverse_dict  # pylint: disable=pointless-statement
+    for name in _API_SETTINGS:
+        getattr(api_settings, name)
+    get_schema_document()
+    try:
+        get_catalogue()
+        get_compatibility_matrix()
+    except DatabaseError:
+        # E.g. the container starts before migrations ran; workers load lazily.
+        logger.warning("Reference data not preloaded", exc_info=True)
+    finally:
+        connections.close_all()
+    # Keep the collector from touching (and so copying) the preloaded objects.
+    gc.collect()
+    gc.freeze()
+
+
+class PortalApplication(BaseApplication):
+    """
+    Gunicorn application serving the project with preforked workers.
+
+    The application is always preloaded: ``load`` runs in the master, followed by
+    ``warm_up``. ``SIGHUP`` gracefully replaces the workers with new ones forked
+    from the same preloaded master (config is re-read, code is not); deploy new
+    code with ``SIGUSR2`` followed by ``SIGQUIT`` to the old master, or a
+    container restart.
+
+    Attributes:
+        options (dict): Gunicorn settings, ``None`` values are left to Gunicorn.
+        asgi (bool): Serve the ASGI application with uvicorn workers.
+    """
+
+    def __init__(self, options: dict, asgi: bool = False):
+        self.options = options
+        self.asgi = asgi
+        super().__init__()
+
+    def load_config(self):
+        self.cfg.set("preload_app", True)
+        if self.asgi:
+            self.cfg.set("worker_class", ASGI_WORKER_CLASS)
+        elif (self.options.get("threads") or 1) > 1:
+            self.cfg.set("worker_class", "gthread")
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        application = get_asgi_application() if self.asgi else get_wsgi_application()
+        # Every worker writes its metrics to its own file in the shared directory.
+        metrics.use_directory(
+            getattr(settings, "METRICS_DIR", None)
+            or tempfile.mkdtemp(prefix="portalapi-metrics-")
+        )
+        warm_up()
+        return application
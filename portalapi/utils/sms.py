@@ -0,0 +1,69 @@
+import sys
+import threading
+from typing import Iterable, List, NamedTuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class SMSMessage(NamedTuple):
+    to: str
+    body: str
+
+
+class BaseSMSBackend:
+    """
+    Base class of the SMS backends, the counterpart of Django's e-mail backends.
+
+    ``settings.SMS_BACKEND`` names the backend class: the console and local
+    memory ones below stand in for a provider when developing and testing.
+    """
+
+    def send_messages(self, messages: Iterable[SMSMessage]) -> int:
+        """
+        Send the messages.
+
+        Returns:
+            int: The number of messages sent.
+        """
+        raise NotImplementedError
+
+
+class ConsoleSMSBackend(BaseSMSBackend):
+    """
+    Writes the messages to the standard output.
+    """
+
+    _lock = threading.Lock()
+
+    def send_messages(self, messages):
+        count = 0
+        with self._lock:
+            for message in messages:
+                sys.stdout.write(f"SMS to {message.to}: {message.body}\n")
+                count += 1
+            sys.stdout.flush()
+        return count
+
+
+class LocMemSMSBackend(BaseSMSBackend):
+    """
+    Keeps the messages in ``outbox``, for the tests.
+    """
+
+    outbox: List[SMSMessage] = []
+
+    def send_messages(self, messages):
+        messages = list(messages)
+        LocMemSMSBackend.outbox.extend(messages)
+        return len(messages)
+
+
+def get_sms_backend() -> BaseSMSBackend:
+    return import_string(
+        getattr(settings, "SMS_BACKEND", "portalapi.utils.sms.ConsoleSMSBackend")
+    )()
+
+
+def send_sms(messages: Iterable[SMSMessage]) -> int:
+    return get_sms_backend().send_messages(messages)
@@ -0,0 +1,69 @@
+import hashlib
+import time
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+
+
+def cache_ident(*parts) -> str:
+    """
+    Fixed length cache key part for client supplied values (e-mails, addresses).
+    """
+    return hashlib.blake2b(
+        "\0".join(map(str, parts)).encode(), digest_size=16
+    ).hexdigest()
+
+
+class SlidingWindow:
+    """
+    Sliding window counter kept in the shared cache.
+
+    Hits are counted in fixed windows of ``duration`` seconds; the count over the
+    last ``duration`` seconds is estimated from the current window and the share
+    of the previous one still covered. It costs two cache keys per identity and
+    no read-modify-write: increments are atomic in the cache backend.
+
+    Attributes:
+        prefix (str): Cache key prefix.
+        limit (int): Hits allowed per window.
+        duration (int): Window length in seconds.
+    """
+
+    def __init__(self, prefix: str, limit: int, duration: int):
+        self.prefix = prefix
+        self.limit = limit
+        self.duration = duration
+
+    def keys(self, ident: str, now: float) -> List[str]:
+        window = int(now // self.duration)
+        return [
+            f"{self.prefix}:{ident}:{window}",
+            f"{self.prefix}:{ident}:{window - 1}",
+        ]
+
+    def estimate(self, values: Dict[str, int], ident: str, now: float) -> float:
+        """
+        Hits over the last ``duration`` seconds, from the ``keys`` fetched in
+        ``values`` (``cache.get_many``, possibly batched with other keys).
+        """
+        current, previous = self.keys(ident, now)
+        covered = 1 - (now % self.duration) / self.duration
+        return values.get(current, 0) + values.get(previous, 0) * covered
+
+    def wait(self, values: Dict[str, int], ident: str, now: float) -> Optional[int]:
+        """
+        Seconds to wait before the next hit is allowed, None when it is allowed.
+        """
+        if self.estimate(values, ident, now) < self.limit:
+            return None
+        return max(1, int(self.duration - now % self.duration))
+
+    def hit(self, ident: str, now: Optional[float] = None):
+        key = self.keys(ident, time.time() if now is None else now)[0]
+        # Kept for two windows, the next one still reads it as its previous.
+        cache.add(key, 0, timeout=self.duration * 2)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Expired or evicted between add and incr.
+            cache.set(key, 1, timeout=self.duration * 2)
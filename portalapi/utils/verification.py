@@ -0,0 +1,111 @@
+import time
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.utils.crypto import constant_time_compare, salted_hmac
+from rest_framework.exceptions import Throttled
+
+from portalapi.models import User
+from portalapi.utils.jobs import enqueue, job_handler
+from portalapi.utils.sms import SMSMessage, send_sms
+from portalapi.utils.throttling import SlidingWindow
+
+# Verified value and flag of each channel.
+CHANNELS = {
+    "email": ("email", "is_email_verified"),
+    "contact": ("contact", "is_contact_verified"),
+}
+
+
+def _window() -> int:
+    return int(time.time() // getattr(settings, "VERIFICATION_CODE_WINDOW", 600))
+
+
+def verification_code(user, channel: str, window: Optional[int] = None) -> str:
+    """
+    Six digit code verifying the current value of a channel of a user.
+
+    Codes are derived from the ``SECRET_KEY``, the value and the time window, so
+    nothing is stored: a code expires after one to two
+    ``settings.VERIFICATION_CODE_WINDOW`` and changing the value invalidates it.
+    """
+    field, _ = CHANNELS[channel]
+    value = str(getattr(user, field) or "")
+    window = _window() if window is None else window
+    digest = salted_hmac(
+        "portalapi.verification", f"{user.pk}:{channel}:{value}:{window}"
+    ).digest()
+    return f"{int.from_bytes(digest[:8], 'big') % 1_000_000:06d}"
+
+
+def _throttle(name: str, user, channel: str):
+    window = SlidingWindow(name.lower(), *getattr(settings, name))
+    ident = f"{user.pk}:{channel}"
+    now = time.time()
+    wait = window.wait(cache.get_many(window.keys(ident, now)), ident, now)
+    if wait is not None:
+        raise Throttled(wait=wait)
+    window.hit(ident, now)
+
+
+def request_verification(user, channel: str):
+    """
+    Queue the sending of a verification code.
+
+    Raises:
+        Throttled: If too many codes were requested for the channel.
+    """
+    if getattr(settings, "VERIFICATION_SEND_THROTTLE", None):
+        _throttle("VERIFICATION_SEND_THROTTLE", user, channel)
+    enqueue("verification.send", {"user_id": user.pk, "channel": channel})
+
+
+def verify(user, channel: str, code: str) -> bool:
+    """
+    Check a verification code and mark the channel verified.
+
+    Raises:
+        Throttled: If too many codes were tried for the channel.
+    """
+    if getattr(settings, "VERIFICATION_ATTEMPT_THROTTLE", None):
+        _throttle("VERIFICATION_ATTEMPT_THROTTLE", user, channel)
+    current = _window()
+    if not any(
+        constant_time_compare(code, verification_code(user, channel, window))
+        for window in (current, current - 1)
+    ):
+        return False
+    _, flag = CHANNELS[channel]
+    if not getattr(user, flag):
+        setattr(user, flag, True)
+        user.save(update_fields=[flag])
+    return True
+
+
+@job_handler("verification.send", batch_size=50)
+def send_verification_codes(payloads: List[dict]):
+    """
+    Send the verification codes of a batch of jobs, the e-mails over a single
+    connection.
+    """
+    users = User.objects.in_bulk({payload["user_id"] for payload in payloads})
+    emails, texts = [], []
+    for payload in payloads:
+        user, channel = users.get(payload["user_id"]), payload["channel"]
+        field, flag = CHANNELS[channel]
+        if user is None or not getattr(user, field) or getattr(user, flag):
+            continue
+        code = verification_code(user, channel)
+        body = f"Your Blood Donation Portal verification code is {code}."
+        if channel == "email":
+            emails.append(
+                EmailMessage("Verify your e-mail address", body, to=[user.email])
+            )
+        else:
+            texts.append(SMSMessage(str(user.contact), body))
+    if emails:
+        get_connection().send_messages(emails)
+    if texts:
+        send_sms(texts)
@@ -1,10 +1,121 @@
-from rest_framework import viewsets
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-from portalapi.models import BloodType
-from portalapi.serializers.request.aiding_serializers import BloodTypeSerializer
+from portalapi.models import BloodRequest, BloodType
+from portalapi.serializers.request.aiding_serializers import (
+    BloodRequestSerializer,
+    BloodTypeSerializer,
+)
+from portalapi.utils.blood_requests import start_fan_out
+from portalapi.utils.catalogue import get_catalogue
+from portalapi.utils.compatibility import get_compatibility_matrix
+from portalapi.utils.http import make_etag, not_modified, set_validators
+from portalapi.utils.permissions import HasRoleScope
+from portalapi.utils.rbac import get_role_scopes
+
+
+def catalogue_response(request, catalogue, renderer, media_type):
+    """
+    Blood type catalogue response, with the JSON bytes rendered once per version.
+    """
+    etag = make_etag(catalogue.etag, media_type)
+    response = not_modified(request, etag)
+    if response is None:
+        if renderer.format == "json":
+            response = HttpResponse(
+                catalogue.render(renderer, media_type),
+                content_type=renderer.media_type,
+            )
+        else:
+            response = Response(catalogue.data, status.HTTP_200_OK)
+    return set_validators(
+        response,
+        etag,
+        cache_control=f"public, max-age={settings.BLOOD_TYPE_CATALOGUE_MAX_AGE}",
+    )
 
 
 class BloodTypeViewSet(viewsets.ModelViewSet):
     model = BloodType
     queryset = BloodType.objects.all()
     serializer_class = BloodTypeSerializer
+    permission_classes = [HasRoleScope]
+    scope_entity = "bloodtype"
+    scope_public_actions = ("list", "retrieve", "donors", "recipients")
+    # The catalogue is bounded reference data served as one pre-rendered,
+    # ETag validated payload, paginating it would only add round trips.
+    pagination_class = None
+
+    def list(self, request, *args, **kwargs):
+        """
+        Blood type catalogue, served from the versioned in-memory payload.
+        """
+        return catalogue_response(
+            request,
+            get_catalogue(),
+            request.accepted_renderer,
+            request.accepted_media_type,
+        )
+
+    def get_compatibility_id(self, pk):
+        matrix = get_compatibility_matrix()
+        blood_type_id = matrix.resolve(pk)
+        if blood_type_id is None:
+            raise NotFound("Blood type not found.")
+        return matrix, blood_type_id
+
+    @action(detail=True, methods=["get"], url_path="donors")
+    def donors(self, request, pk=None):
+        """
+        Blood types that can donate to the given recipient blood type.
+        """
+        matrix, blood_type_id = self.get_compatibility_id(pk)
+        return Response(matrix.donors(blood_type_id), status.HTTP_200_OK)
+
+    @action(detail=True, methods=["get"], url_path="recipients")
+    def recipients(self, request, pk=None):
+        """
+        Blood types that can receive from the given donor blood type.
+        """
+        matrix, blood_type_id = self.get_compatibility_id(pk)
+        return Response(matrix.recipients(blood_type_id), status.HTTP_200_OK)
+
+
+class BloodRequestViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Blood requests of the current user, or of everyone with the
+    ``bloodrequest.view.all`` scope.
+
+    Creating a request only stores it and queues its fan-out: the notifications
+    to the compatible donors are recorded and sent by the job workers.
+    """
+
+    serializer_class = BloodRequestSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = BloodRequest.objects.select_related("blood_type")
+        if getattr(self, "swagger_fake_view", False):
+            return queryset.none()
+        user = self.request.user
+        if user.is_superuser or (
+            user.role_id is not None
+            and get_role_scopes(user.role_id).allows("bloodrequest", "view", "all")
+        ):
+            return queryset
+        return queryset.filter(requested_by_id=user.pk)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            start_fan_out(serializer.save(requested_by_id=self.request.user.pk))
@@ -0,0 +1,209 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.exceptions import (
+    APIException,
+    NotAcceptable,
+    NotAuthenticated,
+    PermissionDenied,
+)
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+
+from portalapi.models import Scope, User
+from portalapi.serializers.request.donor_serializers import (
+    DonorSearchSerializer,
+    DonorSerializer,
+)
+from portalapi.serializers.request.user_serializers import UserSerializerWithProfile
+from portalapi.utils.authentication import CachedJWTAuthentication
+from portalapi.utils.catalogue import aget_catalogue
+from portalapi.utils.compatibility import aget_compatibility_matrix
+from portalapi.utils.donor_search import partition_by_blood_type, search_donors
+from portalapi.utils.http import not_modified, set_validators
+from portalapi.utils.permissions import HasRoleScope
+from portalapi.utils.renderers import CamelCaseJSONRenderer
+from portalapi.views.aiding_views import BloodTypeViewSet, catalogue_response
+from portalapi.views.donor_views import DonorViewSet
+from portalapi.views.profile_views import ProfileViewSet, profile_validators
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def json_response(data, renderer, media_type, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        renderer.render(data, media_type), status=status_code, content_type=media_type
+    )
+
+
+def error_response(exc, renderer, media_type):
+    response = exception_handler(exc, {})
+    if response is None:
+        raise exc
+    error = json_response(response.data, renderer, media_type, response.status_code)
+    for header, value in response.headers.items():
+        if header.lower() != "content-type":
+            error[header] = value
+    return error
+
+
+def _allowed_methods(sync_view):
+    methods = set(sync_view.actions)
+    if "get" in methods:
+        methods.add("head")
+    methods.add("options")
+    return ", ".join(
+        method.upper()
+        for method in sync_view.cls.http_method_names
+        if method in methods
+    )
+
+
+def async_read_view(sync_view):
+    """
+    Serve GET/HEAD requests of a viewset route from an async handler.
+
+    The handler receives a DRF ``Request`` wrapper (without authenticators) and the
+    negotiated JSON renderer. Every other method, and clients asking for another
+    format (e.g. the browsable API), are delegated to the sync ``sync_view``, so
+    the route keeps its full DRF behaviour.
+    """
+    negotiator = DefaultContentNegotiation()
+    renderers = [CamelCaseJSONRenderer()]
+    allow = _allowed_methods(sync_view)
+    delegate = sync_to_async(sync_view)
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in READ_METHODS:
+                return await delegate(request, *args, **kwargs)
+            api_request = Request(request)
+            try:
+                renderer, media_type = negotiator.select_renderer(
+                    api_request, renderers
+                )
+            except (NotAcceptable, Http404):
+                return await delegate(request, *args, **kwargs)
+            try:
+                response = await handler(api_request, renderer, media_type)
+            except APIException as exc:
+                response = error_response(exc, renderer, media_type)
+            response["Allow"] = allow
+            patch_vary_headers(response, ["Accept"])
+            return response
+
+        view.csrf_exempt = True
+        # Labels the route like its viewset in the metrics.
+        view.view_class = sync_view.cls
+        view.actions = sync_view.actions
+        return view
+
+    return decorator
+
+
+async def authenticate(request):
+    """
+    Authenticate a request with the cached JWT snapshots, without a thread hop.
+
+    Raises:
+        NotAuthenticated: If the request carries no token.
+        AuthenticationFailed: If the token or its user is not valid.
+    """
+    authenticator = CachedJWTAuthentication()
+    try:
+        result = await authenticator.aauthenticate(request)
+        if result is None:
+            raise NotAuthenticated()
+    except APIException as exc:
+        exc.auth_header = authenticator.authenticate_header(request)
+        raise
+    request.user, request.auth = result
+    return request.user
+
+
+async def check_scope(request, view):
+    """
+    Apply ``HasRoleScope`` for ``view``, off the event loop as the compiled
+    scopes may come from the shared cache or the database.
+
+    Raises:
+        PermissionDenied: If the user's role lacks the scope.
+    """
+    if not await sync_to_async(HasRoleScope().has_permission)(request, view):
+        raise PermissionDenied()
+
+
+async def aprefetch_role_scopes(user):
+    """
+    Async stand-in for ``prefetch_related_objects([user], "role__scopes")``.
+    """
+    role = user.role
+    if role is None:
+        return
+    scopes = role.scopes.all()
+    scopes._result_cache = [scope async for scope in Scope.objects.filter(role=role)]
+    scopes._prefetch_done = True
+    role._prefetched_objects_cache = {"scopes": scopes}
+
+
+@async_read_view(
+    ProfileViewSet.as_view({"get": "me"}, basename="profile", detail=False)
+)
+async def profile_me(request, renderer, media_type):
+    user = await authenticate(request)
+    user = await User.objects.select_related("role", "profile").aget(pk=user.pk)
+    etag, last_modified = profile_validators(user, media_type)
+    response = not_modified(request, etag, last_modified)
+    if response is None:
+        await aprefetch_role_scopes(user)
+        user_data = UserSerializerWithProfile(user).data
+        response = json_response(user_data, renderer, media_type)
+    return set_validators(response, etag, last_modified)
+
+
+@async_read_view(
+    BloodTypeViewSet.as_view(
+        {"get": "list", "post": "create"}, basename="type", detail=False
+    )
+)
+async def blood_type_list(request, renderer, media_type):
+    return catalogue_response(request, await aget_catalogue(), renderer, media_type)
+
+
+@async_read_view(
+    DonorViewSet.as_view({"get": "search"}, basename="donors", detail=False)
+)
+async def donor_search(request, renderer, media_type):
+    await authenticate(request)
+    await check_scope(request, DonorViewSet(action="search"))
+    matrix = await aget_compatibility_matrix()
+    serializer = DonorSearchSerializer(
+        data=request.query_params, context={"matrix": matrix}
+    )
+    if not serializer.is_valid():
+        return json_response(
+            serializer.errors, renderer, media_type, status.HTTP_400_BAD_REQUEST
+        )
+    params = serializer.validated_data
+    queryset = search_donors(
+        params["blood_type"],
+        pin_code=params.get("pin_code"),
+        state=params.get("state"),
+        min_age=params["min_age"],
+        max_age=params["max_age"],
+        matrix=matrix,
+        eligible=params["eligible"],
+    )
+    paginator = DonorViewSet.pagination_class()
+    page = await paginator.apaginate_queryset(
+        partition_by_blood_type(queryset, params["blood_type"], matrix),
+        request,
+        view=DonorViewSet,
+    )
+    response = paginator.get_paginated_response(DonorSerializer(page, many=True).data)
+    return json_response(response.data, renderer, media_type)
@@ -2,27 +2,44 @@ from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from portalapi.models import User
+from portalapi.serializers.request.token_serializers import LogoutSerializer
 from portalapi.serializers.request.user_serializers import (
     LoginSerializer,
     RegisterSerializer,
     UserSerializer,
+    VerificationRequestSerializer,
+    VerificationSerializer,
 )
 from portalapi.serializers.response.auth_response_serializers import (
     AuthResponseSerializer,
 )
+from portalapi.utils.authentication import VersionedRefreshToken
 from portalapi.utils.constants import ResponseMessage
+from portalapi.utils.revocation import revoke_token
+from portalapi.utils.verification import request_verification, verify
 
 
 class AuthViewSet(viewsets.GenericViewSet):
+    def get_permissions(self):
+        if self.action in ("send_verification", "verify"):
+            return [IsAuthenticated()]
+        return [AllowAny()]
+
     def get_serializer_class(self):
         if self.action == "login":
             return LoginSerializer
         if self.action == "register":
             return RegisterSerializer
+        if self.action == "logout":
+            return LogoutSerializer
+        if self.action == "send_verification":
+            return VerificationRequestSerializer
+        if self.action == "verify":
+            return VerificationSerializer
         return UserSerializer
 
     @swagger_auto_schema(
@@ -35,7 +52,9 @@ class AuthViewSet(viewsets.GenericViewSet):
     )
     @action(methods=["post"], url_path="login", detail=False)
     def login(self, *args, **kwargs):
-        serializer = LoginSerializer(data=self.request.data)
+        serializer = LoginSerializer(
+            data=self.request.data, context=self.get_serializer_context()
+        )
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         user_data = serializer.validated_data
@@ -63,9 +82,12 @@ class AuthViewSet(viewsets.GenericViewSet):
         serializer = RegisterSerializer(data=self.request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        serializer.validated_data.pop("confirm_password")
-        user = User.objects.create_user(**serializer.validated_data)
-        refresh_token = RefreshToken.for_user(user)
+        user = serializer.save()
+        # Sent by the job workers, the response does not wait for it.
+        request_verification(user, "email")
+        if user.contact:
+            request_verification(user, "contact")
+        refresh_token = VersionedRefreshToken.for_user(user)
         user_data = UserSerializer(user).data
         response_data = {
             "message": ResponseMessage.USERREGISTEREDSUCCESSFULLY.value,
@@ -74,3 +96,61 @@ class AuthViewSet(viewsets.GenericViewSet):
             "refresh_token": str(refresh_token),
         }
         return Response(response_data, status=status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Response(
+                description=ResponseMessage.USERLOGGEDOUTSUCCESSFULLY.value
+            )
+        }
+    )
+    @action(methods=["POST"], url_path="logout", detail=False)
+    def logout(self, *args, **kwargs):
+        serializer = LogoutSerializer(data=self.request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        if self.request.auth is not None:
+            # It may predate session ids or belong to another session.
+            revoke_token(self.request.auth)
+        return Response(
+            {"message": ResponseMessage.USERLOGGEDOUTSUCCESSFULLY.value},
+            status=status.HTTP_200_OK,
+        )
+
+    @swagger_auto_schema(
+        responses={
+            202: openapi.Response(description=ResponseMessage.VERIFICATIONSENT.value)
+        }
+    )
+    @action(methods=["POST"], url_path="verify/send", detail=False)
+    def send_verification(self, *args, **kwargs):
+        serializer = VerificationRequestSerializer(
+            data=self.request.data, context=self.get_serializer_context()
+        )
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        request_verification(self.request.user, serializer.validated_data["channel"])
+        return Response(
+            {"message": ResponseMessage.VERIFICATIONSENT.value},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @swagger_auto_schema(
+        responses={200: openapi.Response(description=ResponseMessage.VERIFIED.value)}
+    )
+    @action(methods=["POST"], url_path="verify", detail=False)
+    def verify(self, *args, **kwargs):
+        serializer = VerificationSerializer(data=self.request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # The authenticated user is a cached snapshot, the flag is saved on the model.
+        user = User.objects.get(pk=self.request.user.pk)
+        if not verify(user, **serializer.validated_data):
+            return Response(
+                {"code": ["Invalid or expired code."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"message": ResponseMessage.VERIFIED.value}, status=status.HTTP_200_OK
+        )
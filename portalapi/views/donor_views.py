@@ -0,0 +1,147 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from drf_yasg import openapi
+from drf_yasg.utils import swagger_auto_schema
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from portalapi.models import Donation
+from portalapi.serializers.request.donor_serializers import (
+    DonationSerializer,
+    DonorExportSerializer,
+    DonorSearchSerializer,
+    DonorSerializer,
+)
+from portalapi.serializers.response.donor_response_serializers import (
+    DonorSearchResponseSerializer,
+)
+from portalapi.utils.donor_export import (
+    EXPORT_CONTENT_TYPES,
+    aiter_chunks,
+    export_donors,
+    export_filename,
+)
+from portalapi.utils.donor_search import partition_by_blood_type, search_donors
+from portalapi.utils.permissions import HasRoleScope
+from portalapi.utils.rbac import get_role_scopes
+
+
+class DonorViewSet(viewsets.GenericViewSet):
+    """
+    Donor search and export. Both expose donors' contact details, so they
+    require the ``donor.search`` and ``donor.export`` scopes.
+    """
+
+    permission_classes = [IsAuthenticated]
+    scope_entity = "donor"
+    cursor_ordering = "id"
+
+    def get_permissions(self):
+        if self.action in ("search", "export"):
+            return [HasRoleScope()]
+        return super().get_permissions()
+
+    def get_serializer_class(self):
+        return DonorSerializer
+
+    @swagger_auto_schema(
+        query_serializer=DonorSearchSerializer(),
+        responses={200: DonorSearchResponseSerializer()},
+    )
+    @action(detail=False, methods=["get"], url_path="search")
+    def search(self, request):
+        serializer = DonorSearchSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+        queryset = search_donors(
+            params["blood_type"],
+            pin_code=params.get("pin_code"),
+            state=params.get("state"),
+            min_age=params["min_age"],
+            max_age=params["max_age"],
+            eligible=params["eligible"],
+        )
+        page = self.paginate_queryset(
+            partition_by_blood_type(queryset, params["blood_type"])
+        )
+        return self.get_paginated_response(DonorSerializer(page, many=True).data)
+
+    @swagger_auto_schema(
+        query_serializer=DonorExportSerializer(),
+        responses={200: openapi.Response("CSV or NDJSON file, gzipped by default.")},
+    )
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream the donors as a CSV or NDJSON file.
+
+        Served over ASGI the chunks are handed to the event loop one at a time.
+        Long exports outlive the default 30 second timeout of the sync Gunicorn
+        workers: serve them with ``serve --threads`` above 1, ``--asgi`` or a
+        higher ``--timeout``.
+        """
+        # A plain dict keeps the serializer defaults for omitted booleans.
+        serializer = DonorExportSerializer(data=request.query_params.dict())
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+        file_format, compress = params["file_format"], params["compress"]
+        chunks = export_donors(
+            blood_type_id=params.get("blood_type"),
+            state=params.get("state"),
+            file_format=file_format,
+            compress=compress,
+        )
+        # pylint: disable-next=protected-access
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(
+            chunks,
+            content_type=(
+                "application/gzip" if compress else EXPORT_CONTENT_TYPES[file_format]
+            ),
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{export_filename(file_format, compress)}"'
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+class DonationViewSet(
+    mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet
+):
+    """
+    Donations. Recording one requires the ``donation.create`` scope and moves the
+    donor's eligibility date. The list holds every donation for the
+    ``donation.view.all`` scope (the staff recording them), and the user's own
+    donations otherwise.
+    """
+
+    serializer_class = DonationSerializer
+    permission_classes = [IsAuthenticated]
+    scope_entity = "donation"
+
+    def get_permissions(self):
+        if self.action == "create":
+            return [HasRoleScope()]
+        return super().get_permissions()
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            return Donation.objects.none()
+        if self.views_all_donations():
+            return Donation.objects.all()
+        return Donation.objects.filter(donor_id=self.request.user.pk)
+
+    def views_all_donations(self) -> bool:
+        user = self.request.user
+        if user.is_superuser:
+            return True
+        if user.role_id is None:
+            return False
+        levels = get_role_scopes(user.role_id).levels(self.scope_entity, "view")
+        return "all" in levels
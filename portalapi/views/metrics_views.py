@@ -0,0 +1,44 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from portalapi.utils.metrics import CONTENT_TYPE, render_metrics
+
+
+def _scrape_allowed(request) -> bool:
+    """
+    Fail closed: without ``METRICS_TOKEN`` only ``DEBUG`` and clients in
+    ``METRICS_ALLOWED_NETWORKS`` may scrape.
+    """
+    token = settings.METRICS_TOKEN
+    if token:
+        return constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        )
+    if settings.DEBUG:
+        return True
+    try:
+        address = ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ip_network(network)
+        for network in getattr(settings, "METRICS_ALLOWED_NETWORKS", ())
+    )
+
+
+@require_GET
+def metrics(request):
+    """
+    Prometheus scrape endpoint, aggregating every worker process.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _scrape_allowed(request):
+        response = HttpResponse(status=401)
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
@@ -1,9 +1,27 @@
+from django.db.models import prefetch_related_objects
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from portalapi.models import User
 from portalapi.serializers.request.user_serializers import UserSerializerWithProfile
+from portalapi.utils.http import make_etag, not_modified, set_validators
+
+
+def profile_validators(user, media_type):
+    """
+    Return the ``(etag, last_modified)`` of a user loaded with its role and profile.
+    """
+    stamps = [user.modified_date]
+    # Registered users have no profile until they fill it in.
+    profile = getattr(user, "profile", None)
+    if profile is not None:
+        stamps.append(profile.modified_date)
+    if user.role is not None:
+        stamps.append(user.role.modified_date)
+    etag = make_etag(user.pk, user.role_id, *stamps, media_type)
+    return etag, max(stamps)
 
 
 class ProfileViewSet(viewsets.GenericViewSet):
@@ -14,6 +32,18 @@ class ProfileViewSet(viewsets.GenericViewSet):
 
     @action(detail=False, methods=["get"], url_path="me")
     def me(self, request):
-        user = request.user
-        user_data = UserSerializerWithProfile(user).data
-        return Response(user_data, status.HTTP_200_OK)
+        """
+        Current user with role and profile.
+
+        The user, role and profile are loaded with a single joined query, whose
+        modification stamps answer conditional requests before any serialization.
+        Role scopes are only prefetched when the body has to be rendered.
+        """
+        user = User.objects.select_related("role", "profile").get(pk=request.user.pk)
+        etag, last_modified = profile_validators(user, request.accepted_media_type)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            prefetch_related_objects([user], "role__scopes")
+            user_data = UserSerializerWithProfile(user).data
+            response = Response(user_data, status.HTTP_200_OK)
+        return set_validators(response, etag, last_modified)